@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Iterable, Iterator, Union
+
+
+# The symbols of a board in order, with the index of every symbol. Alphabets are immutable and interned by
+# get_alphabet, so all cells, the solver, the window and the codecs of a board share one object and every lookup is a
+# dict access. An alphabet can be used like the list of symbols (len, indexing, iteration, in).
+class Alphabet:
+    __slots__ = ("__symbols", "__symbol_index", "__no_symbol", "__separator")
+
+    def __init__(self, symbols: tuple[str, ...]) -> None:
+        self.__symbols: tuple[str, ...] = symbols
+        self.__symbol_index: dict[str, int] = {symbol: n for n, symbol in enumerate(symbols)}
+        # the smallest number that isn't a symbol, marks an empty square in a field string
+        i: int = 0
+        while str(i) in self.__symbol_index:
+            i += 1
+        self.__no_symbol: str = str(i)
+        # compact strings only need a separator if a symbol has more than one character
+        self.__separator: str = "" if all(len(symbol) == 1 for symbol in symbols) else ","
+
+    def get_index(self, symbol: str) -> int:
+        # -1 for anything that isn't a symbol, like Sudoku.get_values
+        return self.__symbol_index.get(symbol, -1)
+
+    def get_symbol(self, index: int) -> str:
+        # "" for -1
+        return self.__symbols[index] if index >= 0 else ""
+
+    def get_symbols(self) -> tuple[str, ...]:
+        return self.__symbols
+
+    def get_symbol_index(self) -> dict[str, int]:
+        # shared and must not be changed, for loops where the method call of get_index counts
+        return self.__symbol_index
+
+    def get_no_symbol(self) -> str:
+        return self.__no_symbol
+
+    def to_compact(self, values: list[int]) -> str:
+        # values row by row as one string like standard notation with "." for empty squares, e.g. "53..7....6.."
+        symbols: tuple[str, ...] = self.__symbols
+        return self.__separator.join(symbols[value] if value >= 0 else "." for value in values)
+
+    def from_compact(self, text: str) -> list[int]:
+        items: Union[str, list[str]] = text.split(self.__separator) if self.__separator else text
+        return [self.__symbol_index.get(item, -1) for item in items]
+
+    def __len__(self) -> int:
+        return len(self.__symbols)
+
+    def __getitem__(self, index: int) -> str:
+        return self.__symbols[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__symbols)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self.__symbol_index
+
+    def __repr__(self) -> str:
+        return f"Alphabet({list(self.__symbols)})"
+
+    def __reduce__(self) -> tuple:
+        # worker processes get the interned alphabet of their own process
+        return get_alphabet, (self.__symbols,)
+
+
+@lru_cache(maxsize=None)
+def _intern(symbols: tuple[str, ...]) -> Alphabet:
+    return Alphabet(symbols)
+
+
+def get_alphabet(symbols: Union[Alphabet, Iterable[Union[int, str]]]) -> Alphabet:
+    # the shared alphabet of the symbols as strings, "" (an empty square) is never a symbol
+    if isinstance(symbols, Alphabet):
+        return symbols
+    return _intern(tuple(str(symbol) for symbol in symbols if str(symbol) != ""))
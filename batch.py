@@ -0,0 +1,249 @@
+import argparse
+import time
+import numpy as np
+from text import Sudoku, Pruner
+from search import Search
+from units import Units, standard_field_groups, add_board_arguments, board_from_arguments
+from string_conversion import SudokuString, read_puzzles
+from solution_cache import SolutionCache, puzzle_key
+from alphabet import Alphabet, get_alphabet
+from typing import Iterable, Union
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    # NumPy before 2.0
+    masks = masks - ((masks >> 1) & 0x5555555555555555)
+    masks = (masks & 0x3333333333333333) + ((masks >> 2) & 0x3333333333333333)
+    masks = (masks + (masks >> 4)) & 0x0F0F0F0F0F0F0F0F
+    return (masks * 0x0101010101010101) >> 56
+
+
+def parse_values(puzzle: SudokuString, all_symbols: Alphabet) -> Union[None, list[int]]:
+    # like Sudoku.get_values, empty squares are -1 and notes are ignored. None if a square is neither empty nor a
+    # symbol, e.g. a puzzle with other symbols
+    symbol_index: dict[str, int] = all_symbols.get_symbol_index()
+    empty: set[str] = {"", ".", all_symbols.get_no_symbol()}
+    values: list[int] = []
+    for row in puzzle.__str__("sudokustring").split("%"):
+        for item in row.split("&"):
+            symbol: str = item.split("_")[0]
+            if symbol not in symbol_index and symbol not in empty:
+                return None
+            values.append(symbol_index.get(symbol, -1))
+    return values
+
+
+def format_values(values: list[int], all_symbols: Alphabet, width: int) -> str:
+    # SudokuString notation of a solution, see Sudoku.__repr__
+    symbols: list[str] = [all_symbols.get_symbol(value) for value in values]
+    return "%".join("&".join(symbols[row:row + width]) for row in range(0, len(symbols), width))
+
+
+# Propagates many puzzles at once: the candidate bitmasks of the batch are one (puzzles x cells) array and every step
+# is a NumPy operation over the whole array. A step removes the symbols of solved cells from their peers and fills in
+# symbols with one place left in a unit (hidden singles), until no puzzle changes. Puzzles that stall are finished
+# one by one with Search, which also runs the pruners of variant constraints.
+class BatchSolver:
+    def __init__(self, units: Units, symbol_count: int, pruners: Union[None, list[Pruner]] = None) -> None:
+        if symbol_count > 62:
+            raise ValueError("The batch solver supports at most 62 symbols")
+        self.__units: Units = units
+        self.__symbol_count: int = symbol_count
+        self.__cell_count: int = units.get_cell_count()
+        self.__full: int = (1 << symbol_count) - 1
+        self.__pruners: list[Pruner] = pruners or []
+        # peers padded with the index of an extra cell that is always 0
+        peers: list[tuple[int, ...]] = [units.get_peers(cell) for cell in range(self.__cell_count)]
+        width: int = max((len(cell_peers) for cell_peers in peers), default=0)
+        self.__peers: np.ndarray = np.full((self.__cell_count, width), self.__cell_count, dtype=np.intp)
+        for cell, cell_peers in enumerate(peers):
+            self.__peers[cell, :len(cell_peers)] = cell_peers
+        # only units with a square for every symbol have to contain each symbol
+        self.__full_units: np.ndarray = np.array([unit for unit in units.get_units() if len(unit) == symbol_count],
+                                                 dtype=np.intp).reshape(-1, symbol_count)
+        self.__stats: dict[str, int] = {"propagated": 0, "searched": 0, "unsolvable": 0, "invalid": 0, "steps": 0}
+
+    def get_stats(self) -> dict[str, int]:
+        # puzzles solved by propagation alone, finished by search, without solution and not of this board (wrong
+        # number of squares or symbols), and propagation steps
+        return dict(self.__stats)
+
+    def __step(self, masks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # (new masks, broken puzzles) after one round of naked and hidden singles
+        counts: np.ndarray = _popcount(masks)
+        broken: np.ndarray = (counts == 0).any(axis=1)
+        solved: np.ndarray = np.concatenate([np.where(counts == 1, masks, 0),
+                                             np.zeros((masks.shape[0], 1), dtype=masks.dtype)], axis=1)
+        peer_bits: np.ndarray = np.zeros_like(masks)
+        for column in range(self.__peers.shape[1]):
+            peer_bits |= solved[:, self.__peers[:, column]]
+        # two peers with the same symbol
+        broken |= ((solved[:, :-1] & peer_bits) != 0).any(axis=1)
+        masks = np.where(counts == 1, masks, masks & ~peer_bits)
+
+        if len(self.__full_units):
+            once: np.ndarray = np.zeros((masks.shape[0], len(self.__full_units)), dtype=masks.dtype)
+            twice: np.ndarray = np.zeros_like(once)
+            for position in range(self.__symbol_count):
+                unit_masks: np.ndarray = masks[:, self.__full_units[:, position]]
+                twice |= once & unit_masks
+                once |= unit_masks
+            broken |= (once != self.__full).any(axis=1)
+            singles: np.ndarray = once & ~twice
+            for position in range(self.__symbol_count):
+                cells: np.ndarray = self.__full_units[:, position]
+                unit_masks = masks[:, cells]
+                hits: np.ndarray = unit_masks & singles
+                # a cell can't be the only place of two symbols
+                broken |= (_popcount(hits) > 1).any(axis=1)
+                masks[:, cells] = np.where(hits != 0, hits, unit_masks)
+        return masks, broken
+
+    def propagate(self, masks: np.ndarray) -> np.ndarray:
+        # propagates the masks in place, returns the broken puzzles
+        broken: np.ndarray = np.zeros(masks.shape[0], dtype=bool)
+        active: np.ndarray = np.arange(masks.shape[0])
+        while len(active):
+            self.__stats["steps"] += 1
+            old: np.ndarray = masks[active]
+            new, new_broken = self.__step(old.copy())
+            broken[active[new_broken]] = True
+            masks[active] = new
+            active = active[~new_broken & (new != old).any(axis=1)]
+        return broken
+
+    def is_valid(self, puzzle: list[int]) -> bool:
+        return len(puzzle) == self.__cell_count and all(-1 <= value < self.__symbol_count for value in puzzle)
+
+    def solve(self, puzzles: list[list[int]]) -> list[Union[None, list[int]]]:
+        # values (see Sudoku.get_values) of the first solution of every puzzle, None if there is none or the puzzle
+        # isn't valid (see is_valid), invalid puzzles don't stop the others
+        valid: list[list[int]] = [puzzle for puzzle in puzzles if self.is_valid(puzzle)]
+        if len(valid) < len(puzzles):
+            self.__stats["invalid"] += len(puzzles) - len(valid)
+            solutions: list[Union[None, list[int]]] = self.solve(valid) if valid else []
+            solutions.reverse()
+            return [solutions.pop() if self.is_valid(puzzle) else None for puzzle in puzzles]
+        masks: np.ndarray = np.full((len(puzzles), self.__cell_count), self.__full, dtype=np.int64)
+        values: np.ndarray = np.array(puzzles, dtype=np.int64).reshape(len(puzzles), self.__cell_count)
+        given: np.ndarray = values >= 0
+        masks[given] = np.left_shift(1, values[given])
+        broken: np.ndarray = self.propagate(masks)
+
+        singles: np.ndarray = _popcount(masks) == 1
+        propagated: np.ndarray = np.where(singles, np.log2(np.maximum(masks, 1)).astype(np.int64), -1)
+        complete: np.ndarray = singles.all(axis=1) & ~broken
+        solutions: list[Union[None, list[int]]] = []
+        search: Union[None, Search] = None
+        for n in range(len(puzzles)):
+            if broken[n]:
+                self.__stats["unsolvable"] += 1
+                solutions.append(None)
+                continue
+            if complete[n] and not self.__pruners:
+                self.__stats["propagated"] += 1
+                solutions.append(propagated[n].tolist())
+                continue
+            # stalled, or the constraints still have to check the grid
+            if search is None:
+                search = Search(self.__units, self.__symbol_count, pruners=self.__pruners)
+            solution: Union[None, list[int]] = None
+            if search.start(propagated[n].tolist()):
+                solution = search.next_solution()
+            self.__stats["searched" if solution is not None else "unsolvable"] += 1
+            solutions.append(solution)
+        return solutions
+
+
+def solve_puzzles(puzzles: Iterable[SudokuString], sudoku_size: tuple[int, int] = (9, 9),
+                  rules: Union[None, dict[str, Union[bool, list[list[tuple[int, int]]]]]] = None,
+                  all_symbols: Union[None, Alphabet, list[str]] = None, batch_size: int = 1024,
+                  cache: Union[None, SolutionCache] = None) -> Iterable[tuple[str, Union[None, str]]]:
+    # (status, solution in SudokuString notation) of every puzzle in order, the status is "solved", "unsolvable" or
+    # "invalid" for puzzles that don't fit the board, like the statuses of the solving service.
+    # Puzzles found in the cache aren't solved again, the others are added to it.
+    all_symbols = get_alphabet(all_symbols if all_symbols is not None else range(1, max(sudoku_size) + 1))
+    if rules is None:
+        rules = {"horizontal": True, "vertical": True, "boxes": standard_field_groups(sudoku_size)}
+    sudoku: Sudoku = Sudoku(size=(sudoku_size[1], sudoku_size[0]), rules=rules, all_symbols=all_symbols)
+    solver: BatchSolver = BatchSolver(sudoku.get_units(), len(all_symbols), sudoku.get_pruners())
+
+    def solve_batch(batch: list[tuple[Union[None, str], Union[None, str], Union[None, list[int]]]]
+                    ) -> Iterable[tuple[str, Union[None, str]]]:
+        # batch entries are (cache key, status, solution if the status is known else puzzle values)
+        unsolved: list[list[int]] = [values for _, status, values in batch if status is None]
+        solutions: list[Union[None, list[int]]] = solver.solve(unsolved) if unsolved else []
+        solutions.reverse()
+        for key, status, values in batch:
+            if status is None:
+                values = solutions.pop()
+                status = "solved" if values is not None else "unsolvable"
+                if cache is not None:
+                    cache.put(key, values)
+            yield status, format_values(values, all_symbols, sudoku_size[0]) if values is not None else None
+
+    batch: list[tuple[Union[None, str], Union[None, str], Union[None, list[int]]]] = []
+    for puzzle in puzzles:
+        values: Union[None, list[int]] = parse_values(puzzle, all_symbols)
+        key: Union[None, str] = None
+        status: Union[None, str] = None
+        if values is None or not solver.is_valid(values):
+            values = None
+            status = "invalid"
+        elif cache is not None:
+            key = puzzle_key(values, sudoku_size, all_symbols, rules)
+            found, solution = cache.get(key)
+            if found:
+                values = solution
+                status = "solved" if solution is not None else "unsolvable"
+        batch.append((key, status, values))
+        if len(batch) == batch_size:
+            yield from solve_batch(batch)
+            batch = []
+    if batch:
+        yield from solve_batch(batch)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Solve a file of puzzles in vectorized batches.")
+    parser.add_argument("filename")
+    parser.add_argument("--out", default=None, help="file for the solutions in SudokuString notation")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    add_board_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--compare", action="store_true", help="also time the scalar solver on the same puzzles")
+    parser.add_argument("--cache", default=None, help="SQLite file of solutions to consult and add to")
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+    puzzles: list[SudokuString] = list(read_puzzles(args.filename, notation=args.notation, width=args.width))
+
+    start_time: float = time.time()
+    cache: Union[None, SolutionCache] = SolutionCache(args.cache) if args.cache is not None else None
+    results: list[tuple[str, Union[None, str]]] = list(solve_puzzles(puzzles, sudoku_size, rules, all_symbols,
+                                                                     args.batch_size, cache))
+    end_time: float = time.time()
+    if cache is not None:
+        cache.close()
+        print("Cache: " + ", ".join(f"{name} {count}" for name, count in cache.get_stats().items()))
+    print(f"Batch: solved {sum(status == 'solved' for status, _ in results)} of {len(puzzles)} puzzles in "
+          f"{end_time - start_time} seconds ({len(puzzles) / max(end_time - start_time, 1e-9):.1f} puzzles per second)")
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            for status, solution in results:
+                f.write((solution if solution is not None else status) + "\n")
+
+    if args.compare:
+        start_time = time.time()
+        for puzzle in puzzles:
+            Sudoku(size=(args.height, args.width), field_string=puzzle.__str__("sudokustring"), rules=rules,
+                   all_symbols=all_symbols).solve()
+        end_time = time.time()
+        print(f"Scalar: {len(puzzles)} puzzles in {end_time - start_time} seconds "
+              f"({len(puzzles) / max(end_time - start_time, 1e-9):.1f} puzzles per second)")
+
+
+if __name__ == "__main__":
+    main()
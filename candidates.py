@@ -0,0 +1,124 @@
+from units import Units
+from symbol import SudokuSymbol
+from alphabet import Alphabet, get_alphabet
+from typing import Callable, Union
+
+
+# Candidates of every cell as bitmasks (bit n stands for all_symbols[n]) plus how often each symbol occurs per unit.
+# Setting a value only updates the units of the cell and the candidates of its peers. The pruners of the constraints
+# (see Sudoku.get_pruners) only apply to get_pruned_mask, which is computed again after a change when it is asked for.
+class Candidates:
+    def __init__(self, units: Units, all_symbols: Union[Alphabet, list[str]],
+                 pruners: Union[None, list[Callable[[list[int], list[int]], Union[None, list[int]]]]] = None) -> None:
+        self.__units: Units = units
+        self.__all_symbols: Alphabet = get_alphabet(all_symbols)
+        self.__symbol_index: dict[str, int] = self.__all_symbols.get_symbol_index()
+        self.__full: int = (1 << len(all_symbols)) - 1
+
+        self.__values: list[int] = [-1] * units.get_cell_count()
+        self.__counts: list[list[int]] = [[0] * len(all_symbols) for _ in units.get_units()]
+        self.__unit_masks: list[int] = [0] * len(units.get_units())
+        self.__masks: list[int] = [self.__full] * units.get_cell_count()
+        self.__pruners: list[Callable[[list[int], list[int]], Union[None, list[int]]]] = pruners or []
+        self.__pruned_masks: Union[None, list[int]] = None
+
+    def set_board(self, board: list[list[SudokuSymbol]]) -> None:
+        for j, row in enumerate(board):
+            for i, cell in enumerate(row):
+                index: int = self.__units.index(i, j)
+                value: int = self.__symbol_index.get(cell.get_value(), -1)
+                self.__values[index] = value
+                if value >= 0:
+                    for unit in self.__units.get_cell_units(index):
+                        self.__counts[unit][value] += 1
+                        self.__unit_masks[unit] |= 1 << value
+        for cell in range(self.__units.get_cell_count()):
+            self.__update_mask(cell)
+        self.__pruned_masks = None
+
+    def __update_mask(self, cell: int) -> None:
+        if self.__values[cell] >= 0:
+            self.__masks[cell] = 0
+            return
+        mask: int = self.__full
+        for unit in self.__units.get_cell_units(cell):
+            mask &= ~self.__unit_masks[unit]
+        self.__masks[cell] = mask
+
+    def set_value(self, cell: int, symbol: str) -> None:
+        old_value: int = self.__values[cell]
+        new_value: int = self.__symbol_index.get(symbol, -1)
+        if old_value == new_value:
+            return
+
+        for unit in self.__units.get_cell_units(cell):
+            if old_value >= 0:
+                self.__counts[unit][old_value] -= 1
+                if not self.__counts[unit][old_value]:
+                    self.__unit_masks[unit] &= ~(1 << old_value)
+            if new_value >= 0:
+                self.__counts[unit][new_value] += 1
+                self.__unit_masks[unit] |= 1 << new_value
+        self.__values[cell] = new_value
+
+        self.__update_mask(cell)
+        for peer in self.__units.get_peers(cell):
+            self.__update_mask(peer)
+        self.__pruned_masks = None
+
+    def get_value(self, cell: int) -> str:
+        value: int = self.__values[cell]
+        return self.__all_symbols.get_symbol(value)
+
+    def get_mask(self, cell: int) -> int:
+        return self.__masks[cell]
+
+    def get_masks(self) -> list[int]:
+        return self.__masks
+
+    def get_pruned_mask(self, cell: int) -> int:
+        # the mask without the candidates the pruners rule out
+        if self.__pruned_masks is None:
+            self.__pruned_masks = self.__prune()
+        return self.__pruned_masks[cell]
+
+    def __prune(self) -> list[int]:
+        masks: list[int] = self.__masks[:]
+        # pruners expect candidates in every empty cell, a board without them is left to the conflict display
+        if not self.__pruners or any(value < 0 and not mask for value, mask in zip(self.__values, masks)):
+            return masks
+        changed: bool = True
+        while changed:
+            changed = False
+            for pruner in self.__pruners:
+                cells: Union[None, list[int]] = pruner(self.__values, masks)
+                if cells is None:
+                    # contradictory, a cell may be left without candidates
+                    return masks
+                changed = changed or bool(cells)
+        return masks
+
+    def get_values(self) -> list[int]:
+        return self.__values
+
+    def get_units(self) -> Units:
+        return self.__units
+
+    def get_all_symbols(self) -> Alphabet:
+        return self.__all_symbols
+
+    def get_symbols(self, mask: int) -> list[str]:
+        return [symbol for n, symbol in enumerate(self.__all_symbols) if mask >> n & 1]
+
+    def count(self, unit: int, symbol: str) -> int:
+        value: Union[None, int] = self.__symbol_index.get(symbol)
+        return self.__counts[unit][value] if value is not None else 0
+
+    def is_conflict(self, cell: int, symbol: str) -> bool:
+        value: Union[None, int] = self.__symbol_index.get(symbol)
+        if value is None:
+            return False
+        for unit in self.__units.get_cell_units(cell):
+            if self.__counts[unit][value] > 1:
+                return True
+        return False
@@ -0,0 +1,402 @@
+import argparse
+import hashlib
+import math
+import multiprocessing
+import time
+from collections import deque
+from itertools import chain, product
+from text import Sudoku
+from units import Units, standard_field_groups, box_field_groups, add_board_arguments, board_from_arguments
+from string_conversion import read_puzzles
+from typing import Callable, Iterable, Union
+
+
+# per worker process: the symmetry of the board size and rules of the file
+_worker_settings: dict = {}
+
+
+# The symmetries of a rule set and the canonical form of boards under them: the smallest board, compared row by row,
+# of all boards reachable by the symmetries with the symbols renamed in order of first appearance. Empty squares
+# compare larger than every symbol.
+# Rows, columns and regular boxes allow permuting the bands, the rows inside a band, the stacks and the columns inside
+# a stack (and transposing square boards with square boxes). The search picks the rows one after the other and only
+# keeps the column orders that give the smallest row so far, so it never enumerates the whole group. Equal rows or
+# columns (e.g. empty ones) can be swapped without changing the board, so only one order of them is searched.
+# Boards that repeat a symbol in a row or column, and boards with more than MAX_ARRANGEMENTS column orders for the
+# smallest first row (e.g. solved 16x16 grids), only get their symbols renamed: their copies aren't found, but every
+# canonical form is still a copy of its board, so different boards never get the same one.
+# Other rules (irregular groups, diagonals) only use the rotations and reflections that keep the units, boards with
+# variant constraints only rename symbols.
+class Symmetry:
+    MAX_ARRANGEMENTS: int = 50000
+
+    def __init__(self, sudoku_size: tuple[int, int],
+                 rules: dict[str, Union[None, bool, list[list[tuple[int, int]]]]]) -> None:
+        self.__width: int = sudoku_size[0]
+        self.__height: int = sudoku_size[1]
+        self.__bands: Union[None, list[list[int]]] = None
+        self.__stacks: Union[None, list[list[int]]] = None
+        self.__transpose: bool = False
+        self.__transforms: list[list[int]] = []
+        self.__best: list[tuple[int, ...]] = []
+
+        boxes: Union[None, tuple[int, int]] = self.__box_size(rules)
+        if boxes is not None:
+            box_width, box_height = boxes
+            self.__bands = [list(range(band, band + box_height)) for band in range(0, self.__height, box_height)]
+            self.__stacks = [list(range(stack, stack + box_width)) for stack in range(0, self.__width, box_width)]
+            self.__transpose = self.__bands == self.__stacks
+        else:
+            self.__transforms = self.__unit_transforms(rules)
+
+    def __box_size(self, rules: dict[str, Union[None, bool, list[list[tuple[int, int]]]]]) -> Union[
+            None, tuple[int, int]]:
+        # (width, height) of the regular boxes, the whole board without boxes, None for other rules
+        if (not rules.get("horizontal") or not rules.get("vertical") or rules.get("diagonals")
+                or rules.get("constraints")):
+            return None
+        boxes: Union[None, bool, list[list[tuple[int, int]]]] = rules.get("boxes")
+        if not boxes:
+            return self.__width, self.__height
+        if boxes is True:
+            return (3, 3) if self.__width == self.__height == 9 else (self.__width, self.__height)
+        groups: list[list[tuple[int, int]]] = [group for group in boxes if len(group) > 1]
+        if not groups:
+            return self.__width, self.__height
+        columns: list[int] = [i for i, _ in groups[0]]
+        rows: list[int] = [j for _, j in groups[0]]
+        box_width: int = max(columns) - min(columns) + 1
+        box_height: int = max(rows) - min(rows) + 1
+        if self.__width % box_width or self.__height % box_height:
+            return None
+        if sorted(map(sorted, groups)) != sorted(map(sorted, box_field_groups((self.__width, self.__height),
+                                                                              (box_width, box_height)))):
+            return None
+        return box_width, box_height
+
+    def __unit_transforms(self, rules: dict[str, Union[None, bool, list[list[tuple[int, int]]]]]) -> list[list[int]]:
+        # for every rotation/reflection keeping the units: the old cell of every new cell
+        width, height = self.__width, self.__height
+        maps: list = [lambda i, j: (i, j), lambda i, j: (width - 1 - i, j), lambda i, j: (i, height - 1 - j),
+                      lambda i, j: (width - 1 - i, height - 1 - j)]
+        if rules.get("constraints"):
+            maps = maps[:1]
+        elif width == height:
+            maps += [lambda i, j: (j, i), lambda i, j: (height - 1 - j, i), lambda i, j: (j, width - 1 - i),
+                     lambda i, j: (height - 1 - j, width - 1 - i)]
+        units: Units = Units((width, height), rules)
+        unit_set: set[frozenset[int]] = {frozenset(unit) for unit in units.get_units()}
+        transforms: list[list[int]] = []
+        for cell_map in maps:
+            transform: list[int] = [units.index(*cell_map(*units.position(cell))) for cell in range(width * height)]
+            if {frozenset(transform[cell] for cell in unit) for unit in unit_set} == unit_set:
+                transforms.append(transform)
+        return transforms
+
+    def canonical(self, values: list[int]) -> tuple[int, ...]:
+        # values row by row (symbol index or -1), the canonical board in the same form with renamed symbols
+        empty: int = max(values) + 1 if values else 0
+        if self.__bands is None:
+            best: Union[None, tuple[int, ...]] = None
+            for transform in self.__transforms:
+                board: tuple[int, ...] = self.__rename([values[cell] for cell in transform], empty)
+                if best is None or board < best:
+                    best = board
+            return tuple(-1 if value == empty else value for value in best)
+
+        rows: list[list[int]] = [values[j * self.__width:(j + 1) * self.__width] for j in range(self.__height)]
+        if any(self.__repeats(row) for row in rows) or any(self.__repeats(column) for column in zip(*rows)):
+            return tuple(-1 if value == empty else value for value in self.__rename(values, empty))
+        grids: list[list[list[int]]] = [rows]
+        if self.__transpose:
+            grids.append([list(column) for column in zip(*rows)])
+        columns: list[list[tuple[int, ...]]] = [[tuple(column) for column in zip(*grid)] for grid in grids]
+
+        # first rows: the most givens first, inside the stacks with the most givens, every given is a new symbol
+        starts: list[tuple[tuple[int, ...], int, int]] = []
+        seen: set[tuple] = set()
+        for g, grid in enumerate(grids):
+            for band in self.__bands:
+                for r in band:
+                    equal: tuple = (g, self.__row_key(grid, r, band))
+                    if equal in seen:
+                        continue
+                    seen.add(equal)
+                    counts: list[int] = sorted((sum(grid[r][c] >= 0 for c in stack) for stack in self.__stacks),
+                                               reverse=True)
+                    key: list[int] = []
+                    next_label: int = 0
+                    for count, stack in zip(counts, self.__stacks):
+                        key += range(next_label, next_label + count)
+                        key += [empty] * (len(stack) - count)
+                        next_label += count
+                    starts.append((tuple(key), g, r))
+        first_key: tuple[int, ...] = min(starts)[0]
+        firsts: list[tuple[int, int]] = [(g, r) for key, g, r in starts if key == first_key]
+        if sum(self.__count_arrangements(grids[g][r], columns[g]) for g, r in firsts) > self.MAX_ARRANGEMENTS:
+            return tuple(-1 if value == empty else value for value in self.__rename(values, empty))
+
+        self.__best = [first_key]
+        for g, r in firsts:
+            grid: list[list[int]] = grids[g]
+            band: list[int] = next(band for band in self.__bands if r in band)
+            candidates: list[tuple[tuple[int, ...], list[int], int]] = []
+            for arrangement in self.__first_arrangements(grid[r], columns[g]):
+                labels: list[int] = [-1] * empty
+                next_label: int = 0
+                for c in arrangement:
+                    if grid[r][c] >= 0:
+                        labels[grid[r][c]] = next_label
+                        next_label += 1
+                candidates.append((arrangement, labels, next_label))
+            self.__search(grid, 1, [row for row in band if row != r], [other for other in self.__bands
+                                                                         if other is not band], candidates, empty)
+        return tuple(-1 if value == empty else value for row in self.__best for value in row)
+
+    @staticmethod
+    def __rename(board: list[int], empty: int) -> tuple[int, ...]:
+        labels: dict[int, int] = {}
+        return tuple(empty if value < 0 else labels.setdefault(value, len(labels)) for value in board)
+
+    @staticmethod
+    def __repeats(line: Iterable[int]) -> bool:
+        givens: list[int] = [value for value in line if value >= 0]
+        return len(set(givens)) != len(givens)
+
+    @staticmethod
+    def __row_key(grid: list[list[int]], r: int, band: Iterable[int]) -> tuple:
+        # equal for rows with equal values in bands with equal rows, they can be swapped without changing the board
+        return tuple(grid[r]), tuple(sorted(tuple(grid[row]) for row in band))
+
+    @staticmethod
+    def __distinct_orders(items: list, key: Callable) -> list[tuple]:
+        # permutations of items, only one of those that differ by swapping items with equal keys
+        groups: dict = {}
+        for item in items:
+            groups.setdefault(key(item), []).append(item)
+        orders: list[tuple] = []
+        order: list = []
+
+        def extend() -> None:
+            if len(order) == len(items):
+                orders.append(tuple(order))
+                return
+            for group in groups.values():
+                if group:
+                    order.append(group.pop())
+                    extend()
+                    group.append(order.pop())
+
+        extend()
+        return orders
+
+    @staticmethod
+    def __count_orders(items: list, key: Callable) -> int:
+        # len(__distinct_orders(items, key)) without building them
+        counts: dict = {}
+        for item in items:
+            counts[key(item)] = counts.get(key(item), 0) + 1
+        count: int = math.factorial(len(items))
+        for equal in counts.values():
+            count //= math.factorial(equal)
+        return count
+
+    def __by_count(self, row: list[int]) -> dict[int, list[list[int]]]:
+        by_count: dict[int, list[list[int]]] = {}
+        for stack in self.__stacks:
+            by_count.setdefault(sum(row[c] >= 0 for c in stack), []).append(stack)
+        return by_count
+
+    def __count_arrangements(self, row: list[int], columns: list[tuple[int, ...]]) -> int:
+        # len(__first_arrangements(row, columns)) without building them
+        count: int = 1
+        for stacks in self.__by_count(row).values():
+            count *= self.__count_orders(stacks, lambda stack: tuple(sorted(columns[c] for c in stack)))
+        for stack in self.__stacks:
+            count *= self.__count_orders([c for c in stack if row[c] >= 0], lambda c: columns[c])
+            count *= self.__count_orders([c for c in stack if row[c] < 0], lambda c: columns[c])
+        return count
+
+    def __first_arrangements(self, row: list[int], columns: list[tuple[int, ...]]) -> list[tuple[int, ...]]:
+        # every column order giving the smallest first row: stacks by number of givens, givens first in each stack
+        by_count: dict[int, list[list[int]]] = self.__by_count(row)
+        stack_orders: list[list[list[int]]] = [list(chain(*orders)) for orders in product(
+            *(self.__distinct_orders(by_count[count], lambda stack: tuple(sorted(columns[c] for c in stack)))
+              for count in sorted(by_count, reverse=True)))]
+        inside: dict[int, list[tuple[int, ...]]] = {}
+        for stack in self.__stacks:
+            givens: list[tuple[int, ...]] = self.__distinct_orders([c for c in stack if row[c] >= 0],
+                                                                   lambda c: columns[c])
+            empties: list[tuple[int, ...]] = self.__distinct_orders([c for c in stack if row[c] < 0],
+                                                                    lambda c: columns[c])
+            inside[stack[0]] = [given + empty for given in givens for empty in empties]
+        return [tuple(chain(*orders)) for stack_order in stack_orders
+                for orders in product(*(inside[stack[0]] for stack in stack_order))]
+
+    def __search(self, grid: list[list[int]], level: int, band_left: list[int], bands_left: list[list[int]],
+                 candidates: list[tuple[tuple[int, ...], list[int], int]], empty: int) -> None:
+        # the rows picked so far equal self.__best[:level]
+        if level == len(grid):
+            return
+        if band_left:
+            options: list[tuple[int, list[int], list[list[int]]]] = [
+                (r, [row for row in band_left if row != r], bands_left) for r in band_left]
+        else:
+            options = [(r, [row for row in band if row != r], [other for other in bands_left if other is not band])
+                       for band in bands_left for r in band]
+        distinct: dict[tuple, tuple[int, list[int], list[list[int]]]] = {}
+        for r, next_band_left, next_bands_left in options:
+            distinct.setdefault(self.__row_key(grid, r, next_band_left + [r]), (r, next_band_left, next_bands_left))
+        options = list(distinct.values())
+
+        best_key: Union[None, tuple[int, ...]] = None
+        results: list[tuple[int, tuple[int, ...], tuple[tuple[int, ...], list[int], int]]] = []
+        for option, (r, _, _) in enumerate(options):
+            row: list[int] = grid[r]
+            for arrangement, labels, next_label in candidates:
+                key: list[int] = []
+                new_labels: list[int] = labels
+                for c in arrangement:
+                    value: int = row[c]
+                    if value < 0:
+                        key.append(empty)
+                    else:
+                        label: int = new_labels[value]
+                        if label < 0:
+                            if new_labels is labels:
+                                new_labels = labels[:]
+                            label = next_label
+                            new_labels[value] = label
+                            next_label += 1
+                        key.append(label)
+                row_key: tuple[int, ...] = tuple(key)
+                if best_key is None or row_key <= best_key:
+                    if best_key is not None and row_key < best_key:
+                        results = []
+                    best_key = row_key
+                    results.append((option, row_key, (arrangement, new_labels, next_label)))
+
+        if len(self.__best) > level:
+            if best_key > self.__best[level]:
+                return
+            if best_key < self.__best[level]:
+                del self.__best[level:]
+                self.__best.append(best_key)
+        else:
+            self.__best.append(best_key)
+
+        by_option: dict[int, list[tuple[tuple[int, ...], list[int], int]]] = {}
+        for option, _, candidate in results:
+            by_option.setdefault(option, []).append(candidate)
+        for option, option_candidates in by_option.items():
+            _, next_band_left, next_bands_left = options[option]
+            self.__search(grid, level + 1, next_band_left, next_bands_left, option_candidates, empty)
+
+
+# Digests of canonical forms seen so far, a board is new if no symmetric copy of it was added before
+class CanonicalIndex:
+    def __init__(self, symmetry: Symmetry) -> None:
+        self.__symmetry: Symmetry = symmetry
+        self.__digests: set[bytes] = set()
+
+    @staticmethod
+    def digest(canonical: tuple[int, ...]) -> bytes:
+        return hashlib.blake2b(bytes(value + 1 for value in canonical), digest_size=16).digest()
+
+    def add_digest(self, digest: bytes) -> bool:
+        if digest in self.__digests:
+            return False
+        self.__digests.add(digest)
+        return True
+
+    def add(self, values: list[int]) -> bool:
+        # True if the board wasn't in the index yet
+        return self.add_digest(self.digest(self.__symmetry.canonical(values)))
+
+    def __contains__(self, values: list[int]) -> bool:
+        return self.digest(self.__symmetry.canonical(values)) in self.__digests
+
+    def __len__(self) -> int:
+        return len(self.__digests)
+
+
+def canonical(sudoku: Sudoku) -> Sudoku:
+    # new Sudoku with the canonical board, renamed symbols use all_symbols in order of first appearance
+    field: list = sudoku.get_field()
+    size: tuple[int, int] = len(field), len(field[0])
+    rules: dict[str, Union[bool, list[list[tuple[int, int]]]]] = sudoku.get_rules()
+    values: tuple[int, ...] = Symmetry((size[1], size[0]), rules).canonical(sudoku.get_values())
+    canonical_sudoku: Sudoku = Sudoku(size=size, rules=rules, all_symbols=sudoku.get_all_symbols())
+    canonical_sudoku.set_values(list(values))
+    return canonical_sudoku
+
+
+def _init_worker(sudoku_size: tuple[int, int], rules: dict[str, Union[bool, list[list[tuple[int, int]]]]],
+                 all_symbols: list[str]) -> None:
+    global _worker_settings
+    _worker_settings = {"sudoku_size": sudoku_size, "rules": rules, "all_symbols": all_symbols,
+                        "symmetry": Symmetry(sudoku_size, rules)}
+
+
+def _digest_one(field_string: str) -> bytes:
+    sudoku: Sudoku = Sudoku(size=(_worker_settings["sudoku_size"][1], _worker_settings["sudoku_size"][0]),
+                            field_string=field_string, rules=_worker_settings["rules"],
+                            all_symbols=_worker_settings["all_symbols"])
+    return CanonicalIndex.digest(_worker_settings["symmetry"].canonical(sudoku.get_values()))
+
+
+def dedupe_file(filename: str, out_filename: str, notation: str = "sudokustring", sudoku_size: tuple[int, int] = (9, 9),
+                rules: Union[None, dict[str, Union[bool, list[list[tuple[int, int]]]]]] = None,
+                all_symbols: Union[None, list[str]] = None, index: Union[None, CanonicalIndex] = None,
+                processes: Union[None, int] = None, chunksize: int = 256) -> tuple[int, int]:
+    # keeps the first puzzle of every symmetry class in input order, returns (puzzles read, puzzles written)
+    if all_symbols is None:
+        all_symbols = [str(i + 1) for i in range(max(sudoku_size))]
+    if rules is None:
+        rules = {"horizontal": True, "vertical": True, "boxes": standard_field_groups(sudoku_size)}
+    if index is None:
+        index = CanonicalIndex(Symmetry(sudoku_size, rules))
+    out_notation: str = notation if notation != "square" else "sudokustring"
+
+    # puzzles handed to the pool but not written yet
+    puzzles: deque[str] = deque()
+
+    def field_strings():
+        for puzzle in read_puzzles(filename, notation=notation, width=sudoku_size[0]):
+            puzzles.append(puzzle.__str__(out_notation))
+            yield puzzle.__str__("sudokustring")
+
+    read: int = 0
+    written: int = 0
+    with open(out_filename, "w") as f, multiprocessing.Pool(processes, initializer=_init_worker,
+                                                            initargs=(sudoku_size, rules, all_symbols)) as pool:
+        for digest in pool.imap(_digest_one, field_strings(), chunksize=chunksize):
+            puzzle: str = puzzles.popleft()
+            read += 1
+            if index.add_digest(digest):
+                f.write(puzzle + "\n")
+                written += 1
+    return read, written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remove puzzles that are symmetric copies of earlier ones.")
+    parser.add_argument("filename")
+    parser.add_argument("out_filename")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    add_board_arguments(parser)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+
+    start_time: float = time.time()
+    read, written = dedupe_file(args.filename, args.out_filename, notation=args.notation, sudoku_size=sudoku_size,
+                                rules=rules, all_symbols=all_symbols, processes=args.processes)
+    end_time: float = time.time()
+    print(f"Kept {written} of {read} puzzles in {end_time - start_time} seconds "
+          f"({read / max(end_time - start_time, 1e-9):.1f} puzzles per second)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import multiprocessing
+import random
+import time
+from text import Sudoku
+from search import Search
+from units import standard_field_groups, add_board_arguments, board_from_arguments
+from typing import Union
+
+
+# per worker process: the board settings and the seed shared by every puzzle
+_worker_settings: dict = {}
+
+
+def generate(sudoku_size: tuple[int, int], rules: dict[str, Union[bool, list[list[tuple[int, int]]]]],
+             all_symbols: list[str], rng: random.Random, max_nodes: Union[None, int] = 2000) -> Union[None, Sudoku]:
+    # random full grid, then remove givens in random order as long as the solution stays unique. A given is kept
+    # when the search can't prove uniqueness within max_nodes, which bounds the time spent on large boards.
+    sudoku: Sudoku = Sudoku(size=(sudoku_size[1], sudoku_size[0]), rules=rules, all_symbols=all_symbols)
+    if not sudoku.solve(rng=rng):
+        return None
+    values: list[int] = sudoku.get_values()
+    search: Search = Search(sudoku.get_units(), len(all_symbols), pruners=sudoku.get_pruners())
+    cells: list[int] = list(range(len(values)))
+    rng.shuffle(cells)
+    for cell in cells:
+        value: int = values[cell]
+        values[cell] = -1
+        if search.count(values, limit=2, max_nodes=max_nodes) != 1:
+            values[cell] = value
+    sudoku.set_values(values)
+    return sudoku
+
+
+def parse_field_groups(labels: str, sudoku_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+    # one character per cell row by row, cells with the same character form a group
+    if len(labels) != sudoku_size[0] * sudoku_size[1]:
+        raise ValueError("The field groups need exactly one label per cell")
+    groups: dict[str, list[tuple[int, int]]] = {}
+    for n, label in enumerate(labels):
+        groups.setdefault(label, []).append((n % sudoku_size[0], n // sudoku_size[0]))
+    return list(groups.values())
+
+
+def _init_worker(sudoku_size: tuple[int, int], rules: dict[str, Union[bool, list[list[tuple[int, int]]]]],
+                 all_symbols: list[str], seed: int, max_nodes: Union[None, int]) -> None:
+    global _worker_settings
+    _worker_settings = {"sudoku_size": sudoku_size, "rules": rules, "all_symbols": all_symbols, "seed": seed,
+                        "max_nodes": max_nodes}
+
+
+def _generate_one(n: int) -> Union[None, str]:
+    # every puzzle has its own generator, so the output only depends on the seed
+    rng: random.Random = random.Random(f"{_worker_settings['seed']}:{n}")
+    sudoku: Union[None, Sudoku] = generate(_worker_settings["sudoku_size"], _worker_settings["rules"],
+                                           _worker_settings["all_symbols"], rng, _worker_settings["max_nodes"])
+    return repr(sudoku) if sudoku is not None else None
+
+
+def generate_file(filename: str, count: int, sudoku_size: tuple[int, int] = (9, 9),
+                  rules: Union[None, dict[str, Union[bool, list[list[tuple[int, int]]]]]] = None,
+                  all_symbols: Union[None, list[str]] = None, seed: int = 0, max_nodes: Union[None, int] = 2000,
+                  processes: Union[None, int] = None, chunksize: int = 4) -> int:
+    # one puzzle per line in SudokuString notation, written as soon as it is ready and in a fixed order
+    if all_symbols is None:
+        all_symbols = [str(i + 1) for i in range(max(sudoku_size))]
+    if rules is None:
+        rules = {"horizontal": True, "vertical": True, "boxes": standard_field_groups(sudoku_size)}
+
+    generated: int = 0
+    with open(filename, "w") as f, multiprocessing.Pool(processes, initializer=_init_worker,
+                                                        initargs=(sudoku_size, rules, all_symbols, seed,
+                                                                  max_nodes)) as pool:
+        for field_string in pool.imap(_generate_one, range(count), chunksize=chunksize):
+            if field_string is not None:
+                f.write(field_string + "\n")
+                f.flush()
+                generated += 1
+    return generated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate puzzles with a unique solution.")
+    parser.add_argument("filename")
+    parser.add_argument("--count", type=int, default=100)
+    add_board_arguments(parser)
+    parser.add_argument("--groups", default=None, help="one group label per cell, row by row, instead of boxes")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-nodes", type=int, default=2000, help="search budget per uniqueness check")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+    if args.groups is not None and not args.no_boxes:
+        rules["boxes"] = parse_field_groups(args.groups, sudoku_size)
+    seed: int = args.seed if args.seed is not None else random.randrange(2 ** 32)
+
+    start_time: float = time.time()
+    generated: int = generate_file(args.filename, args.count, sudoku_size=sudoku_size, rules=rules,
+                                   all_symbols=all_symbols, seed=seed, max_nodes=args.max_nodes,
+                                   processes=args.processes)
+    end_time: float = time.time()
+    print(f"Generated {generated} puzzles in {end_time - start_time} seconds "
+          f"({generated / max(end_time - start_time, 1e-9):.1f} puzzles per second, seed {seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import time
+from itertools import combinations
+from candidates import Candidates
+from alphabet import Alphabet, get_alphabet
+from units import Units
+from typing import Union
+
+
+TECHNIQUES: tuple[str, ...] = ("naked single", "hidden single", "naked pair", "hidden pair", "pointing",
+                               "box/line reduction", "naked triple", "hidden triple", "x-wing")
+
+
+# One deduction: values to place (cell, symbol index) and candidates to remove (cell -> bitmask)
+class Hint:
+    def __init__(self, technique: str, placements: list[tuple[int, int]], eliminations: dict[int, int],
+                 cells: tuple[int, ...]) -> None:
+        self.__technique: str = technique
+        self.__placements: list[tuple[int, int]] = placements
+        self.__eliminations: dict[int, int] = eliminations
+        self.__cells: tuple[int, ...] = cells
+
+    def get_technique(self) -> str:
+        return self.__technique
+
+    def get_placements(self) -> list[tuple[int, int]]:
+        return self.__placements
+
+    def get_eliminations(self) -> dict[int, int]:
+        return self.__eliminations
+
+    def get_cells(self) -> tuple[int, ...]:
+        return self.__cells
+
+    def describe(self, units: Units, all_symbols: Union[Alphabet, list[str]]) -> str:
+        def name(cell: int) -> str:
+            i, j = units.position(cell)
+            return f"r{j + 1}c{i + 1}"
+
+        if self.__placements:
+            changes: str = ", ".join(f"{name(cell)} = {all_symbols[value]}" for cell, value in self.__placements)
+        else:
+            changes: str = ", ".join(f"{name(cell)} <> " + "/".join(symbol for n, symbol in enumerate(all_symbols)
+                                                                   if mask >> n & 1)
+                                     for cell, mask in self.__eliminations.items())
+        return f"{self.__technique.capitalize()}: {changes}"
+
+
+class HintEngine:
+    def __init__(self, units: Units, all_symbols: Union[Alphabet, list[str]]) -> None:
+        self.__units: Units = units
+        self.__all_symbols: Alphabet = get_alphabet(all_symbols)
+        self.__unit_cells: list[tuple[int, ...]] = units.get_units()
+        self.__unit_types: list[str] = units.get_unit_types()
+        # only units with a cell for every symbol have to contain each symbol (hidden subsets, sources of intersections)
+        self.__full_units: list[tuple[int, ...]] = [unit for unit in self.__unit_cells if len(unit) == len(all_symbols)]
+
+        # pairs of units sharing at least two cells: (full unit, other unit, shared cells)
+        self.__intersections: list[tuple[int, int, frozenset[int]]] = []
+        unit_sets: list[frozenset[int]] = [frozenset(unit) for unit in self.__unit_cells]
+        for a, unit_a in enumerate(unit_sets):
+            for b, unit_b in enumerate(unit_sets):
+                if a != b and self.__unit_types[a] != self.__unit_types[b] and len(unit_a) == len(all_symbols):
+                    shared: frozenset[int] = unit_a & unit_b
+                    if len(shared) > 1:
+                        self.__intersections.append((a, b, shared))
+
+        self.__rows: list[int] = [n for n, unit_type in enumerate(self.__unit_types)
+                                  if unit_type == "horizontal" and len(self.__unit_cells[n]) == len(all_symbols)]
+        self.__cols: list[int] = [n for n, unit_type in enumerate(self.__unit_types)
+                                  if unit_type == "vertical" and len(self.__unit_cells[n]) == len(all_symbols)]
+
+        self.__values: list[int] = []
+        self.__masks: list[int] = []
+
+        # technique -> [candidates examined, candidates eliminated, seconds, times found]
+        self.__stats: dict[str, list[Union[int, float]]] = {technique: [0, 0, 0.0, 0] for technique in TECHNIQUES}
+
+    def load(self, values: list[int], masks: list[int]) -> None:
+        self.__values = values[:]
+        self.__masks = masks[:]
+
+    def load_candidates(self, candidates: Candidates) -> None:
+        self.load(candidates.get_values(), candidates.get_masks())
+
+    def get_values(self) -> list[int]:
+        return self.__values
+
+    def get_masks(self) -> list[int]:
+        return self.__masks
+
+    def get_stats(self) -> dict[str, tuple[int, int, float, int]]:
+        return {technique: tuple(stats) for technique, stats in self.__stats.items()}
+
+    def reset_stats(self) -> None:
+        self.__stats = {technique: [0, 0, 0.0, 0] for technique in TECHNIQUES}
+
+    def is_solved(self) -> bool:
+        return -1 not in self.__values
+
+    def is_broken(self) -> bool:
+        # a cell without candidates or a value twice in a unit
+        for cell, value in enumerate(self.__values):
+            if value < 0 and not self.__masks[cell]:
+                return True
+        return bool(self.find_conflict())
+
+    def find_conflict(self) -> tuple[int, ...]:
+        # the cells of the first unit that contains a value twice, empty without conflict
+        for unit in self.__unit_cells:
+            seen: dict[int, int] = {}
+            for cell in unit:
+                value: int = self.__values[cell]
+                if value < 0:
+                    continue
+                if value in seen:
+                    return tuple(other for other in unit if self.__values[other] == value)
+                seen[value] = cell
+        return ()
+
+    def apply(self, hint: Hint) -> None:
+        for cell, value in hint.get_placements():
+            if self.__values[cell] >= 0:
+                continue
+            self.__values[cell] = value
+            self.__masks[cell] = 0
+            for peer in self.__units.get_peers(cell):
+                self.__masks[peer] &= ~(1 << value)
+        for cell, mask in hint.get_eliminations().items():
+            self.__masks[cell] &= ~mask
+
+    def step(self, techniques: tuple[str, ...] = TECHNIQUES) -> Union[None, Hint]:
+        # easiest technique first, the hint found is applied to the working copy
+        if self.is_broken():
+            return None
+        for technique in techniques:
+            start_time: float = time.perf_counter()
+            hint: Union[None, Hint] = self.__find(technique)
+            stats: list[Union[int, float]] = self.__stats[technique]
+            stats[2] += time.perf_counter() - start_time
+            if hint is not None:
+                stats[3] += 1
+                stats[1] += sum(mask.bit_count() for mask in hint.get_eliminations().values())
+                self.apply(hint)
+                return hint
+        return None
+
+    def find_hint(self, candidates: Candidates) -> list[Hint]:
+        # the steps up to and including the next placement, or the eliminations found before getting stuck
+        self.load_candidates(candidates)
+        steps: list[Hint] = []
+        while not self.is_solved():
+            hint: Union[None, Hint] = self.step()
+            if hint is None:
+                break
+            steps.append(hint)
+            if hint.get_placements():
+                break
+        return steps
+
+    def __find(self, technique: str) -> Union[None, Hint]:
+        match technique:
+            case "naked single":
+                return self.__naked_single()
+            case "hidden single":
+                return self.__hidden_single()
+            case "naked pair":
+                return self.__naked_subset(technique, 2)
+            case "naked triple":
+                return self.__naked_subset(technique, 3)
+            case "hidden pair":
+                return self.__hidden_subset(technique, 2)
+            case "hidden triple":
+                return self.__hidden_subset(technique, 3)
+            case "pointing":
+                return self.__intersection(technique, True)
+            case "box/line reduction":
+                return self.__intersection(technique, False)
+            case "x-wing":
+                return self.__x_wing()
+        return None
+
+    def __examined(self, technique: str, count: int) -> None:
+        self.__stats[technique][0] += count
+
+    def __naked_single(self) -> Union[None, Hint]:
+        examined: int = 0
+        for cell, mask in enumerate(self.__masks):
+            if self.__values[cell] < 0:
+                examined += 1
+                if mask and not mask & (mask - 1):
+                    self.__examined("naked single", examined)
+                    return Hint("naked single", [(cell, mask.bit_length() - 1)], {}, (cell,))
+        self.__examined("naked single", examined)
+        return None
+
+    def __hidden_single(self) -> Union[None, Hint]:
+        examined: int = 0
+        for unit in self.__full_units:
+            once: int = 0
+            twice: int = 0
+            placed: int = 0
+            for cell in unit:
+                mask: int = self.__masks[cell]
+                examined += mask.bit_count()
+                twice |= once & mask
+                once |= mask
+                if self.__values[cell] >= 0:
+                    placed |= 1 << self.__values[cell]
+            singles: int = once & ~twice & ~placed
+            if singles:
+                value: int = (singles & -singles).bit_length() - 1
+                for cell in unit:
+                    if self.__masks[cell] >> value & 1:
+                        self.__examined("hidden single", examined)
+                        return Hint("hidden single", [(cell, value)], {}, unit)
+        self.__examined("hidden single", examined)
+        return None
+
+    def __naked_subset(self, technique: str, size: int) -> Union[None, Hint]:
+        examined: int = 0
+        for unit in self.__unit_cells:
+            small: list[int] = [cell for cell in unit if self.__values[cell] < 0
+                                and 1 < self.__masks[cell].bit_count() <= size]
+            examined += sum(self.__masks[cell].bit_count() for cell in small)
+            for subset in combinations(small, size):
+                union: int = 0
+                for cell in subset:
+                    union |= self.__masks[cell]
+                if union.bit_count() != size:
+                    continue
+                eliminations: dict[int, int] = {cell: self.__masks[cell] & union for cell in unit
+                                                if cell not in subset and self.__masks[cell] & union}
+                if eliminations:
+                    self.__examined(technique, examined)
+                    return Hint(technique, [], eliminations, subset)
+        self.__examined(technique, examined)
+        return None
+
+    def __hidden_subset(self, technique: str, size: int) -> Union[None, Hint]:
+        examined: int = 0
+        for unit in self.__full_units:
+            # positions inside the unit (as bitmask) for every symbol
+            positions: dict[int, int] = {}
+            for position, cell in enumerate(unit):
+                mask: int = self.__masks[cell]
+                examined += mask.bit_count()
+                while mask:
+                    value: int = (mask & -mask).bit_length() - 1
+                    mask &= mask - 1
+                    positions[value] = positions.get(value, 0) | 1 << position
+            few: list[int] = [value for value, where in positions.items() if 1 < where.bit_count() <= size]
+            for subset in combinations(few, size):
+                where: int = 0
+                keep: int = 0
+                for value in subset:
+                    where |= positions[value]
+                    keep |= 1 << value
+                if where.bit_count() != size:
+                    continue
+                cells: tuple[int, ...] = tuple(cell for position, cell in enumerate(unit) if where >> position & 1)
+                eliminations: dict[int, int] = {cell: self.__masks[cell] & ~keep for cell in cells
+                                                if self.__masks[cell] & ~keep}
+                if eliminations:
+                    self.__examined(technique, examined)
+                    return Hint(technique, [], eliminations, cells)
+        self.__examined(technique, examined)
+        return None
+
+    def __intersection(self, technique: str, pointing: bool) -> Union[None, Hint]:
+        # pointing: a symbol of a box only fits where the box meets a line, so the rest of the line loses it
+        # box/line reduction: the same with the line as the source and the box losing the symbol
+        examined: int = 0
+        for source, target, shared in self.__intersections:
+            if (self.__unit_types[source] == "boxes") != pointing:
+                continue
+            inside: int = 0
+            outside: int = 0
+            for cell in self.__unit_cells[source]:
+                mask: int = self.__masks[cell]
+                examined += mask.bit_count()
+                if cell in shared:
+                    inside |= mask
+                else:
+                    outside |= mask
+            only_inside: int = inside & ~outside
+            if not only_inside:
+                continue
+            eliminations: dict[int, int] = {cell: self.__masks[cell] & only_inside for cell in self.__unit_cells[target]
+                                            if cell not in shared and self.__masks[cell] & only_inside}
+            if eliminations:
+                self.__examined(technique, examined)
+                return Hint(technique, [], eliminations, tuple(shared))
+        self.__examined(technique, examined)
+        return None
+
+    def __x_wing(self) -> Union[None, Hint]:
+        examined: int = 0
+        for base, cover in ((self.__rows, self.__cols), (self.__cols, self.__rows)):
+            if not base or not cover:
+                continue
+            for value in range(len(self.__all_symbols)):
+                bit: int = 1 << value
+                # base units with the symbol in exactly two positions
+                pairs: dict[tuple[int, int], list[int]] = {}
+                for unit in base:
+                    cells: tuple[int, ...] = self.__unit_cells[unit]
+                    examined += len(cells)
+                    positions: list[int] = [position for position, cell in enumerate(cells) if self.__masks[cell] & bit]
+                    if len(positions) == 2:
+                        pairs.setdefault((positions[0], positions[1]), []).append(unit)
+                for positions, units in pairs.items():
+                    if len(units) < 2:
+                        continue
+                    for first, second in combinations(units, 2):
+                        corners: set[int] = {self.__unit_cells[unit][position] for unit in (first, second)
+                                             for position in positions}
+                        eliminations: dict[int, int] = {}
+                        for position in positions:
+                            for unit in cover:
+                                cells: tuple[int, ...] = self.__unit_cells[unit]
+                                if self.__unit_cells[first][position] not in cells:
+                                    continue
+                                for cell in cells:
+                                    if cell not in corners and self.__masks[cell] & bit:
+                                        eliminations[cell] = bit
+                        if eliminations:
+                            self.__examined("x-wing", examined)
+                            return Hint("x-wing", [], eliminations, tuple(sorted(corners)))
+        self.__examined("x-wing", examined)
+        return None
+
+
+def main() -> None:
+    from text import Sudoku, EXAMPLE_FIELD_STRING
+    rules: dict[str, bool] = {"horizontal": True, "vertical": True, "boxes": True}
+    sudoku: Sudoku = Sudoku(field_string=EXAMPLE_FIELD_STRING, rules=rules)
+    all_symbols: list[str] = [str(i + 1) for i in range(9)]
+    units: Units = Units((9, 9), rules)
+    candidates: Candidates = Candidates(units, all_symbols)
+    candidates.set_board(sudoku.get_field())
+    engine: HintEngine = HintEngine(units, all_symbols)
+    engine.load_candidates(candidates)
+    start_time: float = time.perf_counter()
+    while not engine.is_solved():
+        hint: Union[None, Hint] = engine.step()
+        if hint is None:
+            break
+        print(hint.describe(units, all_symbols))
+    print(f"Time used: {time.perf_counter() - start_time} seconds")
+    for technique, (examined, eliminated, seconds, found) in engine.get_stats().items():
+        print(f"{technique}: found {found}, examined {examined}, eliminated {eliminated}, {seconds:.6f} seconds")
+
+
+if __name__ == "__main__":
+    main()
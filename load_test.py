@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from string_conversion import read_puzzles
+from typing import Union
+
+
+# Load test of service.py: clients send solve requests over keep-alive connections to localhost and the script
+# reports throughput and latency percentiles.
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str,
+                   body: Union[None, bytes] = None) -> tuple[int, dict]:
+    method: str = "POST" if body is not None else "GET"
+    body = body or b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status: int = int((await reader.readline()).split()[1])
+    length: int = 0
+    while True:
+        line: bytes = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _client(host: str, port: int, requests: asyncio.Queue, latencies: list[float],
+                  results: dict[str, int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                body: bytes = requests.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            start_time: float = time.perf_counter()
+            status, response = await _request(reader, writer, host, "/solve", body)
+            latencies.append(time.perf_counter() - start_time)
+            if status != 200:
+                results[f"http {status}"] = results.get(f"http {status}", 0) + 1
+                continue
+            for puzzle_status in response["status"]:
+                results[puzzle_status] = results.get(puzzle_status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def wait_for_service(host: str, port: int, timeout: float = 30.0) -> None:
+    end_time: float = time.time() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            await _request(reader, writer, host, "/health")
+            writer.close()
+            return
+        except OSError:
+            if time.time() > end_time:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))] if ordered else 0.0
+
+
+async def load_test(host: str, port: int, puzzles: list[str], notation: str, requests: int, batch: int,
+                    clients: int, timeout: float, extra: Union[None, dict] = None) -> dict:
+    # sends requests with batch puzzles each (cycling through puzzles) from clients connections at once
+    queue: asyncio.Queue = asyncio.Queue()
+    for n in range(requests):
+        start: int = n * batch
+        queue.put_nowait(json.dumps({"puzzles": [puzzles[(start + k) % len(puzzles)] for k in range(batch)],
+                                     "notation": notation, "timeout": timeout, **(extra or {})}).encode())
+    latencies: list[float] = []
+    results: dict[str, int] = {}
+    start_time: float = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, queue, latencies, results) for _ in range(clients)))
+    seconds: float = time.perf_counter() - start_time
+    return {"seconds": seconds, "requests per second": len(latencies) / seconds,
+            "puzzles per second": len(latencies) * batch / seconds,
+            "latency p50": _percentile(latencies, 50), "latency p90": _percentile(latencies, 90),
+            "latency p99": _percentile(latencies, 99), "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of the solving service.")
+    parser.add_argument("filename", help="puzzles to send, one per line")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1, help="puzzles per request")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent connections")
+    parser.add_argument("--timeout", type=float, default=5.0, help="time budget per request")
+    parser.add_argument("--spawn", action="store_true", help="start service.py for the test")
+    args = parser.parse_args()
+
+    puzzles: list[str] = [puzzle.__str__(args.notation) for puzzle in read_puzzles(args.filename, args.notation)]
+    service: Union[None, subprocess.Popen] = None
+    if args.spawn:
+        service = subprocess.Popen([sys.executable, "service.py", "--host", args.host, "--port", str(args.port)],
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        asyncio.run(wait_for_service(args.host, args.port))
+        report: dict = asyncio.run(load_test(args.host, args.port, puzzles, args.notation, args.requests,
+                                             args.batch, args.clients, args.timeout))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+    print(f"{args.requests} requests of {args.batch} puzzles from {args.clients} clients in "
+          f"{report['seconds']:.2f} seconds")
+    print(f"{report['requests per second']:.1f} requests per second, "
+          f"{report['puzzles per second']:.1f} puzzles per second")
+    print(f"latency p50 {1000 * report['latency p50']:.1f} ms, p90 {1000 * report['latency p90']:.1f} ms, "
+          f"p99 {1000 * report['latency p99']:.1f} ms")
+    print("results: " + ", ".join(f"{status} {count}" for status, count in sorted(report["results"].items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,152 @@
-import ui
+import argparse
+import sys
+from text import Sudoku
+from string_conversion import SudokuString, read_puzzle_stream
+from units import add_board_arguments, board_from_arguments
+from typing import Callable, Iterator, Union
+
+
+# The subcommands only use text and string_conversion, ui (and with it pygame) is imported for the window alone.
+# Every command reads puzzles from the files, or stdin for "-" or no file, and writes one result per puzzle as
+# soon as it is done.
+NOTATIONS: list[str] = ["standard", "sudokustring", "square"]
+
+
+def _read_puzzles(args: argparse.Namespace) -> Iterator[SudokuString]:
+    for filename in args.files or ["-"]:
+        if filename == "-":
+            yield from read_puzzle_stream(sys.stdin, notation=args.notation, width=args.width)
+        else:
+            with open(filename, "r") as f:
+                yield from read_puzzle_stream(f, notation=args.notation, width=args.width)
+
+
+def _get_sudokus(args: argparse.Namespace) -> Iterator[tuple[SudokuString, Union[None, Sudoku]]]:
+    # None for puzzles that don't fit the board size
+    _, rules, all_symbols = board_from_arguments(args)
+    for puzzle in _read_puzzles(args):
+        try:
+            sudoku: Union[None, Sudoku] = Sudoku(size=(args.height, args.width),
+                                                 field_string=puzzle.__str__("sudokustring"), rules=rules,
+                                                 all_symbols=all_symbols)
+        except (AssertionError, IndexError):
+            sudoku = None
+        yield puzzle, sudoku
+
+
+def _write(text: str, notation: str) -> None:
+    # square puzzles are separated by a blank line
+    sys.stdout.write(text + ("\n\n" if notation == "square" else "\n"))
+
+
+def _output_notation(args: argparse.Namespace) -> str:
+    return args.to if args.to is not None else args.notation
+
+
+def solve_command(args: argparse.Namespace) -> int:
+    notation: str = _output_notation(args)
+    # the cache and the portfolio are only imported when used, like ui
+    cache = None
+    if args.cache is not None:
+        from solution_cache import SolutionCache
+        cache = SolutionCache(args.cache)
+    portfolio = None
+    if args.portfolio is not None:
+        from portfolio import Portfolio
+        portfolio = Portfolio(args.portfolio.split(","), timeout=args.timeout)
+    # "solved", "unsolvable", "budget exhausted" or (portfolio) "error"
+    solve_status: Callable[[Sudoku], str] = portfolio.solve_status if portfolio is not None \
+        else lambda sudoku: sudoku.solve_status(max_nodes=args.max_nodes, timeout=args.timeout)
+    failed: int = 0
+    try:
+        for _, sudoku in _get_sudokus(args):
+            status: str = "invalid"
+            if sudoku is not None:
+                status = solve_status(sudoku) if cache is None else cache.solve(sudoku, solve_status=solve_status)
+            if status != "solved":
+                failed += 1
+                _write(status, "standard")
+                continue
+            _write(SudokuString(notation="sudokustring", string=repr(sudoku), width=args.width).__str__(notation),
+                   notation)
+    finally:
+        if cache is not None:
+            cache.close()
+        if portfolio is not None:
+            sys.stderr.write(portfolio.summary() + "\n")
+    return 1 if failed else 0
+
+
+def convert_command(args: argparse.Namespace) -> int:
+    notation: str = _output_notation(args)
+    for puzzle in _read_puzzles(args):
+        _write(puzzle.__str__(notation), notation)
+    return 0
+
+
+def validate_command(args: argparse.Namespace) -> int:
+    # "ok" for puzzles with exactly one solution, otherwise "unsolvable", "multiple solutions" or "invalid"
+    failed: int = 0
+    for _, sudoku in _get_sudokus(args):
+        if sudoku is None:
+            result: str = "invalid"
+        else:
+            result = {0: "unsolvable", 1: "ok"}.get(sudoku.count_solutions(2), "multiple solutions")
+        failed += result != "ok"
+        _write(result, "standard")
+    return 1 if failed else 0
+
+
+def count_command(args: argparse.Namespace) -> int:
+    # number of solutions, counting stops at --limit
+    for _, sudoku in _get_sudokus(args):
+        _write(str(sudoku.count_solutions(args.limit)) if sudoku is not None else "invalid", "standard")
+    return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Sudoku window, or the given command without a window.")
+    puzzle_parser = argparse.ArgumentParser(add_help=False)
+    puzzle_parser.add_argument("files", nargs="*", help='puzzle files, "-" or none for stdin')
+    puzzle_parser.add_argument("--notation", default="sudokustring", choices=NOTATIONS)
+    add_board_arguments(puzzle_parser)
+
+    commands = parser.add_subparsers(dest="command")
+    solve_parser = commands.add_parser("solve", parents=[puzzle_parser], help="print the first solution")
+    solve_parser.add_argument("--to", default=None, choices=NOTATIONS, help="output notation, default --notation")
+    solve_parser.add_argument("--cache", default=None, help="SQLite file of solutions to consult and add to")
+    solve_parser.add_argument("--portfolio", default=None,
+                              help='race comma separated strategies, e.g. "search,random:1,sat:auto" (see portfolio)')
+    solve_parser.add_argument("--max-nodes", type=int, default=None,
+                              help="search nodes per puzzle, not with --portfolio")
+    solve_parser.add_argument("--timeout", type=float, default=None, help="seconds per puzzle")
+    solve_parser.set_defaults(function=solve_command)
+    convert_parser = commands.add_parser("convert", parents=[puzzle_parser], help="change the notation")
+    convert_parser.add_argument("--to", required=True, choices=NOTATIONS)
+    convert_parser.set_defaults(function=convert_command)
+    validate_parser = commands.add_parser("validate", parents=[puzzle_parser],
+                                          help="check that the solution is unique")
+    validate_parser.set_defaults(function=validate_command)
+    count_parser = commands.add_parser("count", parents=[puzzle_parser], help="count the solutions")
+    count_parser.add_argument("--limit", type=int, default=1000)
+    count_parser.set_defaults(function=count_command)
+    return parser
 
 
 def main():
-    ui.main()
+    args = _parser().parse_args()
+    if args.command is None:
+        import ui
+        ui.main()
+        return
+    # results reach the next command of a pipeline one by one, not when a block is full
+    sys.stdout.reconfigure(line_buffering=True)
+    try:
+        sys.exit(args.function(args))
+    except BrokenPipeError:
+        # the reader stopped early, e.g. head
+        sys.stderr.close()
+        sys.exit(0)
 
 
 if __name__ == "__main__":
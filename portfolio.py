@@ -0,0 +1,223 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import sys
+import time
+import sat
+from text import Sudoku
+from search import Search
+from string_conversion import read_puzzles
+from units import add_board_arguments, board_from_arguments
+from typing import Callable, Union
+
+
+# Portfolio solving: every strategy searches the same puzzle in its own process, the first answer wins and the other
+# processes are terminated. A strategy is "name" or "name:argument":
+#   search          Search as in Sudoku.solve: most constrained cell first, symbols in order
+#   random:seed     Search with random symbol order, restarted with a new order after a Luby sequence of node budgets
+#   sat:backend     CNF encoding with a SAT backend, see sat.get_backend ("auto", "cdcl" or a solver command)
+DEFAULT_STRATEGIES: list[str] = ["search", "random:1", "sat:auto"]
+# node budget of the shortest random restart
+RESTART_NODES: int = 100
+# seconds between checks for strategy processes that died without an answer
+POLL_SECONDS: float = 0.1
+
+
+def _search(sudoku: Sudoku, argument: str) -> Union[None, list[int]]:
+    search: Search = Search(sudoku.get_units(), len(sudoku.get_all_symbols()), pruners=sudoku.get_pruners())
+    if not search.start(sudoku.get_values()):
+        return None
+    return search.next_solution()
+
+
+def _random_restarts(sudoku: Sudoku, argument: str) -> Union[None, list[int]]:
+    # a run that searches its whole tree without solution proves there is none
+    restart: int = 0
+    while True:
+        search: Search = Search(sudoku.get_units(), len(sudoku.get_all_symbols()),
+                                rng=random.Random(f"{argument}:{restart}"), pruners=sudoku.get_pruners())
+        if not search.start(sudoku.get_values()):
+            return None
+        solution: Union[None, list[int]] = search.next_solution(max_nodes=RESTART_NODES * sat.luby(restart))
+        if solution is not None or search.is_finished():
+            return solution
+        restart += 1
+
+
+def _sat(sudoku: Sudoku, argument: str) -> Union[None, list[int]]:
+    return sudoku.get_values() if sat.solve(sudoku, sat.get_backend(argument or "auto")) else None
+
+
+# solution values or None if there is no solution
+STRATEGIES: dict[str, Callable[[Sudoku, str], Union[None, list[int]]]] = {"search": _search,
+                                                                           "random": _random_restarts, "sat": _sat}
+
+
+def _run_strategy(strategy: str, settings: tuple, results: multiprocessing.Queue) -> None:
+    # puts (strategy, "solved", "unsolvable" or "error", solution values or error message, seconds) into results
+    # SystemExit on terminate lets subprocess.run kill an external SAT solver
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    start_time: float = time.perf_counter()
+    sudoku_size, rules, all_symbols, values = settings
+    name, _, argument = strategy.partition(":")
+    try:
+        sudoku: Sudoku = Sudoku(size=(sudoku_size[1], sudoku_size[0]), rules=rules, all_symbols=all_symbols)
+        sudoku.set_values(values)
+        solution: Union[None, list[int]] = STRATEGIES[name](sudoku, argument)
+    except Exception as error:
+        # constraints that need numeric symbols, missing solver commands, bugs of a strategy
+        results.put((strategy, "error", str(error) or type(error).__name__, time.perf_counter() - start_time))
+        return
+    results.put((strategy, "solved" if solution is not None else "unsolvable", solution,
+                 time.perf_counter() - start_time))
+
+
+class Portfolio:
+    def __init__(self, strategies: Union[None, list[str]] = None, timeout: Union[None, float] = None,
+                 stats: Union[None, dict[str, dict[str, float]]] = None) -> None:
+        # stats of earlier runs (see get_stats) are continued
+        self.__strategies: list[str] = list(strategies) if strategies is not None else DEFAULT_STRATEGIES[:]
+        for strategy in self.__strategies:
+            if strategy.partition(":")[0] not in STRATEGIES:
+                raise ValueError(f"Unknown strategy {strategy}, the strategies are {', '.join(STRATEGIES)}")
+        self.__timeout: Union[None, float] = timeout
+        self.__stats: dict[str, dict[str, float]] = {strategy: dict(counts)
+                                                     for strategy, counts in (stats or {}).items()}
+        for strategy in self.__strategies:
+            self.__stats.setdefault(strategy, {"runs": 0, "wins": 0, "errors": 0, "win seconds": 0.0})
+        self.__last_winner: Union[None, str] = None
+        # error message by strategy of the last solve
+        self.__last_errors: dict[str, str] = {}
+
+    def solve(self, sudoku: Sudoku) -> Union[None, bool]:
+        # like Sudoku.solve: True if solved, None if not, see solve_status
+        return True if self.solve_status(sudoku) == "solved" else None
+
+    def solve_status(self, sudoku: Sudoku) -> str:
+        # like Sudoku.solve_status, "budget exhausted" if no strategy answered within the timeout and "error" if every
+        # strategy failed (see get_last_errors)
+        settings: tuple = (sudoku.get_size(), sudoku.get_rules(), list(sudoku.get_all_symbols()), sudoku.get_values())
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        processes: list[multiprocessing.Process] = [
+            multiprocessing.Process(target=_run_strategy, args=(strategy, settings, results), daemon=True)
+            for strategy in self.__strategies]
+        for process in processes:
+            process.start()
+        for strategy in self.__strategies:
+            self.__stats[strategy]["runs"] += 1
+        end_time: Union[None, float] = time.monotonic() + self.__timeout if self.__timeout is not None else None
+        self.__last_winner = None
+        self.__last_errors = {}
+        outcome: str = "error"
+        # strategies that answered or died, and those found dead at the last check (their answer may still be on
+        # its way)
+        done: set[str] = set()
+        exited: set[str] = set()
+        try:
+            while len(done) < len(set(self.__strategies)):
+                try:
+                    strategy, status, solution, seconds = results.get(
+                        timeout=min(POLL_SECONDS, max(0.0, end_time - time.monotonic())) if end_time is not None
+                        else POLL_SECONDS)
+                except queue.Empty:
+                    if end_time is not None and time.monotonic() >= end_time:
+                        outcome = "budget exhausted"
+                        break
+                    for strategy, process in zip(self.__strategies, processes):
+                        if strategy in done or process.exitcode is None:
+                            continue
+                        if strategy in exited:
+                            done.add(strategy)
+                            self.__stats[strategy]["errors"] += 1
+                            self.__last_errors[strategy] = f"process exited with code {process.exitcode}"
+                        exited.add(strategy)
+                    continue
+                done.add(strategy)
+                if status == "error":
+                    self.__stats[strategy]["errors"] += 1
+                    self.__last_errors[strategy] = solution
+                    continue
+                self.__last_winner = strategy
+                self.__stats[strategy]["wins"] += 1
+                self.__stats[strategy]["win seconds"] += seconds
+                if solution is not None:
+                    sudoku.set_values(solution)
+                outcome = status
+                break
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+            results.close()
+        return outcome
+
+    def get_last_winner(self) -> Union[None, str]:
+        return self.__last_winner
+
+    def get_last_errors(self) -> dict[str, str]:
+        return dict(self.__last_errors)
+
+    def is_last_failed(self) -> bool:
+        # True if every strategy of the last solve failed, e.g. a missing SAT solver and non-numeric symbols
+        return len(self.__last_errors) == len(set(self.__strategies))
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        # per strategy: runs, wins, errors and the time of the wins
+        return {strategy: dict(counts) for strategy, counts in self.__stats.items()}
+
+    def summary(self) -> str:
+        lines: list[str] = []
+        for strategy, counts in self.__stats.items():
+            mean: float = counts["win seconds"] / counts["wins"] if counts["wins"] else 0.0
+            lines.append(f"{strategy}: won {counts['wins']:.0f} of {counts['runs']:.0f} runs "
+                         f"({1000 * mean:.1f} ms per win), {counts['errors']:.0f} errors")
+        return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Solve puzzles with several strategies racing each other.")
+    parser.add_argument("filename")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    add_board_arguments(parser)
+    parser.add_argument("--strategies", default=",".join(DEFAULT_STRATEGIES),
+                        help='comma separated, e.g. "search,random:1,random:2,sat:cdcl"')
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per puzzle")
+    parser.add_argument("--stats", default=None, help="JSON file of the win statistics, continued and updated")
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+    stats: Union[None, dict[str, dict[str, float]]] = None
+    if args.stats is not None and os.path.exists(args.stats):
+        with open(args.stats, "r") as f:
+            stats = json.load(f)
+    portfolio: Portfolio = Portfolio(args.strategies.split(","), timeout=args.timeout, stats=stats)
+
+    start_time: float = time.time()
+    count: int = 0
+    for puzzle in read_puzzles(args.filename, notation=args.notation, width=args.width):
+        sudoku: Sudoku = Sudoku(size=(args.height, args.width), field_string=puzzle.__str__("sudokustring"),
+                                rules=rules, all_symbols=all_symbols)
+        count += 1
+        status: str = portfolio.solve_status(sudoku)
+        if status == "error":
+            print("error: " + "; ".join(f"{strategy}: {message}"
+                                        for strategy, message in portfolio.get_last_errors().items()))
+        else:
+            print(repr(sudoku) if status == "solved" else "timeout" if status == "budget exhausted" else status)
+    end_time: float = time.time()
+    print(f"Solved {count} puzzles in {end_time - start_time} seconds "
+          f"({count / max(end_time - start_time, 1e-9):.1f} puzzles per second)")
+    print(portfolio.summary())
+    if args.stats is not None:
+        with open(args.stats, "w") as f:
+            json.dump(portfolio.get_stats(), f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import math
+import multiprocessing
+import time
+from collections import deque
+from text import Sudoku, Pruner
+from units import Units, standard_field_groups, add_board_arguments, board_from_arguments
+from candidates import Candidates
+from hints import HintEngine, Hint, TECHNIQUES
+from search import Search
+from string_conversion import read_puzzles
+from typing import Union
+
+
+# score of the hardest technique a puzzle needs, puzzles logic can't finish score above all of them
+TECHNIQUE_SCORES: dict[str, float] = {"naked single": 1.0, "hidden single": 1.5, "naked pair": 2.0,
+                                      "hidden pair": 2.5, "pointing": 2.8, "box/line reduction": 3.0,
+                                      "naked triple": 3.4, "hidden triple": 3.8, "x-wing": 4.5}
+SEARCH_SCORE: float = 5.0
+
+# per worker process: units and hint engine for the board size and rules of the file
+_worker_settings: dict = {}
+
+
+def rate_values(values: list[int], units: Units, all_symbols: list[str],
+                engine: Union[None, HintEngine] = None, pruners: Union[None, list[Pruner]] = None) -> tuple[float, str]:
+    # (score, hardest technique), "search" if logic got stuck and "invalid" without a solution. The pruners of the
+    # constraints (see Sudoku.get_pruners) belong to the search.
+    if engine is None:
+        engine = HintEngine(units, all_symbols)
+    candidates: Candidates = Candidates(units, all_symbols)
+    for cell, value in enumerate(values):
+        if value >= 0:
+            candidates.set_value(cell, all_symbols[value])
+    engine.load_candidates(candidates)
+
+    hardest: int = -1
+    while not engine.is_solved():
+        hint: Union[None, Hint] = engine.step()
+        if hint is None:
+            break
+        hardest = max(hardest, TECHNIQUES.index(hint.get_technique()))
+    score: float = TECHNIQUE_SCORES[TECHNIQUES[hardest]] if hardest >= 0 else 0.0
+    if engine.is_solved():
+        return score, TECHNIQUES[hardest] if hardest >= 0 else "none"
+
+    # search effort from where logic got stuck, the remaining solution space grows exponentially in the nodes
+    search: Search = Search(units, len(all_symbols), pruners=pruners)
+    if not search.start(engine.get_values()) or search.next_solution() is None:
+        return -1.0, "invalid"
+    return SEARCH_SCORE + math.log2(1 + search.get_nodes()), "search"
+
+
+def rate(sudoku: Sudoku, engine: Union[None, HintEngine] = None) -> tuple[float, str]:
+    return rate_values(sudoku.get_values(), sudoku.get_units(), sudoku.get_all_symbols(), engine,
+                       sudoku.get_pruners())
+
+
+def _init_worker(sudoku_size: tuple[int, int], rules: dict[str, Union[bool, list[list[tuple[int, int]]]]],
+                 all_symbols: list[str]) -> None:
+    global _worker_settings
+    sudoku: Sudoku = Sudoku(size=(sudoku_size[1], sudoku_size[0]), rules=rules, all_symbols=all_symbols)
+    units: Units = sudoku.get_units()
+    _worker_settings = {"sudoku_size": sudoku_size, "rules": rules, "all_symbols": all_symbols, "units": units,
+                        "engine": HintEngine(units, all_symbols), "pruners": sudoku.get_pruners()}
+
+
+def _rate_one(field_string: str) -> tuple[float, str]:
+    # the units are shared by every puzzle of the worker, the Sudoku only reads the field
+    sudoku: Sudoku = Sudoku(size=(_worker_settings["sudoku_size"][1], _worker_settings["sudoku_size"][0]),
+                            field_string=field_string, rules=_worker_settings["rules"],
+                            all_symbols=_worker_settings["all_symbols"])
+    return rate_values(sudoku.get_values(), _worker_settings["units"], _worker_settings["all_symbols"],
+                       _worker_settings["engine"], _worker_settings["pruners"])
+
+
+def rate_file(filename: str, out_filename: str, notation: str = "sudokustring", sudoku_size: tuple[int, int] = (9, 9),
+              rules: Union[None, dict[str, Union[bool, list[list[tuple[int, int]]]]]] = None,
+              all_symbols: Union[None, list[str]] = None, processes: Union[None, int] = None,
+              chunksize: int = 256) -> int:
+    # writes "puzzle<TAB>score<TAB>technique" per puzzle in input order, square notation is written as SudokuString
+    if all_symbols is None:
+        all_symbols = [str(i + 1) for i in range(max(sudoku_size))]
+    if rules is None:
+        rules = {"horizontal": True, "vertical": True, "boxes": standard_field_groups(sudoku_size)}
+    out_notation: str = notation if notation != "square" else "sudokustring"
+
+    # puzzles handed to the pool but not written yet
+    puzzles: deque[str] = deque()
+
+    def field_strings():
+        for puzzle in read_puzzles(filename, notation=notation, width=sudoku_size[0]):
+            puzzles.append(puzzle.__str__(out_notation))
+            yield puzzle.__str__("sudokustring")
+
+    rated: int = 0
+    with open(out_filename, "w") as f, multiprocessing.Pool(processes, initializer=_init_worker,
+                                                            initargs=(sudoku_size, rules, all_symbols)) as pool:
+        for score, technique in pool.imap(_rate_one, field_strings(), chunksize=chunksize):
+            f.write(f"{puzzles.popleft()}\t{score:.2f}\t{technique}\n")
+            rated += 1
+    return rated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rate the difficulty of every puzzle in a file.")
+    parser.add_argument("filename")
+    parser.add_argument("out_filename")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    add_board_arguments(parser)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+
+    start_time: float = time.time()
+    rated: int = rate_file(args.filename, args.out_filename, notation=args.notation, sudoku_size=sudoku_size,
+                           rules=rules, all_symbols=all_symbols, processes=args.processes)
+    end_time: float = time.time()
+    print(f"Rated {rated} puzzles in {end_time - start_time} seconds "
+          f"({rated / max(end_time - start_time, 1e-9):.1f} puzzles per second)")
+
+
+if __name__ == "__main__":
+    main()
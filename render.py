@@ -0,0 +1,87 @@
+import argparse
+import multiprocessing
+import os
+import time
+from typing import Union
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from ui_board import Board
+from text import Sudoku
+from string_conversion import read_puzzles
+from units import standard_field_groups
+
+
+# per worker process: one surface and one set of fonts, reused for every puzzle
+_worker_surface: Union[None, pygame.Surface] = None
+_worker_board: Union[None, Board] = None
+_worker_settings: dict = {}
+
+
+def _init_worker(sudoku_size: tuple[int, int], cell_size: int, margin: int, all_symbols: list[str],
+                 field_groups: list[list[tuple[int, int]]], fontname: str) -> None:
+    global _worker_surface, _worker_board, _worker_settings
+    pygame.font.init()
+    _worker_surface = pygame.Surface((sudoku_size[0] * cell_size + 2 * margin,
+                                      sudoku_size[1] * cell_size + 2 * margin))
+    _worker_board = Board(_worker_surface, fontname=fontname)
+    _worker_board.set_size_properties(((margin, margin), cell_size), all_symbols)
+    _worker_settings = {"sudoku_size": sudoku_size, "all_symbols": all_symbols,
+                        "cell_groups": {cell: n for n, group in enumerate(field_groups) for cell in group}}
+
+
+def _render_one(task: tuple[str, str]) -> str:
+    field_string, filename = task
+    sudoku: Sudoku = Sudoku(size=(_worker_settings["sudoku_size"][1], _worker_settings["sudoku_size"][0]),
+                            field_string=field_string, all_symbols=_worker_settings["all_symbols"])
+    sudoku.lock_filled()
+    _worker_surface.fill("white")
+    _worker_board.draw(sudoku.get_field(), _worker_settings["cell_groups"])
+    pygame.image.save(_worker_surface, filename)
+    return filename
+
+
+def render_file(filename: str, out_dir: str, notation: str = "sudokustring", sudoku_size: tuple[int, int] = (9, 9),
+                all_symbols: Union[None, list[str]] = None,
+                field_groups: Union[None, list[list[tuple[int, int]]]] = None, cell_size: int = 58,
+                margin: int = 10, fontname: str = "Arial", processes: Union[None, int] = None,
+                chunksize: int = 64) -> int:
+    if all_symbols is None:
+        all_symbols = [str(i + 1) for i in range(max(sudoku_size))]
+    if field_groups is None:
+        field_groups = standard_field_groups(sudoku_size)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = ((str(puzzle), os.path.join(out_dir, f"{n:06d}.png"))
+             for n, puzzle in enumerate(read_puzzles(filename, notation=notation, width=sudoku_size[0])))
+
+    rendered: int = 0
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(sudoku_size, cell_size, margin, all_symbols, field_groups, fontname)) as pool:
+        for _ in pool.imap_unordered(_render_one, tasks, chunksize=chunksize):
+            rendered += 1
+    return rendered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render every puzzle in a file to a PNG image.")
+    parser.add_argument("filename")
+    parser.add_argument("out_dir")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    parser.add_argument("--width", type=int, default=9)
+    parser.add_argument("--height", type=int, default=9)
+    parser.add_argument("--cell-size", type=int, default=58)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    start_time: float = time.time()
+    rendered: int = render_file(args.filename, args.out_dir, notation=args.notation,
+                                sudoku_size=(args.width, args.height), cell_size=args.cell_size,
+                                processes=args.processes)
+    end_time: float = time.time()
+    print(f"Rendered {rendered} puzzles in {end_time - start_time} seconds")
+
+
+if __name__ == "__main__":
+    main()
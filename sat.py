@@ -0,0 +1,445 @@
+import argparse
+import heapq
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from itertools import combinations
+from text import Sudoku
+from alphabet import Alphabet
+from units import Units, add_board_arguments, board_from_arguments
+from string_conversion import read_puzzles
+from typing import IO, Union
+
+
+# External solvers tried in this order by find_backend, all of them read DIMACS and print the SAT competition output
+EXTERNAL_SOLVERS: tuple[str, ...] = ("kissat", "cadical", "cryptominisat5", "glucose", "minisat")
+
+
+# Clauses are lists of DIMACS literals: variable v is true for v and false for -v. Variable cell * n + value + 1
+# (n symbols) is true if the cell holds symbol value, variables after the cells are auxiliary ones of constraints.
+def encode(sudoku: Sudoku) -> tuple[list[list[int]], int]:
+    # (clauses, variable count) of the rules and givens of the sudoku
+    units: Units = sudoku.get_units()
+    all_symbols: Alphabet = sudoku.get_all_symbols()
+    symbol_count: int = len(all_symbols)
+    variable_count: int = units.get_cell_count() * symbol_count
+
+    def variable(cell: int, value: int) -> int:
+        return cell * symbol_count + value + 1
+
+    def new_variable() -> int:
+        nonlocal variable_count
+        variable_count += 1
+        return variable_count
+
+    clauses: list[list[int]] = []
+    symbols: range = range(symbol_count)
+    for cell in range(units.get_cell_count()):
+        clauses.append([variable(cell, value) for value in symbols])
+        clauses += [[-variable(cell, m), -variable(cell, n)] for m, n in combinations(symbols, 2)]
+    for unit in units.get_units():
+        for value in symbols:
+            clauses += [[-variable(a, value), -variable(b, value)] for a, b in combinations(unit, 2)]
+            # implied by the clauses above, but lets unit propagation find hidden singles
+            if len(unit) == symbol_count:
+                clauses.append([variable(cell, value) for cell in unit])
+    for constraint in sudoku.get_rules().get("constraints", None) or []:
+        clauses += constraint.cnf(units, all_symbols, variable, new_variable)
+    for cell, value in enumerate(sudoku.get_values()):
+        if value >= 0:
+            clauses.append([variable(cell, value)])
+    return clauses, variable_count
+
+
+def decode(model: list[int], cell_count: int, symbol_count: int) -> list[int]:
+    # values of the cells (see Sudoku.get_values) from the true literals of a model
+    values: list[int] = [-1] * cell_count
+    for literal in model:
+        if 0 < literal <= cell_count * symbol_count:
+            values[(literal - 1) // symbol_count] = (literal - 1) % symbol_count
+    return values
+
+
+def write_dimacs(f: IO[str], clauses: list[list[int]], variable_count: int) -> None:
+    f.write(f"p cnf {variable_count} {len(clauses)}\n")
+    for clause in clauses:
+        f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def read_dimacs(f: IO[str]) -> tuple[list[list[int]], int]:
+    clauses: list[list[int]] = []
+    variable_count: int = 0
+    clause: list[int] = []
+    for line in f:
+        if line.startswith("c") or line.startswith("%"):
+            continue
+        if line.startswith("p"):
+            variable_count = int(line.split()[2])
+            continue
+        for literal in map(int, line.split()):
+            if literal == 0:
+                clauses.append(clause)
+                clause = []
+            else:
+                clause.append(literal)
+    return clauses, variable_count
+
+
+# Backends take (clauses, variable count) and return the true literals of a model, or None if there is none.
+class SatBackend:
+    def get_name(self) -> str:
+        return type(self).__name__
+
+    def solve(self, clauses: list[list[int]], variable_count: int) -> Union[None, list[int]]:
+        raise NotImplementedError
+
+
+class ExternalSolver(SatBackend):
+    def __init__(self, command: list[str]) -> None:
+        # command and options without the input file, e.g. ["kissat", "-q"]
+        self.__command: list[str] = command
+
+    def get_name(self) -> str:
+        return os.path.basename(self.__command[0])
+
+    def solve(self, clauses: list[list[int]], variable_count: int) -> Union[None, list[int]]:
+        # None only for an unsatisfiable answer, OSError for anything else (crash, UNKNOWN, missing output)
+        with tempfile.TemporaryDirectory() as directory:
+            cnf_filename: str = os.path.join(directory, "problem.cnf")
+            with open(cnf_filename, "w") as f:
+                write_dimacs(f, clauses, variable_count)
+            if self.get_name() == "minisat":
+                # minisat writes the model to a result file instead of stdout
+                result_filename: str = os.path.join(directory, "result")
+                process: subprocess.CompletedProcess = subprocess.run(
+                    self.__command + [cnf_filename, result_filename], capture_output=True, text=True)
+                lines: list[str] = []
+                if os.path.exists(result_filename):
+                    with open(result_filename) as f:
+                        lines = f.read().split("\n", 1)
+                if lines and lines[0].strip() == "UNSAT":
+                    return None
+                if not lines or lines[0].strip() != "SAT" or len(lines) < 2:
+                    raise self.__error(process, lines[0].strip() if lines else None)
+                return [literal for literal in map(int, lines[1].split()) if literal > 0]
+            process = subprocess.run(self.__command + [cnf_filename], capture_output=True, text=True)
+        model: list[int] = []
+        status: Union[None, str] = None
+        for line in process.stdout.splitlines():
+            if line.startswith("s "):
+                status = line[2:].strip()
+            elif line.startswith("v "):
+                model += [literal for literal in map(int, line.split()[1:]) if literal > 0]
+        # exit code 10 is satisfiable and 20 unsatisfiable
+        if status == "UNSATISFIABLE" or (status is None and process.returncode == 20):
+            return None
+        if status != "SATISFIABLE":
+            raise self.__error(process, status)
+        return model
+
+    def __error(self, process: subprocess.CompletedProcess, status: Union[None, str]) -> OSError:
+        message: str = (process.stderr or "").strip() or f"exit code {process.returncode}"
+        return OSError(f"{self.get_name()} answered {status or 'nothing'}: {message}")
+
+
+def luby(i: int) -> int:
+    # restart lengths 1, 1, 2, 1, 1, 2, 4, 1, ...
+    size: int = 1
+    while size < i + 1:
+        size = 2 * size + 1
+    while size - 1 != i:
+        size //= 2
+        i %= size
+    return (size + 1) // 2
+
+
+# Small conflict driven clause learning solver so solving works without an external solver: two watched literals
+# per clause, first UIP learning with backjumping, VSIDS variable order with phase saving and Luby restarts.
+class CDCLSolver(SatBackend):
+    def __init__(self, max_conflicts: Union[None, int] = None, restart_interval: int = 100,
+                 decay: float = 0.95) -> None:
+        # with max_conflicts solve gives up and returns None after that many conflicts, see is_unknown
+        self.__max_conflicts: Union[None, int] = max_conflicts
+        self.__restart_interval: int = restart_interval
+        self.__decay: float = decay
+        self.__unknown: bool = False
+        self.__stats: dict[str, int] = {}
+
+    def is_unknown(self) -> bool:
+        # True if the last solve stopped at max_conflicts
+        return self.__unknown
+
+    def get_stats(self) -> dict[str, int]:
+        # decisions, propagations, conflicts, learnt clauses and restarts of the last solve
+        return dict(self.__stats)
+
+    def solve(self, clauses: list[list[int]], variable_count: int) -> Union[None, list[int]]:
+        self.__unknown = False
+        stats: dict[str, int] = {"decisions": 0, "propagations": 0, "conflicts": 0, "learnt": 0, "restarts": 0}
+        self.__stats = stats
+        # per variable: 1 true, -1 false, 0 unassigned
+        assigns: list[int] = [0] * (variable_count + 1)
+        levels: list[int] = [0] * (variable_count + 1)
+        reasons: list[Union[None, list[int]]] = [None] * (variable_count + 1)
+        phases: list[int] = [-1] * (variable_count + 1)
+        activity: list[float] = [0.0] * (variable_count + 1)
+        increment: float = 1.0
+        # clauses watching literal l are in watches[2 * l] or watches[-2 * l + 1]
+        watches: list[list[list[int]]] = [[] for _ in range(2 * variable_count + 2)]
+        trail: list[int] = []
+        trail_limits: list[int] = []
+        head: int = 0
+
+        def watch(literal: int) -> list[list[int]]:
+            return watches[2 * literal if literal > 0 else -2 * literal + 1]
+
+        def value(literal: int) -> int:
+            return assigns[literal] if literal > 0 else -assigns[-literal]
+
+        def enqueue(literal: int, reason: Union[None, list[int]]) -> None:
+            var: int = abs(literal)
+            assigns[var] = 1 if literal > 0 else -1
+            levels[var] = len(trail_limits)
+            reasons[var] = reason
+            trail.append(literal)
+
+        units: list[int] = []
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-literal in clause for literal in clause):
+                continue
+            if not clause:
+                return None
+            if len(clause) == 1:
+                units.append(clause[0])
+            else:
+                watch(clause[0]).append(clause)
+                watch(clause[1]).append(clause)
+        for literal in units:
+            if value(literal) < 0:
+                return None
+            if value(literal) == 0:
+                enqueue(literal, None)
+
+        # unassigned variables by activity, entries are outdated if the activity changed in the meantime
+        heap: list[tuple[float, int]] = [(0.0, var) for var in range(1, variable_count + 1)]
+
+        def propagate() -> Union[None, list[int]]:
+            # conflicting clause or None
+            nonlocal head
+            while head < len(trail):
+                false_literal: int = -trail[head]
+                head += 1
+                stats["propagations"] += 1
+                watching: list[list[int]] = watch(false_literal)
+                i: int = 0
+                j: int = 0
+                while i < len(watching):
+                    clause: list[int] = watching[i]
+                    i += 1
+                    if clause[0] == false_literal:
+                        clause[0], clause[1] = clause[1], clause[0]
+                    first: int = clause[0]
+                    if value(first) > 0:
+                        watching[j] = clause
+                        j += 1
+                        continue
+                    for k in range(2, len(clause)):
+                        if value(clause[k]) >= 0:
+                            clause[1], clause[k] = clause[k], clause[1]
+                            watch(clause[1]).append(clause)
+                            break
+                    else:
+                        watching[j] = clause
+                        j += 1
+                        if value(first) < 0:
+                            while i < len(watching):
+                                watching[j] = watching[i]
+                                j += 1
+                                i += 1
+                            del watching[j:]
+                            return clause
+                        enqueue(first, clause)
+                del watching[j:]
+            return None
+
+        def bump(var: int) -> None:
+            nonlocal increment
+            activity[var] += increment
+            if activity[var] > 1e100:
+                for v in range(1, variable_count + 1):
+                    activity[v] *= 1e-100
+                increment *= 1e-100
+                heap[:] = [(-activity[v], v) for v in range(1, variable_count + 1) if not assigns[v]]
+                heapq.heapify(heap)
+            elif not assigns[var]:
+                heapq.heappush(heap, (-activity[var], var))
+
+        def analyze(conflict: list[int]) -> tuple[list[int], int]:
+            # first UIP clause, its asserting literal first, and the level to jump back to
+            seen: set[int] = set()
+            learnt: list[int] = [0]
+            level: int = len(trail_limits)
+            pending: int = 0
+            literal: int = 0
+            index: int = len(trail) - 1
+            clause: list[int] = conflict
+            while True:
+                for other in clause:
+                    var: int = abs(other)
+                    if other != literal and var not in seen and levels[var] > 0:
+                        seen.add(var)
+                        bump(var)
+                        if levels[var] == level:
+                            pending += 1
+                        else:
+                            learnt.append(other)
+                while abs(trail[index]) not in seen:
+                    index -= 1
+                literal = trail[index]
+                index -= 1
+                clause = reasons[abs(literal)]
+                seen.discard(abs(literal))
+                pending -= 1
+                if not pending:
+                    break
+            learnt[0] = -literal
+            if len(learnt) == 1:
+                return learnt, 0
+            # the literal of the highest level is watched second, it becomes unassigned last
+            highest: int = max(range(1, len(learnt)), key=lambda n: levels[abs(learnt[n])])
+            learnt[1], learnt[highest] = learnt[highest], learnt[1]
+            return learnt, levels[abs(learnt[1])]
+
+        def backtrack(level: int) -> None:
+            nonlocal head
+            if len(trail_limits) <= level:
+                return
+            for literal in trail[trail_limits[level]:]:
+                var: int = abs(literal)
+                phases[var] = 1 if literal > 0 else -1
+                assigns[var] = 0
+                reasons[var] = None
+                heapq.heappush(heap, (-activity[var], var))
+            del trail[trail_limits[level]:]
+            del trail_limits[level:]
+            head = len(trail)
+
+        restarts: int = 0
+        restart_at: int = self.__restart_interval * luby(restarts)
+        conflicts_since_restart: int = 0
+        while True:
+            conflict: Union[None, list[int]] = propagate()
+            if conflict is not None:
+                stats["conflicts"] += 1
+                conflicts_since_restart += 1
+                if not trail_limits:
+                    return None
+                if self.__max_conflicts is not None and stats["conflicts"] > self.__max_conflicts:
+                    self.__unknown = True
+                    return None
+                learnt, level = analyze(conflict)
+                backtrack(level)
+                if len(learnt) == 1:
+                    enqueue(learnt[0], None)
+                else:
+                    watch(learnt[0]).append(learnt)
+                    watch(learnt[1]).append(learnt)
+                    enqueue(learnt[0], learnt)
+                    stats["learnt"] += 1
+                increment /= self.__decay
+                continue
+            if conflicts_since_restart >= restart_at:
+                restarts += 1
+                stats["restarts"] += 1
+                conflicts_since_restart = 0
+                restart_at = self.__restart_interval * luby(restarts)
+                backtrack(0)
+                continue
+            var: int = 0
+            while heap:
+                negative_activity, candidate = heapq.heappop(heap)
+                if not assigns[candidate] and -negative_activity == activity[candidate]:
+                    var = candidate
+                    break
+            if not var:
+                # the heap can miss a variable only if its entry got outdated, check them all before stopping
+                var = next((v for v in range(1, variable_count + 1) if not assigns[v]), 0)
+                if not var:
+                    return [v for v in range(1, variable_count + 1) if assigns[v] > 0]
+            stats["decisions"] += 1
+            trail_limits.append(len(trail))
+            enqueue(var * phases[var], None)
+
+
+def find_backend() -> SatBackend:
+    # first external solver on the PATH, the built-in solver otherwise
+    for name in EXTERNAL_SOLVERS:
+        path: Union[None, str] = shutil.which(name)
+        if path is not None:
+            return ExternalSolver([path])
+    return CDCLSolver()
+
+
+def get_backend(name: str = "auto") -> SatBackend:
+    # "auto", "cdcl" or a solver command with options, e.g. "kissat -q"
+    if name == "auto":
+        return find_backend()
+    if name == "cdcl":
+        return CDCLSolver()
+    return ExternalSolver(name.split())
+
+
+def solve(sudoku: Sudoku, backend: Union[None, SatBackend] = None) -> bool:
+    # like Sudoku.solve, but the field is filled from the model of the CNF encoding. False only if the encoding is
+    # unsatisfiable, a CDCLSolver that stops at max_conflicts raises TimeoutError (an OSError like the errors of
+    # external solvers)
+    if backend is None:
+        backend = find_backend()
+    clauses, variable_count = encode(sudoku)
+    model: Union[None, list[int]] = backend.solve(clauses, variable_count)
+    if model is None:
+        if isinstance(backend, CDCLSolver) and backend.is_unknown():
+            raise TimeoutError(f"{backend.get_name()} gave up after {backend.get_stats()['conflicts']} conflicts")
+        return False
+    sudoku.set_values(decode(model, sudoku.get_units().get_cell_count(), len(sudoku.get_all_symbols())))
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Solve puzzles with a SAT solver or write their CNF encoding.")
+    parser.add_argument("filename")
+    parser.add_argument("--notation", default="sudokustring", choices=["standard", "sudokustring", "square"])
+    add_board_arguments(parser)
+    parser.add_argument("--backend", default="auto", help='"auto", "cdcl" or a solver command, e.g. "kissat -q"')
+    parser.add_argument("--dimacs", default=None,
+                        help="write the encoding instead of solving, {n} is replaced by the puzzle number")
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+    backend: SatBackend = get_backend(args.backend)
+
+    start_time: float = time.time()
+    count: int = 0
+    for n, puzzle in enumerate(read_puzzles(args.filename, notation=args.notation, width=args.width)):
+        sudoku: Sudoku = Sudoku(size=(args.height, args.width), field_string=puzzle.__str__("sudokustring"),
+                                rules=rules, all_symbols=all_symbols)
+        count += 1
+        if args.dimacs is not None:
+            clauses, variable_count = encode(sudoku)
+            with open(args.dimacs.format(n=n), "w") as f:
+                write_dimacs(f, clauses, variable_count)
+        elif solve(sudoku, backend):
+            print(repr(sudoku))
+        else:
+            print("unsolvable")
+    end_time: float = time.time()
+    action: str = "Encoded" if args.dimacs is not None else f"Solved ({backend.get_name()})"
+    print(f"{action} {count} puzzles in {end_time - start_time} seconds "
+          f"({count / max(end_time - start_time, 1e-9):.1f} puzzles per second)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+import random
+import time
+from units import Units
+from typing import Callable, Union
+
+
+# Opt-in counters and timers of a Search, see Search.__instrument. Placements and removals count symbols placed in
+# and candidates removed from cells, a backtrack is a branch that ended in a contradiction. checks counts the units
+# scanned for hidden singles per unit type and the pruner runs per constraint. The timers don't overlap except
+# "propagate", which contains "units" and "pruners".
+class SolverStats:
+    def __init__(self, progress: Union[None, Callable[["SolverStats"], None]] = None,
+                 progress_interval: int = 1000) -> None:
+        # progress is called with the stats every progress_interval nodes
+        self.progress: Union[None, Callable[["SolverStats"], None]] = progress
+        self.progress_interval: int = progress_interval
+        self.counters: dict[str, int] = {"nodes": 0, "placements": 0, "removals": 0, "backtracks": 0}
+        self.checks: dict[str, int] = {}
+        self.timers: dict[str, float] = {"assign": 0.0, "propagate": 0.0, "units": 0.0, "pruners": 0.0,
+                                         "select": 0.0, "copy": 0.0, "total": 0.0}
+
+    def get_counters(self) -> dict[str, int]:
+        return dict(self.counters)
+
+    def get_checks(self) -> dict[str, int]:
+        return dict(self.checks)
+
+    def get_timers(self) -> dict[str, float]:
+        return dict(self.timers)
+
+    def summary(self) -> str:
+        # one line for status bars
+        return (f"{1000 * self.timers['total']:.1f} ms, {self.counters['nodes']} nodes, "
+                f"{self.counters['placements']} placements, {self.counters['removals']} removals, "
+                f"{self.counters['backtracks']} backtracks")
+
+    def __str__(self) -> str:
+        lines: list[str] = [self.summary()]
+        lines += [f"{phase}: {1000 * seconds:.2f} ms" for phase, seconds in self.timers.items() if phase != "total"]
+        lines += [f"{rule} checks: {count}" for rule, count in sorted(self.checks.items())]
+        return "\n".join(lines)
+
+
+# Depth first search over candidate bitmasks (bit n stands for symbol n) with an explicit stack, so it can be
+# continued after each solution. Placing a value removes it from the peers, cells left with one candidate and
+# symbols left with one cell in a unit are filled right away. Pruners of variant constraints (see text.Constraint)
+# run after that until nothing changes. The next cell to branch on is the one with the fewest candidates.
+class Search:
+    def __init__(self, units: Units, symbol_count: int, rng: Union[None, random.Random] = None,
+                 pruners: Union[None, list[Callable[[list[int], list[int]], Union[None, list[int]]]]] = None,
+                 stats: Union[None, SolverStats] = None) -> None:
+        self.__cell_count: int = units.get_cell_count()
+        self.__peers: list[tuple[int, ...]] = [units.get_peers(cell) for cell in range(self.__cell_count)]
+        self.__full: int = (1 << symbol_count) - 1
+        # only units with a square for every symbol have to contain each symbol
+        self.__full_units: list[tuple[int, ...]] = [unit for unit in units.get_units() if len(unit) == symbol_count]
+        # without rng the symbols are tried in order, with rng in random order
+        self.__rng: Union[None, random.Random] = rng
+        self.__pruners: list[Callable[[list[int], list[int]], Union[None, list[int]]]] = pruners or []
+
+        # frames of [values, masks, cell, candidates not tried yet]
+        self.__stack: list[list] = []
+        self.__found: Union[None, list[int]] = None
+        # candidates tried since start
+        self.__nodes: int = 0
+
+        self.__stats: Union[None, SolverStats] = stats
+        if stats is not None:
+            self.__instrument(units, stats)
+
+    def __instrument(self, units: Units, stats: SolverStats) -> None:
+        # swaps in counting versions of the hot methods, so a Search without stats runs the plain ones
+        unit_types: list[str] = units.get_unit_types()
+        self.__full_unit_types: list[str] = [unit_type for unit, unit_type in zip(units.get_units(), unit_types)
+                                             if len(unit) == self.__full.bit_length()]
+        self.__assign = self.__assign_counted
+        self.__propagate_units = self.__propagate_units_counted
+        propagate: Callable[[list[int], list[int]], bool] = self.__propagate
+        select: Callable[[list[int], list[int]], int] = self.__select
+
+        def timed_propagate(values: list[int], masks: list[int]) -> bool:
+            start_time: float = time.perf_counter()
+            result: bool = propagate(values, masks)
+            stats.timers["propagate"] += time.perf_counter() - start_time
+            return result
+
+        def timed_select(values: list[int], masks: list[int]) -> int:
+            start_time: float = time.perf_counter()
+            cell: int = select(values, masks)
+            stats.timers["select"] += time.perf_counter() - start_time
+            return cell
+
+        self.__propagate = timed_propagate
+        self.__select = timed_select
+        self.__pruners = [self.__counted_pruner(pruner, stats) for pruner in self.__pruners]
+
+    @staticmethod
+    def __counted_pruner(pruner: Callable[[list[int], list[int]], Union[None, list[int]]],
+                         stats: SolverStats) -> Callable[[list[int], list[int]], Union[None, list[int]]]:
+        # named after the constraint class, e.g. "KillerCage" for KillerCage.pruner.<locals>.prune
+        name: str = pruner.__qualname__.split(".")[0]
+
+        def counted(values: list[int], masks: list[int]) -> Union[None, list[int]]:
+            start_time: float = time.perf_counter()
+            before: int = sum(mask.bit_count() for mask in masks)
+            cells: Union[None, list[int]] = pruner(values, masks)
+            stats.counters["removals"] += before - sum(mask.bit_count() for mask in masks)
+            stats.checks[name] = stats.checks.get(name, 0) + 1
+            stats.timers["pruners"] += time.perf_counter() - start_time
+            return cells
+
+        return counted
+
+    def start(self, values: list[int]) -> bool:
+        # values[cell] is the symbol index or -1 for empty cells, False if the givens already contradict each other
+        start_time: float = time.perf_counter() if self.__stats is not None else 0.0
+        self.__stack = []
+        self.__found = None
+        self.__nodes = 0
+        own_values: list[int] = [-1] * self.__cell_count
+        masks: list[int] = [self.__full] * self.__cell_count
+        for cell, value in enumerate(values):
+            if value >= 0 and not self.__assign(own_values, masks, cell, value):
+                return False
+        self.__push(own_values, masks)
+        if self.__stats is not None:
+            self.__stats.timers["total"] += time.perf_counter() - start_time
+        return True
+
+    def __assign(self, values: list[int], masks: list[int], cell: int, value: int) -> bool:
+        pending: list[tuple[int, int]] = [(cell, value)]
+        while pending:
+            cell, value = pending.pop()
+            if values[cell] >= 0:
+                if values[cell] != value:
+                    return False
+                continue
+            bit: int = 1 << value
+            if not masks[cell] & bit:
+                return False
+            values[cell] = value
+            masks[cell] = 0
+            for peer in self.__peers[cell]:
+                mask: int = masks[peer]
+                if mask & bit:
+                    mask &= ~bit
+                    masks[peer] = mask
+                    if not mask:
+                        return False
+                    if not mask & (mask - 1):
+                        pending.append((peer, mask.bit_length() - 1))
+        return True
+
+    def __assign_counted(self, values: list[int], masks: list[int], cell: int, value: int) -> bool:
+        # __assign with placements and removals counted
+        counters: dict[str, int] = self.__stats.counters
+        pending: list[tuple[int, int]] = [(cell, value)]
+        while pending:
+            cell, value = pending.pop()
+            if values[cell] >= 0:
+                if values[cell] != value:
+                    return False
+                continue
+            bit: int = 1 << value
+            if not masks[cell] & bit:
+                return False
+            values[cell] = value
+            counters["placements"] += 1
+            counters["removals"] += masks[cell].bit_count() - 1
+            masks[cell] = 0
+            for peer in self.__peers[cell]:
+                mask: int = masks[peer]
+                if mask & bit:
+                    mask &= ~bit
+                    masks[peer] = mask
+                    counters["removals"] += 1
+                    if not mask:
+                        return False
+                    if not mask & (mask - 1):
+                        pending.append((peer, mask.bit_length() - 1))
+        return True
+
+    def __propagate(self, values: list[int], masks: list[int]) -> bool:
+        while True:
+            if not self.__propagate_units(values, masks):
+                return False
+            changed: bool = False
+            for pruner in self.__pruners:
+                cells: Union[None, list[int]] = pruner(values, masks)
+                if cells is None:
+                    return False
+                for cell in cells:
+                    changed = True
+                    mask: int = masks[cell]
+                    if values[cell] >= 0:
+                        continue
+                    if not mask:
+                        return False
+                    if not mask & (mask - 1):
+                        if not self.__assign(values, masks, cell, mask.bit_length() - 1):
+                            return False
+            if not changed:
+                return True
+
+    def __propagate_units(self, values: list[int], masks: list[int]) -> bool:
+        changed: bool = True
+        while changed:
+            changed = False
+            for unit in self.__full_units:
+                once: int = 0
+                twice: int = 0
+                placed: int = 0
+                for cell in unit:
+                    mask: int = masks[cell]
+                    twice |= once & mask
+                    once |= mask
+                    if values[cell] >= 0:
+                        placed |= 1 << values[cell]
+                if (once | placed) != self.__full:
+                    return False
+                singles: int = once & ~twice & ~placed
+                while singles:
+                    bit: int = singles & -singles
+                    singles &= singles - 1
+                    for cell in unit:
+                        if masks[cell] & bit:
+                            if not self.__assign(values, masks, cell, bit.bit_length() - 1):
+                                return False
+                            changed = True
+                            break
+        return True
+
+    def __propagate_units_counted(self, values: list[int], masks: list[int]) -> bool:
+        # __propagate_units with the scanned units counted per unit type
+        start_time: float = time.perf_counter()
+        checks: dict[str, int] = self.__stats.checks
+        result: bool = True
+        changed: bool = True
+        while changed and result:
+            changed = False
+            for unit, unit_type in zip(self.__full_units, self.__full_unit_types):
+                checks[unit_type] = checks.get(unit_type, 0) + 1
+                once: int = 0
+                twice: int = 0
+                placed: int = 0
+                for cell in unit:
+                    mask: int = masks[cell]
+                    twice |= once & mask
+                    once |= mask
+                    if values[cell] >= 0:
+                        placed |= 1 << values[cell]
+                if (once | placed) != self.__full:
+                    result = False
+                    break
+                singles: int = once & ~twice & ~placed
+                while singles and result:
+                    bit: int = singles & -singles
+                    singles &= singles - 1
+                    for cell in unit:
+                        if masks[cell] & bit:
+                            result = self.__assign(values, masks, cell, bit.bit_length() - 1)
+                            changed = True
+                            break
+                if not result:
+                    break
+        self.__stats.timers["units"] += time.perf_counter() - start_time
+        return result
+
+    def __select(self, values: list[int], masks: list[int]) -> int:
+        best: int = -1
+        best_count: int = 0
+        for cell, mask in enumerate(masks):
+            if values[cell] < 0:
+                count: int = mask.bit_count()
+                if best < 0 or count < best_count:
+                    best, best_count = cell, count
+                    if count <= 2:
+                        break
+        return best
+
+    def __push(self, values: list[int], masks: list[int]) -> None:
+        if not self.__propagate(values, masks):
+            return
+        cell: int = self.__select(values, masks)
+        if cell < 0:
+            self.__found = values
+        else:
+            self.__stack.append([values, masks, cell, masks[cell]])
+
+    def __pick(self, choices: int) -> int:
+        if self.__rng is None:
+            return choices & -choices
+        bits: list[int] = []
+        while choices:
+            bits.append(choices & -choices)
+            choices &= choices - 1
+        return self.__rng.choice(bits)
+
+    def get_nodes(self) -> int:
+        return self.__nodes
+
+    def get_frontier(self) -> list[list[int]]:
+        # the rest of the search as subproblems (values like start), searching them one after another gives the
+        # solutions next_solution would still return, in the same order if there's no rng
+        frontier: list[list[int]] = []
+        if self.__found is not None:
+            frontier.append(self.__found[:])
+        for values, _, cell, choices in reversed(self.__stack):
+            while choices:
+                bit: int = choices & -choices
+                choices &= choices - 1
+                subproblem: list[int] = values[:]
+                subproblem[cell] = bit.bit_length() - 1
+                frontier.append(subproblem)
+        return frontier
+
+    def is_finished(self) -> bool:
+        # True once every solution has been returned
+        return not self.__stack and self.__found is None
+
+    def next_solution(self, max_nodes: Union[None, int] = None) -> Union[None, list[int]]:
+        # None when there are no more solutions or after trying max_nodes candidates, see is_finished
+        if self.__stats is not None:
+            return self.__next_solution_counted(max_nodes)
+        nodes: int = 0
+        if self.__found is not None:
+            solution: list[int] = self.__found
+            self.__found = None
+            return solution
+        stack: list[list] = self.__stack
+        while stack:
+            if max_nodes is not None and nodes >= max_nodes:
+                return None
+            frame: list = stack[-1]
+            choices: int = frame[3]
+            if not choices:
+                stack.pop()
+                continue
+            bit: int = self.__pick(choices)
+            frame[3] = choices & ~bit
+            nodes += 1
+            self.__nodes += 1
+            if frame[3]:
+                values: list[int] = frame[0][:]
+                masks: list[int] = frame[1][:]
+            else:
+                # last candidate of the frame, its state can be reused
+                stack.pop()
+                values, masks = frame[0], frame[1]
+            if not self.__assign(values, masks, frame[2], bit.bit_length() - 1):
+                continue
+            self.__push(values, masks)
+            if self.__found is not None:
+                solution: list[int] = self.__found
+                self.__found = None
+                return solution
+        return None
+
+    def __next_solution_counted(self, max_nodes: Union[None, int] = None) -> Union[None, list[int]]:
+        # next_solution with nodes, backtracks, copies and progress reports
+        stats: SolverStats = self.__stats
+        start_time: float = time.perf_counter()
+        nodes: int = 0
+        solution: Union[None, list[int]] = None
+        if self.__found is not None:
+            solution = self.__found
+            self.__found = None
+        stack: list[list] = self.__stack
+        while stack and solution is None:
+            if max_nodes is not None and nodes >= max_nodes:
+                break
+            frame: list = stack[-1]
+            choices: int = frame[3]
+            if not choices:
+                stack.pop()
+                continue
+            bit: int = self.__pick(choices)
+            frame[3] = choices & ~bit
+            nodes += 1
+            self.__nodes += 1
+            stats.counters["nodes"] += 1
+            if stats.progress is not None and not stats.counters["nodes"] % stats.progress_interval:
+                stats.progress(stats)
+            if frame[3]:
+                copy_time: float = time.perf_counter()
+                values: list[int] = frame[0][:]
+                masks: list[int] = frame[1][:]
+                stats.timers["copy"] += time.perf_counter() - copy_time
+            else:
+                stack.pop()
+                values, masks = frame[0], frame[1]
+            assign_time: float = time.perf_counter()
+            assigned: bool = self.__assign(values, masks, frame[2], bit.bit_length() - 1)
+            stats.timers["assign"] += time.perf_counter() - assign_time
+            if not assigned:
+                stats.counters["backtracks"] += 1
+                continue
+            depth: int = len(stack)
+            self.__push(values, masks)
+            if self.__found is not None:
+                solution = self.__found
+                self.__found = None
+            elif len(stack) == depth:
+                # propagation failed, no frame was pushed
+                stats.counters["backtracks"] += 1
+        stats.timers["total"] += time.perf_counter() - start_time
+        return solution
+
+    def count(self, values: list[int], limit: int = 2, max_nodes: Union[None, int] = None) -> Union[None, int]:
+        # number of solutions, stops counting at limit, None if max_nodes candidates weren't enough to tell
+        if not self.start(values):
+            return 0
+        found: int = 0
+        while found < limit:
+            if self.next_solution(max_nodes=max_nodes) is None:
+                if not self.is_finished():
+                    return None
+                break
+            found += 1
+        return found
+
+
+# Where a search stopped, so it can go on later without redoing work (see Sudoku.solve_status). The status is "solved"
+# after a solution, "unsolvable" when there is no (further) solution and "budget exhausted" when max_nodes or timeout
+# ran out.
+class SearchPosition:
+    # nodes between checks of the timeout
+    NODES_PER_CHECK: int = 100
+
+    def __init__(self) -> None:
+        self.__search: Union[None, Search] = None
+        self.__status: str = "not started"
+        self.__seconds: float = 0.0
+
+    def start(self, search: Search, values: list[int]) -> None:
+        self.__search = search
+        self.__status = "unsolvable" if not search.start(values) else "started"
+        self.__seconds = 0.0
+
+    def is_started(self) -> bool:
+        return self.__search is not None
+
+    def next_solution(self, max_nodes: Union[None, int] = None,
+                      timeout: Union[None, float] = None) -> Union[None, list[int]]:
+        # goes on with the search for at most max_nodes more nodes and timeout more seconds
+        start_time: float = time.monotonic()
+        end_nodes: Union[None, int] = self.__search.get_nodes() + max_nodes if max_nodes is not None else None
+        solution: Union[None, list[int]] = None
+        while True:
+            nodes: Union[None, int] = end_nodes - self.__search.get_nodes() if end_nodes is not None else None
+            if timeout is not None:
+                nodes = min(nodes, self.NODES_PER_CHECK) if nodes is not None else self.NODES_PER_CHECK
+            solution = self.__search.next_solution(max_nodes=nodes)
+            if solution is not None:
+                self.__status = "solved"
+                break
+            if self.__search.is_finished():
+                self.__status = "unsolvable"
+                break
+            if (end_nodes is not None and self.__search.get_nodes() >= end_nodes) \
+                    or (timeout is not None and time.monotonic() - start_time >= timeout):
+                self.__status = "budget exhausted"
+                break
+        self.__seconds += time.monotonic() - start_time
+        return solution
+
+    def get_status(self) -> str:
+        return self.__status
+
+    def is_exhausted(self) -> bool:
+        return self.__status == "budget exhausted"
+
+    def get_nodes(self) -> int:
+        # nodes searched so far in all slices
+        return self.__search.get_nodes() if self.__search is not None else 0
+
+    def get_seconds(self) -> float:
+        return self.__seconds
+
+    def get_frontier(self) -> list[list[int]]:
+        # the rest of the search as subproblems, e.g. to hand it to other processes, see Search.get_frontier
+        return self.__search.get_frontier() if self.__search is not None else []
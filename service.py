@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from text import Sudoku, Constraint, KillerCage, Thermometer, AntiKnight, NonConsecutive, Pruner
+from search import Search
+from string_conversion import SudokuString
+from units import Units, standard_field_groups
+from alphabet import Alphabet
+from typing import Union
+
+
+# Local HTTP/JSON solving service. POST /solve with
+#   {"puzzles": [...], "notation": "standard", "to": "sudokustring", "width": 9, "height": 9, "symbols": "123456789",
+#    "rules": {"horizontal": true, "vertical": true, "boxes": true, "diagonals": false,
+#              "constraints": {"killer": "15:r1c1,r1c2", "thermometers": "r1c1,r1c2", "anti_knight": false,
+#                              "non_consecutive": false}},
+#    "timeout": 2.0}
+# answers {"solutions": [...], "status": [...], "seconds": ...} in the order of the puzzles, status is "solved",
+# "unsolvable", "timeout" or "invalid" (a puzzle of the wrong size or with other symbols than "symbols", empty squares
+# are "", "." or the smallest number that isn't a symbol, like "0"). "rules" and everything but "puzzles" are optional
+# ("puzzle" takes a single puzzle), boxes can also be a list of groups of [column, row] cells. GET /health reports the
+# load.
+NOTATIONS: tuple[str, ...] = ("standard", "sudokustring", "square")
+REASONS: dict[int, str] = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# per worker process: units, pruners and symbols by board settings, so repeated settings skip building them
+_worker_boards: dict[str, tuple[Units, list[Pruner], list[str]]] = {}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status: int = status
+
+
+def parse_rules(data: dict, sudoku_size: tuple[int, int]) -> dict[str, Union[bool, list]]:
+    # rules dict of Sudoku from the JSON rules of a request
+    boxes = data.get("boxes", True)
+    if boxes is True:
+        field_groups: Union[bool, list[list[tuple[int, int]]]] = standard_field_groups(sudoku_size)
+    elif not boxes:
+        field_groups = False
+    else:
+        field_groups = [[(int(i), int(j)) for i, j in group] for group in boxes]
+    rules: dict[str, Union[bool, list]] = {"horizontal": bool(data.get("horizontal", True)),
+                                           "vertical": bool(data.get("vertical", True)), "boxes": field_groups,
+                                           "diagonals": bool(data.get("diagonals", False))}
+    constraint_data: dict = data.get("constraints", None) or {}
+    constraints: list[Constraint] = []
+    if constraint_data.get("killer"):
+        constraints += KillerCage.parse(constraint_data["killer"])
+    if constraint_data.get("thermometers"):
+        constraints += Thermometer.parse(constraint_data["thermometers"])
+    if constraint_data.get("anti_knight"):
+        constraints.append(AntiKnight())
+    if constraint_data.get("non_consecutive"):
+        constraints.append(NonConsecutive())
+    if constraints:
+        rules["constraints"] = constraints
+    return rules
+
+
+def _init_worker() -> None:
+    # loads the solver and runs it once, so the first request doesn't pay for it
+    Sudoku(rules={"horizontal": True, "vertical": True, "boxes": True}).solve()
+
+
+def _get_board(settings: dict) -> tuple[Units, list[Pruner], Alphabet]:
+    key: str = json.dumps(settings, sort_keys=True)
+    if key not in _worker_boards:
+        sudoku_size: tuple[int, int] = (settings["width"], settings["height"])
+        sudoku: Sudoku = Sudoku(size=(sudoku_size[1], sudoku_size[0]),
+                                rules=parse_rules(settings["rules"], sudoku_size),
+                                all_symbols=list(settings["symbols"]))
+        _worker_boards[key] = sudoku.get_units(), sudoku.get_pruners(), sudoku.get_all_symbols()
+    return _worker_boards[key]
+
+
+def _solve_chunk(settings: dict, puzzles: list[str], deadline: float,
+                 nodes_per_check: int = 1000) -> list[tuple[str, Union[None, str]]]:
+    # (status, solution in SudokuString notation) per puzzle, the search gives up at deadline (time.time())
+    units, pruners, all_symbols = _get_board(settings)
+    symbol_index: dict[str, int] = all_symbols.get_symbol_index()
+    empty: set[str] = {"", ".", all_symbols.get_no_symbol()}
+    width: int = settings["width"]
+    results: list[tuple[str, Union[None, str]]] = []
+    for puzzle in puzzles:
+        items: list[str] = [item for row in puzzle.split("%") for item in row.split("&")]
+        values: list[int] = [symbol_index.get(item, -1) for item in items]
+        if len(values) != units.get_cell_count() \
+                or any(value < 0 and item not in empty for item, value in zip(items, values)):
+            results.append(("invalid", None))
+            continue
+        search: Search = Search(units, len(all_symbols), pruners=pruners)
+        solution: Union[None, list[int]] = None
+        status: str = "unsolvable"
+        if search.start(values):
+            while time.time() < deadline:
+                solution = search.next_solution(max_nodes=nodes_per_check)
+                if solution is not None:
+                    status = "solved"
+                    break
+                if search.is_finished():
+                    break
+            else:
+                status = "timeout"
+        if solution is None:
+            results.append((status, None))
+            continue
+        symbols: list[str] = [all_symbols[value] for value in solution]
+        results.append((status, "%".join("&".join(symbols[row:row + width])
+                                         for row in range(0, len(symbols), width))))
+    return results
+
+
+class SolvingService:
+    def __init__(self, processes: Union[None, int] = None, batch_size: int = 16, max_concurrent: int = 64,
+                 max_pending: int = 1024, default_timeout: float = 5.0, max_timeout: float = 60.0,
+                 max_body: int = 16 * 1024 * 1024) -> None:
+        # a request's puzzles go to the workers in chunks of batch_size. At most max_concurrent requests are solved
+        # at once, up to max_pending more wait for their turn and further requests are turned away with 503.
+        self.__processes: int = processes or os.cpu_count() or 1
+        self.__pool: ProcessPoolExecutor = ProcessPoolExecutor(self.__processes, initializer=_init_worker)
+        self.__batch_size: int = batch_size
+        self.__semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrent)
+        self.__max_concurrent: int = max_concurrent
+        self.__max_pending: int = max_pending
+        self.__default_timeout: float = default_timeout
+        self.__max_timeout: float = max_timeout
+        self.__max_body: int = max_body
+        # requests waiting for or holding the semaphore
+        self.__pending: int = 0
+        self.__stats: dict[str, int] = {"requests": 0, "puzzles": 0, "rejected": 0}
+
+    async def warm_up(self) -> None:
+        # starts every worker process now instead of on the first requests
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.__pool, _init_worker)
+                               for _ in range(self.__processes)))
+
+    def close(self) -> None:
+        self.__pool.shutdown(cancel_futures=True)
+
+    def get_health(self) -> dict:
+        return {"status": "ok", "processes": self.__processes, "pending": self.__pending,
+                "max_concurrent": self.__max_concurrent, **self.__stats}
+
+    async def solve(self, request: dict) -> dict:
+        if not isinstance(request, dict):
+            raise RequestError(400, "The request must be a JSON object")
+        puzzles = request.get("puzzles", [request["puzzle"]] if "puzzle" in request else None)
+        if not isinstance(puzzles, list) or not all(isinstance(puzzle, str) for puzzle in puzzles):
+            raise RequestError(400, 'Expected "puzzles": a list of strings')
+        notation: str = request.get("notation", "sudokustring")
+        to: str = request.get("to", notation)
+        if notation not in NOTATIONS or to not in NOTATIONS:
+            raise RequestError(400, f"Notations are {', '.join(NOTATIONS)}")
+        try:
+            width: int = int(request.get("width", 9))
+            height: int = int(request.get("height", 9))
+            timeout: float = min(float(request.get("timeout", self.__default_timeout)), self.__max_timeout)
+            if width < 1 or height < 1:
+                raise ValueError("The width and height must be positive")
+            symbols: str = str(request.get("symbols", "".join(str(i + 1) for i in range(max(width, height)))))
+            rules: dict = request.get("rules", None) or {}
+            # the board is built here as in the workers, so a bad request fails with 400 instead of in every worker
+            Sudoku(size=(height, width), rules=parse_rules(rules, (width, height)), all_symbols=list(symbols)) \
+                .get_pruners()
+            field_strings: list[str] = [SudokuString(notation=notation, string=puzzle, width=width)
+                                        .__str__("sudokustring") for puzzle in puzzles]
+        except (ValueError, TypeError, AttributeError, AssertionError, IndexError, KeyError) as error:
+            raise RequestError(400, str(error) or "Invalid puzzle or rules")
+        settings: dict = {"width": width, "height": height, "symbols": symbols, "rules": rules}
+
+        if self.__pending >= self.__max_concurrent + self.__max_pending:
+            self.__stats["rejected"] += 1
+            raise RequestError(503, "Too many requests")
+        self.__pending += 1
+        try:
+            async with self.__semaphore:
+                start_time: float = time.time()
+                # the time budget starts once the request may use the workers
+                deadline: float = start_time + timeout
+                loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+                try:
+                    chunks: list[list[tuple[str, Union[None, str]]]] = await asyncio.gather(*(
+                        loop.run_in_executor(self.__pool, _solve_chunk, settings,
+                                             field_strings[n:n + self.__batch_size], deadline)
+                        for n in range(0, len(field_strings), self.__batch_size)))
+                except Exception as error:
+                    # a worker failed (or died), the request still gets an answer
+                    raise RequestError(500, f"Solving failed: {error}")
+        finally:
+            self.__pending -= 1
+        self.__stats["requests"] += 1
+        self.__stats["puzzles"] += len(puzzles)
+        results: list[tuple[str, Union[None, str]]] = [result for chunk in chunks for result in chunk]
+        return {"status": [status for status, _ in results],
+                "solutions": [SudokuString(notation="sudokustring", string=solution, width=width).__str__(to)
+                              if solution is not None else None for _, solution in results],
+                "seconds": time.time() - start_time}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 with keep-alive, one request at a time per connection
+        try:
+            while True:
+                request_line: bytes = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers: dict[str, str] = {}
+                while True:
+                    line: bytes = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive: bool = (headers.get("connection", "").lower() != "close"
+                                    and version.upper() != "HTTP/1.0")
+                try:
+                    length: int = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.__respond(writer, 400, {"error": "Invalid Content-Length"}, False)
+                    break
+                if length > self.__max_body:
+                    await self.__respond(writer, 413, {"error": "Request body too large"}, False)
+                    break
+                body: bytes = await reader.readexactly(length) if length else b""
+                status, response = await self.__route(method, path, body)
+                await self.__respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __route(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        try:
+            if path == "/health":
+                return 200, self.get_health()
+            if path != "/solve":
+                raise RequestError(404, f"Unknown path {path}")
+            if method != "POST":
+                raise RequestError(405, "Use POST")
+            try:
+                request = json.loads(body)
+            except (json.JSONDecodeError, UnicodeDecodeError) as error:
+                raise RequestError(400, f"Invalid JSON: {error}")
+            return 200, await self.solve(request)
+        except RequestError as error:
+            return error.status, {"error": str(error)}
+
+    @staticmethod
+    async def __respond(writer: asyncio.StreamWriter, status: int, response: dict, keep_alive: bool) -> None:
+        body: bytes = json.dumps(response).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                     .encode() + body)
+        await writer.drain()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, **service_options) -> None:
+    service: SolvingService = SolvingService(**service_options)
+    await service.warm_up()
+    server: asyncio.Server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Solving on http://{host}:{port}/solve", flush=True)
+    # stops on SIGTERM as well, so the worker processes are shut down with the service
+    stop: asyncio.Event = asyncio.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal_number, stop.set)
+        except NotImplementedError:
+            # Windows, Ctrl+C still raises KeyboardInterrupt
+            pass
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve puzzle solving over HTTP/JSON on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=16, help="puzzles per worker task")
+    parser.add_argument("--max-concurrent", type=int, default=64, help="requests solved at the same time")
+    parser.add_argument("--max-pending", type=int, default=1024, help="requests waiting before 503")
+    parser.add_argument("--timeout", type=float, default=5.0, help="default time budget per request in seconds")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, processes=args.processes, batch_size=args.batch_size,
+                          max_concurrent=args.max_concurrent, max_pending=args.max_pending,
+                          default_timeout=args.timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
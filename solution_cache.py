@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+from functools import lru_cache
+from collections import OrderedDict
+from text import Sudoku
+from search import SolverStats
+from units import box_field_groups
+from alphabet import Alphabet
+from typing import Callable, Union
+
+
+# default store of SudokuWindow
+DEFAULT_CACHE_FILENAME: str = os.path.join(os.path.expanduser("~"), ".sudoku_solutions.sqlite")
+
+_STANDARD_BOXES: tuple[tuple[tuple[int, int], ...], ...] = tuple(map(tuple, box_field_groups((9, 9), (3, 3))))
+
+
+def rules_key(rules: dict[str, Union[None, bool, list]], sudoku_size: tuple[int, int]) -> str:
+    # equal for rules that give the same units and constraints (see Units), e.g. boxes=True and the 3x3 groups.
+    # Remembered by a tuple of the rules, which is much cheaper to build and hash than sorting the groups again.
+    boxes = rules.get("boxes", None)
+    return _normalized_rules((sudoku_size, bool(rules.get("horizontal", False)), bool(rules.get("vertical", False)),
+                              bool(rules.get("diagonals", False)),
+                              tuple(map(tuple, boxes)) if type(boxes) == list else boxes is True,
+                              tuple(map(repr, rules.get("constraints", None) or []))))
+
+
+@lru_cache(maxsize=1024)
+def _normalized_rules(fingerprint: tuple) -> str:
+    # bounded, rules with their own constraints per puzzle (e.g. killer cages) would fill an unbounded memo
+    sudoku_size, horizontal, vertical, diagonals, boxes, constraints = fingerprint
+    if boxes is True and sudoku_size == (9, 9):
+        boxes = _STANDARD_BOXES
+    groups: list[tuple[tuple[int, int], ...]] = sorted(tuple(sorted(group)) for group in boxes) \
+        if type(boxes) == tuple else []
+    return repr((horizontal, vertical, diagonals and sudoku_size[0] == sudoku_size[1], groups, sorted(constraints)))
+
+
+def puzzle_key(values: list[int], sudoku_size: tuple[int, int], all_symbols: Alphabet,
+               rules: dict[str, Union[None, bool, list]]) -> str:
+    # digest of the normalized standard notation (empty cells are ".") with size, symbols and rules
+    standard: str = all_symbols.to_compact(values)
+    text: str = "|".join((f"{sudoku_size[0]}x{sudoku_size[1]}", ",".join(all_symbols), rules_key(rules, sudoku_size),
+                          standard))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+# Solutions by puzzle key, the last max_entries in memory and all of them in an SQLite file (None keeps them in memory
+# only). Puzzles without solution are cached as None. Writes to the file are committed every commit_every entries
+# and by flush and close.
+class SolutionCache:
+    def __init__(self, filename: Union[None, str] = DEFAULT_CACHE_FILENAME, max_entries: int = 10000,
+                 commit_every: int = 64) -> None:
+        self.__filename: Union[None, str] = filename
+        self.__max_entries: int = max_entries
+        self.__commit_every: int = commit_every
+        self.__entries: OrderedDict[str, Union[None, list[int]]] = OrderedDict()
+        # opened on first use
+        self.__connection: Union[None, sqlite3.Connection] = None
+        self.__uncommitted: int = 0
+        self.__stats: dict[str, int] = {"hits": 0, "disk hits": 0, "misses": 0}
+
+    def __get_connection(self) -> Union[None, sqlite3.Connection]:
+        if self.__connection is None and self.__filename is not None:
+            self.__connection = sqlite3.connect(self.__filename)
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, solution TEXT)")
+        return self.__connection
+
+    def get_stats(self) -> dict[str, int]:
+        # hits counts memory and disk hits
+        return dict(self.__stats)
+
+    def key(self, sudoku: Sudoku) -> str:
+        return puzzle_key(sudoku.get_values(), sudoku.get_size(), sudoku.get_all_symbols(), sudoku.get_rules())
+
+    def get(self, key: str) -> tuple[bool, Union[None, list[int]]]:
+        # (found, solution values), the solution is None for cached puzzles without solution
+        if key in self.__entries:
+            self.__entries.move_to_end(key)
+            self.__stats["hits"] += 1
+            return True, self.__entries[key]
+        connection: Union[None, sqlite3.Connection] = self.__get_connection()
+        row: Union[None, tuple[str]] = connection.execute("SELECT solution FROM solutions WHERE key = ?",
+                                                          (key,)).fetchone() if connection is not None else None
+        if row is None:
+            self.__stats["misses"] += 1
+            return False, None
+        self.__stats["hits"] += 1
+        self.__stats["disk hits"] += 1
+        solution: Union[None, list[int]] = [int(value) for value in row[0].split()] if row[0] else None
+        self.__remember(key, solution)
+        return True, solution
+
+    def put(self, key: str, solution: Union[None, list[int]]) -> None:
+        self.__remember(key, solution)
+        connection: Union[None, sqlite3.Connection] = self.__get_connection()
+        if connection is None:
+            return
+        connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)",
+                           (key, " ".join(map(str, solution)) if solution is not None else ""))
+        self.__uncommitted += 1
+        if self.__uncommitted >= self.__commit_every:
+            self.flush()
+
+    def __remember(self, key: str, solution: Union[None, list[int]]) -> None:
+        self.__entries[key] = solution
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+    def solve(self, sudoku: Sudoku, stats: Union[None, SolverStats] = None,
+              solve_status: Union[None, Callable[[Sudoku], str]] = None) -> str:
+        # Sudoku.solve_status, or solve_status (e.g. Portfolio.solve_status), through the cache. Only "solved" and
+        # "unsolvable" are cached, other statuses (e.g. "budget exhausted") are returned as they are.
+        key: str = self.key(sudoku)
+        found, solution = self.get(key)
+        if not found:
+            status: str = sudoku.solve_status(stats=stats) if solve_status is None else solve_status(sudoku)
+            if status not in ("solved", "unsolvable"):
+                return status
+            solution = sudoku.get_values() if status == "solved" else None
+            self.put(key, solution)
+        elif solution is not None:
+            sudoku.set_values(solution)
+        return "solved" if solution is not None else "unsolvable"
+
+    def flush(self) -> None:
+        if self.__connection is not None and self.__uncommitted:
+            self.__connection.commit()
+            self.__uncommitted = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
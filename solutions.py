@@ -0,0 +1,150 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from alphabet import Alphabet
+from text import Sudoku
+from search import Search
+from string_conversion import SudokuString
+from units import add_board_arguments, board_from_arguments
+from typing import Iterator, Union
+
+
+# All solutions of a puzzle as compact strings (see Alphabet.to_compact), in the order of a single search without rng.
+# The search tree is split into subproblems a few levels deep, workers search them with a budget of solutions and
+# nodes and send back the found solutions with the rest of their subtree as new subproblems (Search.get_frontier).
+# The parent keeps the subproblems in search order and a fixed number of them in the pool, so memory stays bounded by
+# that number times the budget however many solutions there are.
+
+# per worker process: units, pruners and symbols of the board and the budget of one task, see _get_settings
+_worker_settings: dict = {}
+
+
+def _get_settings(sudoku_size: tuple[int, int], rules: dict[str, Union[bool, list[list[tuple[int, int]]]]],
+                  all_symbols: list[str], max_solutions: int, max_nodes: int) -> dict:
+    sudoku: Sudoku = Sudoku(size=(sudoku_size[1], sudoku_size[0]), rules=rules, all_symbols=all_symbols)
+    return {"units": sudoku.get_units(), "pruners": sudoku.get_pruners(), "all_symbols": sudoku.get_all_symbols(),
+            "max_solutions": max_solutions, "max_nodes": max_nodes}
+
+
+def _init_worker(sudoku_size: tuple[int, int], rules: dict[str, Union[bool, list[list[tuple[int, int]]]]],
+                 all_symbols: list[str], max_solutions: int, max_nodes: int) -> None:
+    global _worker_settings
+    _worker_settings = _get_settings(sudoku_size, rules, all_symbols, max_solutions, max_nodes)
+
+
+def _new_search(settings: dict) -> Search:
+    return Search(settings["units"], len(settings["all_symbols"]), pruners=settings["pruners"])
+
+
+def _search_subproblem(values: list[int], settings: Union[None, dict] = None) -> tuple[list[str], list[list[int]]]:
+    # (solutions, the unsearched rest of the subtree) within the budget, with the settings of _init_worker in workers
+    if settings is None:
+        settings = _worker_settings
+    search: Search = _new_search(settings)
+    all_symbols: Alphabet = settings["all_symbols"]
+    solutions: list[str] = []
+    if not search.start(values):
+        return solutions, []
+    nodes: int = 0
+    while len(solutions) < settings["max_solutions"] and nodes < settings["max_nodes"]:
+        solution: Union[None, list[int]] = search.next_solution(max_nodes=settings["max_nodes"] - nodes)
+        nodes = search.get_nodes()
+        if solution is None:
+            if search.is_finished():
+                return solutions, []
+            break
+        solutions.append(all_symbols.to_compact(solution))
+    return solutions, search.get_frontier()
+
+
+def split(values: list[int], depth: int, settings: dict) -> list[list[int]]:
+    # subproblems after depth branching cells, in search order (settings from _get_settings)
+    subproblems: list[list[int]] = [values]
+    search: Search = _new_search(settings)
+    for _ in range(depth):
+        branches: list[list[int]] = []
+        for subproblem in subproblems:
+            if search.start(subproblem):
+                branches += search.get_frontier()
+        subproblems = branches
+    return subproblems
+
+
+def iter_solutions(sudoku: Sudoku, processes: Union[None, int] = None, split_depth: int = 2,
+                   max_solutions: int = 1000, max_nodes: int = 20000,
+                   tasks_per_process: int = 2) -> Iterator[str]:
+    # processes=1 searches in this process, at most processes * tasks_per_process tasks are in the pool at once
+    arguments: tuple = (sudoku.get_size(), sudoku.get_rules(), list(sudoku.get_all_symbols()), max_solutions,
+                        max_nodes)
+    # the split and processes=1 use their own settings, the worker settings of this process stay untouched
+    settings: dict = _get_settings(*arguments)
+    # [subproblem, its task once it is in the pool (AsyncResult)] in search order
+    entries: deque[list] = deque([subproblem, None] for subproblem in split(sudoku.get_values(), split_depth,
+                                                                             settings))
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    pool: Union[None, multiprocessing.pool.Pool] = multiprocessing.Pool(processes, initializer=_init_worker,
+                                                                        initargs=arguments) \
+        if processes > 1 else None
+    try:
+        while entries:
+            if pool is not None:
+                running: int = 0
+                for entry in entries:
+                    if running >= processes * tasks_per_process:
+                        break
+                    if entry[1] is None:
+                        entry[1] = pool.apply_async(_search_subproblem, (entry[0],))
+                    running += 1
+            subproblem, task = entries.popleft()
+            solutions, rest = task.get() if task is not None else _search_subproblem(subproblem, settings)
+            # the rest of the subtree comes before the following subproblems
+            entries.extendleft([values, None] for values in reversed(rest))
+            yield from solutions
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write every solution of a puzzle, one compact string per line.")
+    parser.add_argument("puzzle", help="the puzzle in --notation, or a file with the puzzle as first line")
+    parser.add_argument("--out", default=None, help="file for the solutions, default stdout")
+    parser.add_argument("--notation", default="standard", choices=["standard", "sudokustring"])
+    add_board_arguments(parser)
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many solutions")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--split-depth", type=int, default=2)
+    args = parser.parse_args()
+
+    sudoku_size, rules, all_symbols = board_from_arguments(args)
+    puzzle: str = args.puzzle
+    if os.path.isfile(puzzle):
+        with open(puzzle, "r") as f:
+            puzzle = f.readline().strip()
+    field_string: str = SudokuString(notation=args.notation, string=puzzle, width=args.width).__str__("sudokustring")
+    sudoku: Sudoku = Sudoku(size=(args.height, args.width), field_string=field_string, rules=rules,
+                            all_symbols=all_symbols)
+
+    start_time: float = time.time()
+    found: int = 0
+    f = open(args.out, "w") if args.out is not None else sys.stdout
+    try:
+        for solution in iter_solutions(sudoku, processes=args.processes, split_depth=args.split_depth):
+            f.write(solution + "\n")
+            found += 1
+            if found == args.limit:
+                break
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    end_time: float = time.time()
+    print(f"{found} solutions in {end_time - start_time} seconds "
+          f"({found / max(end_time - start_time, 1e-9):.1f} solutions per second)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Runs in the child process: imports ui like main.py does and reports the time of the first frame on stdout
+CHILD_CODE: str = """
+import time
+import ui
+import pygame
+
+update = pygame.display.update
+
+
+def first_update(*args):
+    update(*args)
+    print(time.time(), flush=True)
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    pygame.display.update = update
+
+
+pygame.display.update = first_update
+win = ui.SudokuWindow()
+win.run()
+ui.SudokuWindow.quit()
+"""
+
+
+def measure_startup(dummy: bool = False) -> float:
+    # seconds from launching the process to the end of the first display.update
+    env: dict[str, str] = dict(os.environ)
+    if dummy:
+        env["SDL_VIDEODRIVER"] = "dummy"
+        env["SDL_AUDIODRIVER"] = "dummy"
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    start_time: float = time.time()
+    output: str = subprocess.run([sys.executable, "-c", CHILD_CODE], capture_output=True, text=True, env=env,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    return float(output.split()[-1]) - start_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the time from process launch to the first frame.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--dummy", action="store_true", help="use the dummy video driver, e.g. without a display")
+    args = parser.parse_args()
+
+    times: list[float] = [measure_startup(args.dummy) for _ in range(args.runs)]
+    print(f"Startup to first frame over {args.runs} runs: min {1000 * min(times):.1f} ms, "
+          f"median {1000 * statistics.median(times):.1f} ms, max {1000 * max(times):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-from typing import Union
+from typing import Iterable, Iterator, Union
 
 
 class SudokuString:
     def __init__(self, notation: str="sudokustring", filename: Union[None, str] = None,
-                 string: Union[None, str] = None) -> None:
+                 string: Union[None, str] = None, width: int = 9) -> None:
+        self.__width: int = width
         self.__standard: Union[None, str] = None
         self.__sudokustring: Union[None, str] = None
         self.__square: Union[None, str] = None
@@ -42,7 +43,6 @@ class SudokuString:
         strings: list[str] = []
         for row in field:
             strings.append("".join(row))
-        strings[-1] = strings[-1][:-1]
         self.__standard = "".join(strings)
         return self.__standard
 
@@ -52,7 +52,7 @@ class SudokuString:
 
     def __standard_to_sudokustring(self) -> str:
         string = ""
-        for line in [self.__standard[i:i + 9] for i in range(0, len(self.__standard), 9)]:
+        for line in [self.__standard[i:i + self.__width] for i in range(0, len(self.__standard), self.__width)]:
             line = line.rstrip()
             for char in line:
                 string += char + "&"
@@ -73,7 +73,8 @@ class SudokuString:
         return self.__sudokustring
 
     def __standard_to_square(self) -> str:
-        self.__square = "\n".join([self.__standard[i:i + 9] for i in range(0, len(self.__standard), 9)])
+        self.__square = "\n".join([self.__standard[i:i + self.__width]
+                                   for i in range(0, len(self.__standard), self.__width)])
         return self.__square
 
     def __sudokustring_to_square(self) -> str:
@@ -119,6 +120,32 @@ class SudokuString:
             return self.__square
 
 
+def read_puzzles(filename: str, notation: str = "sudokustring", width: int = 9) -> Iterator[SudokuString]:
+    with open(filename, "r") as f:
+        yield from read_puzzle_stream(f, notation=notation, width=width)
+
+
+def read_puzzle_stream(f: Iterable[str], notation: str = "sudokustring", width: int = 9) -> Iterator[SudokuString]:
+    # one puzzle per line, square notation uses blank lines between puzzles. Puzzles are yielded as soon as they are
+    # complete, so f can be a pipe
+    if notation == "square":
+        lines: list[str] = []
+        for line in f:
+            line = line.rstrip()
+            if line:
+                lines.append(line)
+            elif lines:
+                yield SudokuString(notation=notation, string="\n".join(lines), width=width)
+                lines = []
+        if lines:
+            yield SudokuString(notation=notation, string="\n".join(lines), width=width)
+    else:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield SudokuString(notation=notation, string=line, width=width)
+
+
 def main():
     EXAMPLE_FIELD_STRING = "5&3&0_1_2_3&0_4_5_6&7&0_7_8_9&0&0&0%6&0&0&1&9&5&0&0&0%0&9&8&0&0&0&0&6&0%8&0&0&0&6&0&0&0&3" \
                            "%4&0&0&8&0&3&0&0&1%7&0&0&0&2&0&0&0&6%0&6&0&0&0&0&2&8&0%0&0&0&4&1&9&0&0&5%0&0&0&0&8&0&0&7&9"
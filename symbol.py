@@ -1,12 +1,14 @@
+from alphabet import Alphabet, get_alphabet
 from typing import Union
 
 
 class SudokuSymbol:
-    def __init__(self, all_symbols: Union[list[int], list[str]], symbol: str, locked: bool = False) -> None:
+    def __init__(self, all_symbols: Union[Alphabet, list[int], list[str]], symbol: str, locked: bool = False) -> None:
         self.__symbol: str = ""
         self.__notes: list[str] = []
         self.__locked: bool = False
-        self.__all_symbols: list[str] = [str(symbol) for symbol in all_symbols if symbol != ""]
+        # shared by all cells of the board
+        self.__all_symbols: Alphabet = get_alphabet(all_symbols)
 
         self.set_value(symbol)
 
@@ -61,6 +63,9 @@ class SudokuSymbol:
     def get_notes(self):
         return self.__notes
 
+    def get_value(self) -> str:
+        return self.__symbol
+
     def is_empty(self):
         return True if self.__symbol == "" else False
 
@@ -1,17 +1,249 @@
 from symbol import SudokuSymbol
+from alphabet import Alphabet, get_alphabet
+from units import Units
+from search import Search, SolverStats, SearchPosition
+import random
+import re
+from itertools import combinations
 import time
-from typing import Union
+from typing import Callable, Iterator, Union
 
 EXAMPLE_FIELD_STRING = "5&3&0_1_2_3&0_4_5_6&7&0_7_8_9&0&0&0%6&0&0&1&9&5&0&0&0%0&9&8&0&0&0&0&6&0%8&0&0&0&6&0&0&0&3%4&0" \
                        "&0&8&0&3&0&0&1%7&0&0&0&2&0&0&0&6%0&6&0&0&0&0&2&8&0%0&0&0&4&1&9&0&0&5%0&0&0&0&8&0&0&7&9"
 STANDARD_RULES = {"horizontal": True, "vertical": True, "boxes": False}
 
+# prunes the candidate bitmasks of a board in place, returns the changed cells or None if the board is contradictory
+Pruner = Callable[[list[int], list[int]], Union[None, list[int]]]
+# CNF variable of (cell, symbol index), and a new auxiliary variable
+Variable = Callable[[int, int], int]
+NewVariable = Callable[[], int]
+
+
+def parse_cells(text: str) -> list[tuple[int, int]]:
+    # "r1c1,r1c2" -> [(0, 0), (1, 0)], cells as (column, row) like field groups
+    return [(int(column) - 1, int(row) - 1) for row, column in re.findall(r"r(\d+)\s*c(\d+)", text.lower())]
+
+
+def symbol_numbers(all_symbols: Alphabet) -> list[int]:
+    try:
+        return [int(symbol) for symbol in all_symbols]
+    except ValueError:
+        raise ValueError("This constraint needs numeric symbols")
+
+
+# Variant rule besides the unit rules, listed in rules["constraints"]. get_groups adds cells that must differ as
+# units (so conflicts, candidates and hints know them), pruner removes candidates the groups can't express and cnf
+# gives the same rule as clauses for the SAT encoding (see sat.py).
+class Constraint:
+    def get_groups(self, sudoku_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+        return []
+
+    def pruner(self, units: Units, all_symbols: Alphabet) -> Union[None, Pruner]:
+        return None
+
+    def cnf(self, units: Units, all_symbols: Alphabet, variable: Variable,
+            new_variable: NewVariable) -> list[list[int]]:
+        return []
+
+    def __repr__(self) -> str:
+        # equal for equal rules, e.g. part of the solution cache key
+        return f"{type(self).__name__}()"
+
+
+class KillerCage(Constraint):
+    def __init__(self, total: int, cells: list[tuple[int, int]]) -> None:
+        self.__total: int = total
+        self.__cells: list[tuple[int, int]] = cells
+
+    def __repr__(self) -> str:
+        return f"KillerCage({self.__total}, {sorted(self.__cells)})"
+
+    @staticmethod
+    def parse(text: str) -> list["KillerCage"]:
+        # "15:r1c1,r1c2;7:r2c1,r3c1"
+        return [KillerCage(int(total), parse_cells(cells)) for total, cells in
+                (cage.split(":", 1) for cage in text.split(";") if ":" in cage)]
+
+    def get_groups(self, sudoku_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+        return [self.__cells]
+
+    def pruner(self, units: Units, all_symbols: Alphabet) -> Union[None, Pruner]:
+        numbers: list[int] = symbol_numbers(all_symbols)
+        cells: list[int] = [units.index(i, j) for i, j in self.__cells]
+        total: int = self.__total
+
+        def prune(values: list[int], masks: list[int]) -> Union[None, list[int]]:
+            # every empty cell keeps the numbers the other cells can still complete to the total
+            rest: int = total
+            empty: list[int] = []
+            for cell in cells:
+                if values[cell] >= 0:
+                    rest -= numbers[values[cell]]
+                else:
+                    empty.append(cell)
+            if not empty:
+                return [] if rest == 0 else None
+            lows: list[int] = [min(number for n, number in enumerate(numbers) if masks[cell] >> n & 1)
+                               for cell in empty]
+            highs: list[int] = [max(number for n, number in enumerate(numbers) if masks[cell] >> n & 1)
+                                for cell in empty]
+            low_sum: int = sum(lows)
+            high_sum: int = sum(highs)
+            if not low_sum <= rest <= high_sum:
+                return None
+            changed: list[int] = []
+            for cell, low, high in zip(empty, lows, highs):
+                smallest: int = rest - (high_sum - high)
+                largest: int = rest - (low_sum - low)
+                mask: int = masks[cell]
+                for n, number in enumerate(numbers):
+                    if mask >> n & 1 and not smallest <= number <= largest:
+                        mask &= ~(1 << n)
+                if mask != masks[cell]:
+                    if not mask:
+                        return None
+                    masks[cell] = mask
+                    changed.append(cell)
+            return changed
+
+        return prune
+
+    def cnf(self, units: Units, all_symbols: Alphabet, variable: Variable,
+            new_variable: NewVariable) -> list[list[int]]:
+        # the cells differ, so they hold one of the symbol sets with the right sum: one variable per set
+        numbers: list[int] = symbol_numbers(all_symbols)
+        cells: list[int] = [units.index(i, j) for i, j in self.__cells]
+        clauses: list[list[int]] = []
+        choices: list[int] = []
+        for symbols in combinations(range(len(numbers)), len(cells)):
+            if sum(numbers[n] for n in symbols) != self.__total:
+                continue
+            choice: int = new_variable()
+            choices.append(choice)
+            for cell in cells:
+                clauses.append([-choice] + [variable(cell, n) for n in symbols])
+        clauses.append(choices)
+        return clauses
+
+
+class Thermometer(Constraint):
+    def __init__(self, cells: list[tuple[int, int]]) -> None:
+        # from the bulb to the tip, the numbers strictly increase
+        self.__cells: list[tuple[int, int]] = cells
+
+    def __repr__(self) -> str:
+        return f"Thermometer({self.__cells})"
+
+    @staticmethod
+    def parse(text: str) -> list["Thermometer"]:
+        # "r1c1,r1c2,r1c3;r5c5,r4c5"
+        return [Thermometer(parse_cells(cells)) for cells in text.split(";") if parse_cells(cells)]
+
+    def get_groups(self, sudoku_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+        return [self.__cells]
+
+    def pruner(self, units: Units, all_symbols: Alphabet) -> Union[None, Pruner]:
+        numbers: list[int] = symbol_numbers(all_symbols)
+        cells: list[int] = [units.index(i, j) for i, j in self.__cells]
+
+        def prune(values: list[int], masks: list[int]) -> Union[None, list[int]]:
+            changed: set[int] = set()
+            # every cell above the smallest possible number before it, then below the largest possible after it
+            for path, rising in ((cells, True), (cells[::-1], False)):
+                bound: Union[None, int] = None
+                for cell in path:
+                    if values[cell] >= 0:
+                        number: int = numbers[values[cell]]
+                        if bound is not None and (number <= bound if rising else number >= bound):
+                            return None
+                        bound = number
+                        continue
+                    mask: int = masks[cell]
+                    if bound is not None:
+                        for n, number in enumerate(numbers):
+                            if mask >> n & 1 and (number <= bound if rising else number >= bound):
+                                mask &= ~(1 << n)
+                        if not mask:
+                            return None
+                        if mask != masks[cell]:
+                            masks[cell] = mask
+                            changed.add(cell)
+                    possible: list[int] = [number for n, number in enumerate(numbers) if mask >> n & 1]
+                    bound = min(possible) if rising else max(possible)
+            return list(changed)
+
+        return prune
+
+    def cnf(self, units: Units, all_symbols: Alphabet, variable: Variable,
+            new_variable: NewVariable) -> list[list[int]]:
+        numbers: list[int] = symbol_numbers(all_symbols)
+        cells: list[int] = [units.index(i, j) for i, j in self.__cells]
+        return [[-variable(lower, m), -variable(higher, n)] for lower, higher in zip(cells, cells[1:])
+                for m in range(len(numbers)) for n in range(len(numbers)) if numbers[n] <= numbers[m]]
+
+
+class AntiKnight(Constraint):
+    # cells a chess knight's move apart differ
+    def get_groups(self, sudoku_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+        groups: list[list[tuple[int, int]]] = []
+        for j in range(sudoku_size[1]):
+            for i in range(sudoku_size[0]):
+                for di, dj in ((1, 2), (2, 1), (2, -1), (1, -2)):
+                    if 0 <= i + di < sudoku_size[0] and 0 <= j + dj < sudoku_size[1]:
+                        groups.append([(i, j), (i + di, j + dj)])
+        return groups
+
+
+class NonConsecutive(Constraint):
+    # orthogonally adjacent cells don't hold consecutive numbers
+    def pruner(self, units: Units, all_symbols: Alphabet) -> Union[None, Pruner]:
+        numbers: list[int] = symbol_numbers(all_symbols)
+        width, height = units.get_size()
+        neighbours: list[list[int]] = [[units.index(i + di, j + dj) for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                                        if 0 <= i + di < width and 0 <= j + dj < height]
+                                       for cell in range(units.get_cell_count()) for i, j in [units.position(cell)]]
+        # symbols that can't stand next to each symbol
+        forbidden: list[int] = [sum(1 << m for m, other in enumerate(numbers) if abs(other - number) == 1)
+                                for number in numbers]
+
+        def prune(values: list[int], masks: list[int]) -> Union[None, list[int]]:
+            changed: list[int] = []
+            for cell, value in enumerate(values):
+                if value < 0:
+                    continue
+                for neighbour in neighbours[cell]:
+                    if values[neighbour] >= 0:
+                        if forbidden[value] >> values[neighbour] & 1:
+                            return None
+                    elif masks[neighbour] & forbidden[value]:
+                        masks[neighbour] &= ~forbidden[value]
+                        if not masks[neighbour]:
+                            return None
+                        changed.append(neighbour)
+            return changed
+
+        return prune
+
+    def cnf(self, units: Units, all_symbols: Alphabet, variable: Variable,
+            new_variable: NewVariable) -> list[list[int]]:
+        numbers: list[int] = symbol_numbers(all_symbols)
+        width, height = units.get_size()
+        clauses: list[list[int]] = []
+        for j in range(height):
+            for i in range(width):
+                for other in ((i + 1, j), (i, j + 1)):
+                    if other[0] < width and other[1] < height:
+                        clauses += [[-variable(units.index(i, j), m), -variable(units.index(*other), n)]
+                                    for m in range(len(numbers)) for n in range(len(numbers))
+                                    if abs(numbers[m] - numbers[n]) == 1]
+        return clauses
+
 
 class Sudoku:
     def __init__(self, size: Union[int, list[int], tuple[int, int]] = (9, 9), field_string: Union[None, str] = None,
                  field: Union[None, list[list[SudokuSymbol]]] = None,
                  rules: dict[str, Union[bool, list[list[tuple[int, int]]]]] = STANDARD_RULES,
-                 all_symbols: Union[list[int], list[str]] = None) -> None:
+                 all_symbols: Union[None, Alphabet, list[int], list[str]] = None) -> None:
         try:
             size: int = int(size)
             self.__rows: int = size
@@ -25,11 +257,8 @@ class Sudoku:
 
         if all_symbols is None:
             all_symbols = range(1, max(self.__rows, self.__cols) + 1)
-        self.__all_symbols: list[str] = [str(symbol) for symbol in all_symbols]
-        i = 0
-        while str(i) in self.__all_symbols:
-            i += 1
-        self.__no_symbol: str = str(i)
+        self.__all_symbols: Alphabet = get_alphabet(all_symbols)
+        self.__no_symbol: str = self.__all_symbols.get_no_symbol()
 
         if field is not None:
             self.__field = field
@@ -42,6 +271,7 @@ class Sudoku:
                 self.__set_empty()
 
         self.__rules = rules
+        self.__units: Union[None, Units] = None
 
     def __set_empty(self):
         self.__field = [[SudokuSymbol(self.__all_symbols, self.__no_symbol) for _ in range(self.__cols)]
@@ -61,85 +291,88 @@ class Sudoku:
             field_cols.append(field_rows[i].split("&"))
         self.__field = [[SudokuSymbol(self.__all_symbols, field_cols[i][j])
                          for j in range(self.__cols)] for i in range(self.__rows)]
-        print(self.__field)
 
     def __check_square_empty(self, x: int, y: int) -> bool:
         if self.__field[x][y].is_empty():
             return True
         return False
 
-    def __check_square(self, x: int, y: int, symbol: str) -> bool:
-        if not self.__check_square_empty(x, y):  # check if square is empty
-            return False
-        if str(symbol) not in self.__all_symbols:  # check if symbol is one of the allowed symbols
-            return False
-        for rule, enabled in self.__rules.items():  # check all rules
-            if rule == "horizontal" and enabled:
-                for i in range(self.__cols):
-                    if repr(self.__field[i][y]) == repr(SudokuSymbol(self.__all_symbols, symbol)):
-                        return False
-            elif rule == "vertical" and enabled:
-                for j in range(self.__rows):
-                    if repr(self.__field[x][j]) == repr(SudokuSymbol(self.__all_symbols, symbol)):
-                        return False
-            elif rule == "boxes":
-                if enabled is True and self.__rows == self.__cols == 9:
-                    for i in range(3 * (x // 3), 3 * (x // 3 + 1)):
-                        for j in range(3 * (y // 3), 3 * (y // 3 + 1)):
-                            if repr(self.__field[i][j]) == repr(SudokuSymbol(self.__all_symbols, symbol)):
-                                return False
-                elif type(enabled) == list:
-                    for i in range(self.__cols):
-                        for j in range(self.__rows):
-                            for group in enabled:
-                                if (i, j) in group and (x, y) in group:
-                                    if repr(self.__field[i][j]) == repr(SudokuSymbol(self.__all_symbols, symbol)):
-                                        return False
-            elif (rule == "diagonals" and enabled and self.__rows == self.__cols
-                  and (x == y or x == self.__rows - y - 1)):
-                # top-left to bottom-right
-                for d in range(self.__rows):
-                    if repr(self.__field[d][d]) == repr(SudokuSymbol(self.__all_symbols, symbol)) and x == y:
-                        return False
-
-                # top-right to bottom-left
-                for d in range(self.__rows):
-                    if (repr(self.__field[d][self.__rows - d - 1]) == repr(SudokuSymbol(self.__all_symbols, symbol))
-                            and x == self.__rows - y - 1):
-                        return False
-        return True
-
-    def __set_square(self, x: int, y: int, symbol: str) -> bool:
-        if self.__check_square(x, y, symbol):
-            self.__field[x][y].set_value(symbol)
-            return True
-        return False
-
-    def __remove_square(self, x: int, y: int) -> None:
-        self.__field[x][y] = SudokuSymbol(self.__all_symbols, self.__no_symbol)
-
-    def __get_next_empty(self) -> Union[None, tuple[int, int]]:
-        for i in range(self.__cols):
-            for j in range(self.__rows):
-                if self.__check_square_empty(i, j):
-                    return i, j
-
     def lock_filled(self):
         for i in range(self.__cols):
             for j in range(self.__rows):
                 if not self.__check_square_empty(i, j):
                     self.__field[i][j].lock()
 
-    def solve(self) -> bool:
-        next_empty: Union[None, tuple[int, int]] = self.__get_next_empty()
-        if not next_empty:  # no empty squares
-            return True
-        for symbol in self.__all_symbols:
-            if self.__set_square(*next_empty, symbol):
-                solution = self.solve()
-                if solution:
-                    return True
-                self.__remove_square(*next_empty)
+    def get_units(self) -> Units:
+        if self.__units is None:
+            self.__units = Units((self.__cols, self.__rows), self.__rules)
+        return self.__units
+
+    def get_size(self) -> tuple[int, int]:
+        # (width, height) like Units
+        return self.__cols, self.__rows
+
+    def get_rules(self) -> dict[str, Union[bool, list[list[tuple[int, int]]]]]:
+        return self.__rules
+
+    def get_pruners(self) -> list[Pruner]:
+        pruners: list[Pruner] = []
+        for constraint in self.__rules.get("constraints", None) or []:
+            pruner: Union[None, Pruner] = constraint.pruner(self.get_units(), self.__all_symbols)
+            if pruner is not None:
+                pruners.append(pruner)
+        return pruners
+
+    def get_all_symbols(self) -> Alphabet:
+        return self.__all_symbols
+
+    def get_values(self) -> list[int]:
+        # row by row, index into all_symbols or -1 for empty squares
+        symbol_index: dict[str, int] = self.__all_symbols.get_symbol_index()
+        return [symbol_index.get(square.get_value(), -1) for row in self.__field for square in row]
+
+    def set_values(self, values: list[int]) -> None:
+        for cell, value in enumerate(values):
+            x, y = divmod(cell, self.__cols)
+            if value >= 0:
+                self.__field[x][y].set_value(self.__all_symbols[value])
+            else:
+                self.__field[x][y].set_value()
+
+    def solve(self, rng: Union[None, random.Random] = None, stats: Union[None, SolverStats] = None,
+              max_nodes: Union[None, int] = None, timeout: Union[None, float] = None,
+              position: Union[None, SearchPosition] = None) -> Union[None, bool]:
+        # True if solved, None if not, as always. With max_nodes or timeout None can also mean the budget ran out,
+        # solve_status tells that apart from a puzzle without solution
+        return True if self.solve_status(rng=rng, stats=stats, max_nodes=max_nodes, timeout=timeout,
+                                         position=position) == "solved" else None
+
+    def solve_status(self, rng: Union[None, random.Random] = None, stats: Union[None, SolverStats] = None,
+                     max_nodes: Union[None, int] = None, timeout: Union[None, float] = None,
+                     position: Union[None, SearchPosition] = None) -> str:
+        # "solved", "unsolvable" or "budget exhausted" if max_nodes or timeout (seconds) ran out before the search
+        # could tell, see SearchPosition. rng picks the symbols in random order, e.g. to get a random full grid from
+        # an empty field, stats collects counters and timers of the search. A started position goes on where the
+        # last solve with it stopped (rng and stats of that solve stay), also after a solution to get the next one,
+        # as long as the givens stay the same.
+        if position is None:
+            position = SearchPosition()
+        if not position.is_started():
+            position.start(Search(self.get_units(), len(self.__all_symbols), rng=rng, pruners=self.get_pruners(),
+                                  stats=stats), self.get_values())
+        solution: Union[None, list[int]] = position.next_solution(max_nodes=max_nodes, timeout=timeout)
+        if solution is not None:
+            self.set_values(solution)
+        return position.get_status()
+
+    def iter_solutions(self, processes: Union[None, int] = None, split_depth: int = 2) -> Iterator[str]:
+        # every solution as compact string (see Alphabet.to_compact) in search order, searched by a process pool
+        from solutions import iter_solutions
+        return iter_solutions(self, processes=processes, split_depth=split_depth)
+
+    def count_solutions(self, limit: int = 2, stats: Union[None, SolverStats] = None) -> int:
+        return Search(self.get_units(), len(self.__all_symbols), pruners=self.get_pruners(),
+                      stats=stats).count(self.get_values(), limit)
 
     def get_field(self):
         return self.__field
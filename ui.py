@@ -1,15 +1,26 @@
 import os
 import pygame
 import math
+import time
+from collections import deque
 from ui_button import Button
 from ui_textfield import Textfield
 from ui_checkbox import Checkbox
+from ui_board import Board
 from symbol import SudokuSymbol
-from text import Sudoku
+from alphabet import Alphabet, get_alphabet
+from text import Sudoku, KillerCage, Thermometer, AntiKnight, NonConsecutive, Constraint, Pruner
 from string_conversion import SudokuString
 from group_symbol import GroupSymbol
+from units import Units
+from candidates import Candidates
+from hints import HintEngine, Hint
+from search import SearchPosition, SolverStats
+from solution_cache import SolutionCache, DEFAULT_CACHE_FILENAME
+from ui_font import get_font, warm_fonts
+from ui_profiler import FrameProfiler
 from file_select import select_file
-from typing import Union
+from typing import Callable, Union
 
 
 """
@@ -28,7 +39,11 @@ class SudokuWindow:
                  rules: Union[None, dict[str, Union[bool, list[list[tuple[int, int]]]]]] = None, win_width: int = 1098,
                  win_height: int = 691, caption: str = "Sudoku", fontname: str = "Arial",
                  thin_thickness_factor: float = 1 / 58, thick_thickness_factor: float = 3 / 58,
-                 selected_thickness_factor: float = 4 / 58, file_select_breaks: bool = False) -> None:
+                 selected_thickness_factor: float = 4 / 58, file_select_breaks: bool = False,
+                 min_cell_size: int = 30, max_zoom: float = 4, resize_delay: int = 150, profile: bool = False,
+                 trace_directory: Union[None, str] = ".",
+                 solution_cache_filename: Union[None, str] = DEFAULT_CACHE_FILENAME,
+                 solve_timeout: Union[None, float] = 2.0) -> None:
         self.__original_sudoku_size: tuple[int, int] = sudoku_width, sudoku_height
         self.__original_win_size: tuple[int, int] = win_width, win_height
         self.__sudoku_size: tuple[int, int] = self.__original_sudoku_size[:]
@@ -40,6 +55,8 @@ class SudokuWindow:
             self.__original_all_symbols: list[str] = [str(i) for i in all_symbols]
         self.__original_all_symbols.sort()
 
+        # one list for the lifetime of the window, changed in place, so rules["boxes"] always refers to it
+        self.__field_groups: list[list[tuple[int, int]]] = []
         if field_groups is None:
             self.__set_standard_field_groups()
             self.__original_field_groups: list[list[tuple[int, int]]] = [[self.__field_groups[i][j][:]
@@ -63,15 +80,14 @@ class SudokuWindow:
         self.__caption: str = caption
         self.__fontname: str = fontname
 
-        pygame.init()
+        # the system font list is built while the display starts, pygame.init would also start audio and joysticks
+        warm_fonts(self.__fontname)
+        pygame.display.init()
+        pygame.font.init()
         self.__pygame_window: pygame.Surface = pygame.display.set_mode(self.__win_size, pygame.RESIZABLE)
         pygame.display.set_caption(self.__caption)
 
-        pygame.font.init()
-        self.__font_size: int = 0
-        self.__font: pygame.font.Font = pygame.font.SysFont(self.__fontname, self.__font_size)
-
-        self.__all_symbols: list[str] = self.__original_all_symbols[:]
+        self.__all_symbols: Alphabet = get_alphabet(self.__original_all_symbols)
 
         self.__board: list[list[SudokuSymbol]] = [[SudokuSymbol(self.__all_symbols, "0")
                                                    for _ in range(self.__sudoku_size[0])]
@@ -79,86 +95,84 @@ class SudokuWindow:
 
         self.__selected: Union[None, tuple[int, int]] = None
 
-        self.__field_groups: list[list[tuple[int, int]]] = [[self.__original_field_groups[i][j][:]
-                                                             for j in range(len(self.__original_field_groups[i]))]
-                                                            for i in range(len(self.__original_field_groups))]
+        self.__set_field_groups(self.__original_field_groups)
 
         self.__rules: dict[str, bool] = dict()
+        self.__units: Units = Units(self.__sudoku_size, self.__rules)
+        self.__candidates: Candidates = Candidates(self.__units, self.__all_symbols)
+        self.__auto_notes: bool = False
+        self.__hint_engine: HintEngine = HintEngine(self.__units, self.__all_symbols)
+        self.__show_hint: bool = False
+        self.__hint_text: str = ""
+        self.__hint_cells: set[tuple[int, int]] = set()
+        # counters of the last solve, shown above the board until the board is replaced
+        self.__status_text: str = ""
         self.__set_rules(rules)
         self.__original_rules: dict[str, bool] = {key: value for key, value in self.__rules.items()}
 
-        self.__thin_thickness_factor: float = thin_thickness_factor
-        self.__thick_thickness_factor: float = thick_thickness_factor
-        self.__selected_thickness_factor: float = selected_thickness_factor
+        self.__board_view: Board = Board(self.__pygame_window, fontname=self.__fontname,
+                                         thin_thickness_factor=thin_thickness_factor,
+                                         thick_thickness_factor=thick_thickness_factor,
+                                         selected_thickness_factor=selected_thickness_factor)
 
         self.__thin_thickness: int = 0
-        self.__thick_thickness: int = 0
-        self.__selected_thickness: int = 0
 
         self.__cell_size: int = 0
         self.__board_size: tuple[int, int] = (0, 0)
+
+        # The board is shown in a viewport of board_size, cells never get smaller than min_cell_size
+        self.__min_cell_size: int = min_cell_size
+        self.__max_zoom: float = max_zoom
+        self.__zoom: float = 1
+        self.__scroll: tuple[int, int] = (0, 0)
         self.__button_factor: float = 0
         self.__borders: tuple[int, int] = (0, 0)
 
-        self.__font_size_notes: int = 0
-        self.__font_notes: pygame.font.Font = pygame.font.SysFont(self.__fontname, self.__font_size_notes)
-
-        self.__notes_cols: int = 0
-        self.__notes_rows: int = 0
-        self.__notes_distance_x: int = 0
-        self.__notes_distance_y: int = 0
-
         self.__buttons: list[Button] = [Button(self.__pygame_window, "Lock", self.__lock_selected),
                                         Button(self.__pygame_window, "Solve", self.__solve),
                                         Button(self.__pygame_window, "Clear", self.__clear),
                                         Button(self.__pygame_window, "Import/Export", self.__io_window),
                                         Button(self.__pygame_window, "Change Size", self.__size_change_1),
+                                        Button(self.__pygame_window, "Auto Notes", self.__toggle_auto_notes),
+                                        Button(self.__pygame_window, "Hint", self.__toggle_hint),
                                         Button(self.__pygame_window, "Quit", self.__quit)]
 
         self.__textfield = Textfield(self.__pygame_window)
 
-        self.__io_buttons: list[Button] = [Button(self.__pygame_window, "Back", self.__exit_side_window),
-                                           Button(self.__pygame_window, "Import", self.__import_window),
-                                           Button(self.__pygame_window, "Export", self.__export_window)]
-
-        self.__in_buttons: list[Button] = [Button(self.__pygame_window, "Back", self.__io_window),
-                                           Button(self.__pygame_window, "Standard", self.__in_standard),
-                                           Button(self.__pygame_window, "SudokuString", self.__in_sudokustring),
-                                           Button(self.__pygame_window, "Square", self.__in_square)]
-
-        self.__out_buttons: list[Button] = [Button(self.__pygame_window, "Back", self.__io_window),
-                                            Button(self.__pygame_window, "Standard", self.__out_standard),
-                                            Button(self.__pygame_window, "SudokuString", self.__out_sudokustring),
-                                            Button(self.__pygame_window, "Square", self.__out_square)]
-
-        self.__size_change_1_clickable: list[Union[Button, Textfield]] = [
-            Button(self.__pygame_window, "Back", self.__exit_side_window),
-            Textfield(self.__pygame_window, text="9", placeholder="Width"),
-            Textfield(self.__pygame_window, text="9", placeholder="Height"),
-            Button(self.__pygame_window, "Continue", self.__size_change_2)]
-
-        self.__size_change_2_clickable: list[Union[Button, Textfield]] = [
-            Button(self.__pygame_window, "Back", self.__size_change_1),
-            Textfield(self.__pygame_window, placeholder="Allowed Symbols"),
-            Button(self.__pygame_window, "Clear Board and Continue", self.__size_change_3)]
-
-        self.__size_change_3_clickable: list[Union[Button, Checkbox]] = [
-            Checkbox(self.__pygame_window, "Horizontal", True),
-            Checkbox(self.__pygame_window, "Vertical", True),
-            Checkbox(self.__pygame_window, "Boxes", True),
-            Checkbox(self.__pygame_window, "Diagonals", False),
-            Button(self.__pygame_window, "Apply", self.__size_change_4)]
-
-        self.__field_groups_board: list[list[GroupSymbol]] = [[GroupSymbol() for _ in range(self.__sudoku_size[0])]
-                                                              for _ in range(self.__sudoku_size[1])]
+        # widgets of the side screens by ui mode, built when the screen is first shown, see __side_widgets
+        self.__side_widget_cache: dict[str, list[Union[Button, Checkbox, Textfield]]] = {}
+
+        self.__field_groups_board: list[list[GroupSymbol]] = self.__group_labels(self.__original_field_groups)
 
         self.__file_select_breaks: bool = file_select_breaks
 
         self.__run: bool = True
         self.__ui_mode: str = "main"
 
+        # ui mode, window size, display flags, caption and follow-up action of requested screen switches
+        self.__ui_mode_queue: deque[tuple[str, Union[None, tuple[int, int]], int, str, Union[None, callable]]] = \
+            deque()
+
         self.__alt_pressed: bool = False
 
+        # window size of the last VIDEORESIZE, applied once no new one arrived for resize_delay ms
+        self.__resize_delay: int = resize_delay
+        self.__pending_win_size: Union[None, tuple[int, int]] = None
+        self.__pending_resize_time: float = 0.0
+
+        # F3 toggles the frame profiler, the switch happens at the start of the next frame. Each profiling session
+        # writes its own CSV trace to trace_directory (None for no trace).
+        self.__trace_directory: Union[None, str] = trace_directory
+        self.__profiler: Union[None, FrameProfiler] = None
+        self.__toggle_profiler_pending: bool = profile
+
+        # solutions of earlier puzzles, kept in solution_cache_filename across sessions (None for this session only)
+        self.__solution_cache: SolutionCache = SolutionCache(solution_cache_filename, commit_every=1)
+        # Solve searches at most solve_timeout seconds (None for no limit), pressing it again on the same puzzle
+        # continues the search where it stopped: (puzzle key, position, stats) of the stopped search
+        self.__solve_timeout: Union[None, float] = solve_timeout
+        self.__stopped_search: Union[None, tuple[str, SearchPosition, SolverStats]] = None
+
     def __set_rules(self, rules: Union[None, dict[str, Union[bool, list[list[tuple[int, int]]]]]] = None) -> None:
         if rules is None:
             self.__rules = {"horizontal": True, "vertical": True, "boxes": None}
@@ -166,57 +180,158 @@ class SudokuWindow:
             self.__rules = rules
         if self.__rules["boxes"] is not False:
             self.__rules["boxes"] = self.__field_groups
+        self.__reset_candidates()
+
+    def __reset_candidates(self) -> None:
+        # rebuilt when the board or the rules are replaced, single cells are updated in __handle_key
+        self.__units = Units(self.__sudoku_size, self.__rules)
+        self.__candidates = Candidates(self.__units, self.__all_symbols, pruners=self.__get_pruners())
+        self.__candidates.set_board(self.__board)
+        self.__hint_engine = HintEngine(self.__units, self.__all_symbols)
+        self.__status_text = ""
+        self.__update_hint()
+
+    def __is_conflict(self, i: int, j: int, symbol: str) -> bool:
+        return self.__candidates.is_conflict(self.__units.index(i, j), symbol)
+
+    def __get_pruners(self) -> list[Pruner]:
+        # like Sudoku.get_pruners, so auto notes leave out what killer cages, thermometers and non-consecutive forbid
+        pruners: list[Pruner] = []
+        for constraint in self.__rules.get("constraints", None) or []:
+            try:
+                pruner: Union[None, Pruner] = constraint.pruner(self.__units, self.__all_symbols)
+            except ValueError:
+                # sums, thermometers and non-consecutive need numeric symbols
+                continue
+            if pruner is not None:
+                pruners.append(pruner)
+        return pruners
+
+    def __get_auto_notes(self, i: int, j: int) -> int:
+        return self.__candidates.get_pruned_mask(self.__units.index(i, j))
+
+    def __toggle_auto_notes(self) -> None:
+        self.__auto_notes = not self.__auto_notes
+        self.__textfield.set_active(False)
+
+    def __toggle_hint(self) -> None:
+        self.__show_hint = not self.__show_hint
+        self.__update_hint()
+
+    def __update_hint(self) -> None:
+        # runs on every change of the board while the hint is shown
+        self.__hint_text = ""
+        self.__hint_cells = set()
+        if not self.__show_hint:
+            return
+        steps: list[Hint] = self.__hint_engine.find_hint(self.__candidates)
+        if not steps:
+            conflict: tuple[int, ...] = self.__hint_engine.find_conflict()
+            if conflict:
+                # shown instead of techniques, which assume a board without repeated values
+                cells: list[tuple[int, int]] = sorted((self.__units.position(cell) for cell in conflict),
+                                                      key=lambda cell: (cell[1], cell[0]))
+                symbol: str = self.__all_symbols.get_symbol(self.__hint_engine.get_values()[conflict[0]])
+                self.__hint_text = f"Conflict: {symbol} in " + ", ".join(f"r{j + 1}c{i + 1}" for i, j in cells)
+                self.__hint_cells = set(cells)
+            elif not self.__hint_engine.is_solved():
+                self.__hint_text = "No hint found"
+            return
+        hint: Hint = steps[-1]
+        self.__hint_text = hint.describe(self.__units, self.__all_symbols)
+        if len(steps) > 1:
+            self.__hint_text += f" (after {', '.join(step.get_technique() for step in steps[:-1])})"
+        self.__hint_cells = {self.__units.position(cell) for cell in hint.get_cells()}
+        self.__hint_cells.update(self.__units.position(cell) for cell, _ in hint.get_placements())
 
     def __calc_size_properties(self, leave_win_size: bool = False) -> (tuple[tuple[int, int], int, float,
-                                                                       tuple[int, int], tuple[int, int],
-                                                                       tuple[int, int, int], int, pygame.font.Font,
-                                                                       tuple[int, int], tuple[int, int], int,
-                                                                       pygame.font.Font]):
-        # Calculate the size of the cells
+                                                                       tuple[int, int], tuple[int, int]]):
+        # Calculate the size of the cells if the whole board fits in the window
         win_size: tuple[int, int] = self.__pygame_window.get_size() if not leave_win_size else self.__win_size
-        cell_size: int = min(math.floor(0.8 * win_size[0] / (5/3 * self.__sudoku_size[0])),
-                             math.floor(0.8 * win_size[1] / self.__sudoku_size[1]))
-        button_factor: float = 0.8 * win_size[0] / (cell_size * self.__sudoku_size[0]) - 1
+        fit_cell_size: int = max(1, min(math.floor(0.8 * win_size[0] / (5/3 * self.__sudoku_size[0])),
+                                        math.floor(0.8 * win_size[1] / self.__sudoku_size[1])))
+        button_factor: float = 0.8 * win_size[0] / (fit_cell_size * self.__sudoku_size[0]) - 1
         button_factor = max(min(button_factor, 3/2), 2/3)
 
-        # Calculate the size of the board
-        board_size: tuple[int, int] = cell_size * self.__sudoku_size[0], cell_size * self.__sudoku_size[1]
+        # Calculate the size of the board (viewport)
+        board_size: tuple[int, int] = fit_cell_size * self.__sudoku_size[0], fit_cell_size * self.__sudoku_size[1]
 
         # Calculate the size of the border
         border_left: int = int((win_size[0] - (1 + button_factor) * board_size[0]) / 4)
         border_top: int = int((win_size[1] - board_size[1]) / 2)
         borders: tuple[int, int] = border_left, border_top
 
-        # Change line thickness
-        thin_thickness: int = math.ceil(self.__thin_thickness_factor * cell_size)
-        thick_thickness: int = math.ceil(self.__thick_thickness_factor * cell_size)
-        selected_thickness: int = math.ceil(self.__selected_thickness_factor * cell_size)
-
-        # Change font (main symbols)
-        font_size: int = int(cell_size / 52 * 36)
-        font: pygame.font.Font = pygame.font.SysFont(self.__fontname, font_size)
-
-        # Note dimensions
-        notes_cols: int = math.ceil(math.sqrt(len(self.__all_symbols)))
-        notes_rows: int = math.ceil(len(self.__all_symbols) / notes_cols)
-        notes_distance_x: int = round((cell_size - thin_thickness) / (2 * notes_cols))
-        notes_distance_y: int = round((cell_size - thin_thickness) / (2 * notes_rows))
-
-        # Font (notes)
-        font_size_notes: int = int(1.6 * notes_distance_y)
-        font_notes: pygame.font.Font = pygame.font.SysFont(self.__fontname, font_size_notes)
-        return (win_size, cell_size, button_factor, board_size, borders,
-                (thin_thickness, thick_thickness, selected_thickness), font_size, font, (notes_cols, notes_rows),
-                (notes_distance_x, notes_distance_y), font_size_notes, font_notes)
+        # Calculate the size of the zoomed cells
+        cell_size: int = max(fit_cell_size, round(max(fit_cell_size, self.__min_cell_size) * self.__zoom))
+        return win_size, cell_size, button_factor, board_size, borders
 
     def __set_size_properties(self, leave_win_size: bool = False) -> (tuple[tuple[int, int], tuple[int, int], int,
                                                                       tuple[int, int], tuple[int, int]]):
-        (self.__win_size, self.__cell_size, self.__button_factor, self.__board_size, self.__borders,
-         (self.__thin_thickness, self.__thick_thickness, self.__selected_thickness), self.__font_size, self.__font,
-         (self.__notes_rows, self.__notes_cols), (self.__notes_distance_x, self.__notes_distance_y),
-         self.__font_size_notes, self.__font_notes) = self.__calc_size_properties(leave_win_size=leave_win_size)
+        (self.__win_size, self.__cell_size, self.__button_factor, self.__board_size,
+         self.__borders) = self.__calc_size_properties(leave_win_size=leave_win_size)
+
+        self.__board_view.set_viewport((*self.__borders, *self.__board_size))
+        self.__scroll_by(0, 0)
+        self.__thin_thickness = self.__board_view.get_thicknesses()[0]
         return self.__sudoku_size, self.__win_size, self.__cell_size, self.__board_size, self.__borders
 
+    def __scroll_by(self, dx: int, dy: int) -> None:
+        max_scroll: tuple[int, int] = (max(0, self.__cell_size * self.__sudoku_size[0] - self.__board_size[0]),
+                                       max(0, self.__cell_size * self.__sudoku_size[1] - self.__board_size[1]))
+        self.__scroll = (min(max(0, self.__scroll[0] + dx), max_scroll[0]),
+                         min(max(0, self.__scroll[1] + dy), max_scroll[1]))
+
+        # Line thickness, fonts and note dimensions follow the cell size
+        self.__board_view.set_size_properties(((self.__borders[0] - self.__scroll[0],
+                                                self.__borders[1] - self.__scroll[1]), self.__cell_size),
+                                              self.__all_symbols)
+
+    def __zoom_at(self, factor: float, pos: tuple[int, int]) -> None:
+        fit_cell_size: int = self.__board_size[0] // self.__sudoku_size[0]
+        min_zoom: float = fit_cell_size / max(fit_cell_size, self.__min_cell_size)
+        zoom: float = min(max(min_zoom, self.__zoom * factor), self.__max_zoom)
+        if zoom == self.__zoom:
+            return
+
+        # Keep the point of the board below the mouse in place
+        old_cell_size: int = self.__cell_size
+        offset: tuple[int, int] = pos[0] - self.__borders[0], pos[1] - self.__borders[1]
+        self.__zoom = zoom
+        self.__set_size_properties()
+        self.__scroll = (round((self.__scroll[0] + offset[0]) * self.__cell_size / old_cell_size) - offset[0],
+                         round((self.__scroll[1] + offset[1]) * self.__cell_size / old_cell_size) - offset[1])
+        self.__scroll_by(0, 0)
+
+    def __scroll_to_selected(self) -> None:
+        if self.__selected is None:
+            return
+        dx: int = 0
+        dy: int = 0
+        cell_x: int = self.__selected[0] * self.__cell_size
+        cell_y: int = self.__selected[1] * self.__cell_size
+        if cell_x < self.__scroll[0]:
+            dx = cell_x - self.__scroll[0]
+        elif cell_x + self.__cell_size > self.__scroll[0] + self.__board_size[0]:
+            dx = cell_x + self.__cell_size - self.__scroll[0] - self.__board_size[0]
+        if cell_y < self.__scroll[1]:
+            dy = cell_y - self.__scroll[1]
+        elif cell_y + self.__cell_size > self.__scroll[1] + self.__board_size[1]:
+            dy = cell_y + self.__cell_size - self.__scroll[1] - self.__board_size[1]
+        if dx or dy:
+            self.__scroll_by(dx, dy)
+
+    def __handle_wheel(self, event: pygame.event.Event) -> None:
+        if self.__ui_mode not in ("main", "size_change_3"):
+            return
+        # wheel events have no modifiers and position, except replayed ones (see ui_replay)
+        mods: int = event.mod if hasattr(event, "mod") else pygame.key.get_mods()
+        if mods & (pygame.KMOD_CTRL | pygame.KMOD_META):
+            self.__zoom_at(1.1 ** event.y, event.pos if hasattr(event, "pos") else pygame.mouse.get_pos())
+        elif mods & pygame.KMOD_SHIFT:
+            self.__scroll_by(-event.y * self.__cell_size, -event.x * self.__cell_size)
+        else:
+            self.__scroll_by(event.x * self.__cell_size, -event.y * self.__cell_size)
+
     def __set_standard_field_groups(self) -> None:
         match self.__sudoku_size:
             case (6, 6):
@@ -237,23 +352,75 @@ class SudokuWindow:
 
         self.__update_field_groups()
 
+    def __group_labels(self, field_groups: list[list[tuple[int, int]]]) -> list[list[GroupSymbol]]:
+        # board of the size change screen with one letter per group
+        board: list[list[GroupSymbol]] = [[GroupSymbol() for _ in range(self.__sudoku_size[0])]
+                                          for _ in range(self.__sudoku_size[1])]
+        for n, group in enumerate(field_groups):
+            for i, j in group:
+                board[j][i].set_value(chr(ord("A") + n))
+        return board
+
+    def __set_field_groups(self, field_groups: list[list[tuple[int, int]]]) -> None:
+        # full rebuild, only needed when all groups are replaced, single cells go through __set_field_group
+        field_groups = [list(group) for group in field_groups]
+        self.__field_groups.clear()
+        self.__group_symbols: list[str] = []
+        self.__group_index: dict[str, int] = dict()
+        self.__cell_groups: dict[tuple[int, int], str] = dict()
+        self.__cell_positions: dict[tuple[int, int], int] = dict()
+        for n, group in enumerate(field_groups):
+            for cell in group:
+                self.__add_to_field_group(tuple(cell), str(n))
+
     def __update_field_groups(self) -> None:
-        self.__field_groups = []
-        group_symbols: set[str, None] = set()
-        for i in range(self.__sudoku_size[0]):
-            for j in range(self.__sudoku_size[1]):
-
-                group_symbols.add(self.__field_groups_board[j][i].__format__()[0])
-        for group in group_symbols:
-            if group is None:
-                continue
-            group_list: list[tuple[int, int]] = []
+        self.__set_field_groups([])
+        for j in range(self.__sudoku_size[1]):
             for i in range(self.__sudoku_size[0]):
-                for j in range(self.__sudoku_size[1]):
-                    if group == self.__field_groups_board[j][i].__format__()[0]:
-                        group_list.append((i, j))
-            if group_list:
-                self.__field_groups.append([group_list[cell][:] for cell in range(len(group_list))])
+                self.__add_to_field_group((i, j), self.__field_groups_board[j][i].__format__()[0])
+
+    def __add_to_field_group(self, cell: tuple[int, int], symbol: Union[None, str]) -> None:
+        if symbol is None:
+            return
+        index: Union[None, int] = self.__group_index.get(symbol)
+        if index is None:
+            index = len(self.__field_groups)
+            self.__group_index[symbol] = index
+            self.__group_symbols.append(symbol)
+            self.__field_groups.append([])
+        group: list[tuple[int, int]] = self.__field_groups[index]
+        self.__cell_groups[cell] = symbol
+        self.__cell_positions[cell] = len(group)
+        group.append(cell)
+
+    def __remove_from_field_group(self, cell: tuple[int, int]) -> None:
+        symbol: Union[None, str] = self.__cell_groups.pop(cell, None)
+        if symbol is None:
+            return
+        position: int = self.__cell_positions.pop(cell)
+        index: int = self.__group_index[symbol]
+        group: list[tuple[int, int]] = self.__field_groups[index]
+
+        # Move the last cell of the group into the gap
+        last_cell: tuple[int, int] = group.pop()
+        if position < len(group):
+            group[position] = last_cell
+            self.__cell_positions[last_cell] = position
+
+        # Move the last group into the place of an emptied one
+        if not group:
+            del self.__group_index[symbol]
+            last_group: list[tuple[int, int]] = self.__field_groups.pop()
+            last_symbol: str = self.__group_symbols.pop()
+            if index < len(self.__field_groups):
+                self.__field_groups[index] = last_group
+                self.__group_symbols[index] = last_symbol
+                self.__group_index[last_symbol] = index
+
+    def __set_field_group(self, i: int, j: int, symbol: Union[None, str] = None) -> None:
+        self.__remove_from_field_group((i, j))
+        self.__field_groups_board[j][i].set_value(symbol)
+        self.__add_to_field_group((i, j), self.__field_groups_board[j][i].__format__()[0])
 
     def __handle_click(self, pos) -> None:
         if self.__ui_mode == "main":
@@ -262,45 +429,40 @@ class SudokuWindow:
                 button.clicked(pos)
 
             # Handle textfield click
-            self.__textfield.clicked(pos)
+            if not self.__auto_notes:
+                self.__textfield.clicked(pos)
 
             # Handle click on field
-            x, y = pos
-            if self.__borders[0] < x < self.__borders[0] + self.__board_size[0] \
-                    and self.__borders[1] < y < self.__borders[1] + self.__board_size[1]:
-                i = int((x - self.__borders[0]) // self.__cell_size)
-                j = int((y - self.__borders[1]) // self.__cell_size)
-                self.__selected = i, j
+            cell: Union[None, tuple[int, int]] = self.__board_view.get_cell(pos, self.__sudoku_size)
+            if cell is not None:
+                self.__selected = cell
                 self.__update_notes_textfield()
             elif not self.__textfield.is_active():
                 self.__selected = None
         elif self.__ui_mode == "io":
-            for button in self.__io_buttons:
+            for button in self.__side_widgets("io"):
                 button.clicked(pos)
         elif self.__ui_mode == "in":
-            for button in self.__in_buttons:
+            for button in self.__side_widgets("in"):
                 button.clicked(pos)
         elif self.__ui_mode == "out":
-            for button in self.__out_buttons:
+            for button in self.__side_widgets("out"):
                 button.clicked(pos)
         elif self.__ui_mode == "size_change_1":
-            for clickable in self.__size_change_1_clickable:
+            for clickable in self.__side_widgets("size_change_1"):
                 clickable.clicked(pos)
         elif self.__ui_mode == "size_change_2":
-            for clickable in self.__size_change_2_clickable:
+            for clickable in self.__side_widgets("size_change_2"):
                 clickable.clicked(pos)
         elif self.__ui_mode == "size_change_3":
             # Handle clickable clicks
-            for clickable in self.__size_change_3_clickable:
+            for clickable in self.__side_widgets("size_change_3"):
                 clickable.clicked(pos)
 
             # Handle click on field
-            x, y = pos
-            if self.__borders[0] < x < self.__borders[0] + self.__board_size[0] \
-                    and self.__borders[1] < y < self.__borders[1] + self.__board_size[1]:
-                i = int((x - self.__borders[0]) // self.__cell_size)
-                j = int((y - self.__borders[1]) // self.__cell_size)
-                self.__selected = i, j
+            cell = self.__board_view.get_cell(pos, self.__sudoku_size)
+            if cell is not None:
+                self.__selected = cell
                 self.__update_notes_textfield()
             elif not self.__textfield.is_active():
                 self.__selected = None
@@ -317,6 +479,7 @@ class SudokuWindow:
                         self.__textfield.handle_key(key, event)
                         self.__board[j][i].set_notes([note.strip() for note in self.__textfield.get_text().split(",")])
                 else:
+                    old_value: str = self.__board[j][i].get_value()
                     if key == pygame.K_LEFT:
                         self.__selected = (max(0, i - 1), j)
                     elif key == pygame.K_RIGHT:
@@ -332,14 +495,18 @@ class SudokuWindow:
                             self.__board[j][i].set_value(str(event.unicode))
                         else:
                             self.__board[j][i].append_value(str(event.unicode))
-                    elif key == pygame.K_n:
+                    elif key == pygame.K_n and not self.__auto_notes:
                         self.__textfield.set_active()
+                    if old_value != self.__board[j][i].get_value():
+                        self.__candidates.set_value(self.__units.index(i, j), self.__board[j][i].get_value())
+                        self.__update_hint()
+                    self.__scroll_to_selected()
                     self.__update_notes_textfield()
             else:
                 if key == pygame.K_LEFT or key == pygame.K_RIGHT or key == pygame.K_UP or key == pygame.K_DOWN:
                     self.__selected = 0, 0
         elif self.__ui_mode == "size_change_1":
-            for clickable in self.__size_change_1_clickable:
+            for clickable in self.__side_widgets("size_change_1"):
                 if type(clickable) == Textfield:
                     if clickable.is_active():
                         if key == pygame.K_RETURN:
@@ -347,7 +514,7 @@ class SudokuWindow:
                         else:
                             clickable.handle_key(key, event)
         elif self.__ui_mode == "size_change_2":
-            for clickable in self.__size_change_2_clickable:
+            for clickable in self.__side_widgets("size_change_2"):
                 if type(clickable) == Textfield:
                     if clickable.is_active():
                         if key == pygame.K_RETURN:
@@ -355,7 +522,15 @@ class SudokuWindow:
                         else:
                             clickable.handle_key(key, event)
         elif self.__ui_mode == "size_change_3":
-            if self.__selected is not None:
+            active_textfields: list[Textfield] = [clickable for clickable in self.__side_widgets("size_change_3")
+                                                  if type(clickable) == Textfield and clickable.is_active()]
+            if active_textfields:
+                for clickable in active_textfields:
+                    if key == pygame.K_RETURN:
+                        clickable.set_active(False)
+                    else:
+                        clickable.handle_key(key, event)
+            elif self.__selected is not None:
                 i, j = self.__selected
                 if key == pygame.K_LEFT:
                     self.__selected = (max(0, i - 1), j)
@@ -366,99 +541,20 @@ class SudokuWindow:
                 elif key == pygame.K_DOWN:
                     self.__selected = (i, min(self.__sudoku_size[1] - 1, j + 1))
                 elif key == pygame.K_BACKSPACE or key == pygame.K_DELETE:
-                    self.__field_groups_board[j][i].set_value()
-                else:
+                    self.__set_field_group(i, j)
+                elif event.unicode:
                     """
                     if self.__field_groups_board[j][i].is_empty():
                         self.__field_groups_board[j][i].set_value(str(event.unicode))
                     else:
                         self.__field_groups_board[j][i].append_value(str(event.unicode))
                     """
-                    self.__field_groups_board[j][i].set_value(str(event.unicode))
-                    self.__update_field_groups()
+                    self.__set_field_group(i, j, str(event.unicode))
+                self.__scroll_to_selected()
             else:
                 if key == pygame.K_LEFT or key == pygame.K_RIGHT or key == pygame.K_UP or key == pygame.K_DOWN:
                     self.__selected = 0, 0
 
-    def __draw_cells(self, board: Union[None, list[list[SudokuSymbol]], list[list[GroupSymbol]]] = None) -> None:
-        if board is None:
-            board = self.__board
-        # Draw the cells
-        for i in range(self.__sudoku_size[0]):
-            for j in range(self.__sudoku_size[1]):
-                x: int = self.__borders[0] + i * self.__cell_size
-                y: int = self.__borders[1] + j * self.__cell_size
-                pygame.draw.rect(self.__pygame_window, "white", (x, y, self.__cell_size, self.__cell_size))
-                render: Union[None, tuple[str, str], tuple[None, None], list[str]] = board[j][i].__format__()
-                if type(render) == tuple:
-                    if render[0] is not None:
-                        text: pygame.Surface = self.__font.render(render[0], True, render[1])
-                        coordinates: tuple[int, int] = (int(x + (self.__cell_size + self.__thin_thickness
-                                                                 - text.get_width()) / 2),
-                                                        int(y + (self.__cell_size + self.__thin_thickness
-                                                                 - text.get_height()) / 2))
-                        self.__pygame_window.blit(text, coordinates)
-                elif type(render) == list:
-                    for n_j in range(self.__notes_rows):
-                        for n_i in range(self.__notes_cols):
-                            note_x = x + self.__thin_thickness + self.__notes_distance_x * (2 * n_i + 1)
-                            note_y = y + self.__thin_thickness + self.__notes_distance_y * (2 * n_j + 1)
-                            for note in render:
-                                if note == self.__all_symbols[self.__notes_cols * n_j + n_i]:
-                                    text: pygame.Surface = self.__font_notes.render(note, True, "grey50")
-                                    coordinates = (int(note_x - text.get_width() / 2),
-                                                   int(note_y - text.get_height() / 2))
-                                    self.__pygame_window.blit(text, coordinates)
-
-    def __draw_borders(self) -> None:
-        # Draw the outer borders
-        pygame.draw.line(self.__pygame_window, "black", self.__borders,
-                         (self.__borders[0], self.__borders[1] + self.__board_size[1]), self.__thick_thickness)
-        pygame.draw.line(self.__pygame_window, "black", (self.__borders[0] + self.__board_size[0], self.__borders[1]),
-                         (self.__borders[0] + self.__board_size[0], self.__borders[1] + self.__board_size[1]),
-                         self.__thick_thickness)
-        pygame.draw.line(self.__pygame_window, "black", self.__borders,
-                         (self.__borders[0] + self.__board_size[0], self.__borders[1]), self.__thick_thickness)
-        pygame.draw.line(self.__pygame_window, "black", (self.__borders[0], self.__borders[1] + self.__board_size[1]),
-                         (self.__borders[0] + self.__board_size[0], self.__borders[1] + self.__board_size[1]),
-                         self.__thick_thickness)
-
-        # Draw the inner vertical lines
-        for i in range(self.__sudoku_size[0] - 1):
-            for j in range(self.__sudoku_size[1]):
-                thickness: int = self.__thick_thickness
-                for group in self.__field_groups:
-                    if (i, j) in group and (i + 1, j) in group:
-                        thickness = self.__thin_thickness
-                        break
-                pygame.draw.line(self.__pygame_window, "black",
-                                 (self.__borders[0] + (i + 1) * self.__cell_size,
-                                  self.__borders[1] + j * self.__cell_size),
-                                 (self.__borders[0] + (i + 1) * self.__cell_size,
-                                  self.__borders[1] + (j + 1) * self.__cell_size), thickness)
-
-        # Draw the inner horizontal lines
-        for i in range(self.__sudoku_size[1] - 1):
-            for j in range(self.__sudoku_size[0]):
-                thickness: int = self.__thick_thickness
-                for group in self.__field_groups:
-                    if (j, i) in group and (j, i + 1) in group:
-                        thickness = self.__thin_thickness
-                        break
-                pygame.draw.line(self.__pygame_window, "black",
-                                 (self.__borders[0] + j * self.__cell_size,
-                                  self.__borders[1] + (i + 1) * self.__cell_size),
-                                 (self.__borders[0] + (j + 1) * self.__cell_size,
-                                  self.__borders[1] + (i + 1) * self.__cell_size), thickness)
-
-    def __draw_selected(self) -> None:
-        if self.__selected is not None:
-            x = self.__borders[0] + self.__selected[0] * self.__cell_size
-            y = self.__borders[1] + self.__selected[1] * self.__cell_size
-            pygame.draw.rect(self.__pygame_window, "red",
-                             (x, y, self.__cell_size + self.__thin_thickness, self.__cell_size + self.__thin_thickness),
-                             self.__selected_thickness)
-
     def __draw_buttons(self) -> None:
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
         for i, button in enumerate(self.__buttons):
@@ -470,6 +566,10 @@ class SudokuWindow:
                 text: str = "Lock" if not self.__alt_pressed else "Lock All"
             elif i == 2:
                 text: str = "Clear" if not self.__alt_pressed else "Reset"
+            elif i == 5:
+                text: str = "Auto Notes" if not self.__auto_notes else "Own Notes"
+            elif i == 6:
+                text: str = "Hint" if not self.__show_hint else "Hide Hint"
             else:
                 text: None = None
             button.draw(size_properties, text)
@@ -490,9 +590,25 @@ class SudokuWindow:
             pass
 
     def __draw_field(self, board: Union[None, list[list[SudokuSymbol]], list[list[GroupSymbol]]] = None) -> None:
-        self.__draw_cells(board=board)
-        self.__draw_borders()
-        self.__draw_selected()
+        if board is None:
+            self.__board_view.draw(self.__board, self.__cell_groups, self.__selected, conflict=self.__is_conflict,
+                                   auto_notes=self.__get_auto_notes if self.__auto_notes else None,
+                                   highlighted=self.__hint_cells)
+        else:
+            self.__board_view.draw(board, self.__cell_groups, self.__selected)
+
+    def __draw_hint(self) -> None:
+        font_size: int = max(1, min(int(0.5 * self.__borders[1]),
+                                    int(0.4 * self.__board_size[1] / self.__sudoku_size[1])))
+        text: pygame.Surface = get_font(self.__fontname, font_size).render(self.__hint_text, True, "black")
+        self.__pygame_window.blit(text, (self.__borders[0],
+                                         int(self.__borders[1] + self.__board_size[1]
+                                             + (self.__borders[1] - text.get_height()) / 2)))
+
+    def __draw_status(self) -> None:
+        font_size: int = max(1, int(0.4 * self.__borders[1]))
+        text: pygame.Surface = get_font(self.__fontname, font_size).render(self.__status_text, True, "gray50")
+        self.__pygame_window.blit(text, (self.__borders[0], int((self.__borders[1] - text.get_height()) / 2)))
 
     def __draw_separating_line(self) -> None:
         pygame.draw.line(self.__pygame_window, "black",
@@ -502,7 +618,7 @@ class SudokuWindow:
 
     def __draw_io_buttons(self) -> None:
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
-        for i, button in enumerate(self.__io_buttons):
+        for i, button in enumerate(self.__side_widgets("io")):
             size_properties: tuple[tuple[int, int], tuple[int, int], Union[None, int]] = (
                 (self.__borders[0],
                  int(self.__borders[1] + i * 1 * button_space + 0.1 * button_space)),
@@ -511,7 +627,7 @@ class SudokuWindow:
 
     def __draw_in_buttons(self) -> None:
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
-        for i, button in enumerate(self.__in_buttons):
+        for i, button in enumerate(self.__side_widgets("in")):
             size_properties: tuple[tuple[int, int], tuple[int, int], Union[None, int]] = (
                 (self.__borders[0],
                  int(self.__borders[1] + i * 1 * button_space + 0.1 * button_space)),
@@ -520,7 +636,7 @@ class SudokuWindow:
 
     def __draw_out_buttons(self) -> None:
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
-        for i, button in enumerate(self.__out_buttons):
+        for i, button in enumerate(self.__side_widgets("out")):
             size_properties: tuple[tuple[int, int], tuple[int, int], Union[None, int]] = (
                 (self.__borders[0],
                  int(self.__borders[1] + i * 1 * button_space + 0.1 * button_space)),
@@ -529,7 +645,7 @@ class SudokuWindow:
 
     def __draw_size_change_1_clickable(self):
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
-        for i, clickable in enumerate(self.__size_change_1_clickable):
+        for i, clickable in enumerate(self.__side_widgets("size_change_1")):
             size_properties: tuple[tuple[int, int], tuple[int, int], Union[None, int]] = (
                 (self.__borders[0],
                  int(self.__borders[1] + i * 1 * button_space + 0.1 * button_space)),
@@ -538,7 +654,7 @@ class SudokuWindow:
 
     def __draw_size_change_2_clickable(self):
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
-        for i, clickable in enumerate(self.__size_change_2_clickable):
+        for i, clickable in enumerate(self.__side_widgets("size_change_2")):
             size_properties: tuple[tuple[int, int], tuple[int, int], Union[None, int]] = (
                 (self.__borders[0],
                  int(self.__borders[1] + i * 1 * button_space + 0.1 * button_space)),
@@ -548,7 +664,7 @@ class SudokuWindow:
     def __draw_size_change_3_clickable(self):
         button_space: float = self.__board_size[1] / (len(self.__buttons) + 1)
         to_draw: list[Button, Checkbox] = []
-        for i, clickable in enumerate(self.__size_change_3_clickable):
+        for i, clickable in enumerate(self.__side_widgets("size_change_3")):
             if type(clickable) == Checkbox:
                 if clickable.get_text().lower() == "diagonals" and self.__sudoku_size[0] != self.__sudoku_size[1]:
                     continue
@@ -569,8 +685,12 @@ class SudokuWindow:
             self.__draw_buttons()
             if self.__selected is not None:
                 i, j = self.__selected
-                if self.__board[j][i].accept_notes():
+                if self.__board[j][i].accept_notes() and not self.__auto_notes:
                     self.__draw_notes_textfield()
+            if self.__hint_text:
+                self.__draw_hint()
+            if self.__status_text:
+                self.__draw_status()
 
             self.__draw_separating_line()
         elif self.__ui_mode == "io":
@@ -589,44 +709,153 @@ class SudokuWindow:
 
             self.__draw_separating_line()
 
-    def __set_ui_mode(self, ui_mode: str = "main") -> None:
-        # wait for MOUSEBUTTONUP needed to register all clicks
-        while True:
-            e: pygame.event.Event = pygame.event.wait()
-            if e.type == pygame.MOUSEBUTTONUP:
-                break
-        self.__ui_mode = ui_mode
-
-    def run(self) -> None:
+    def __side_widgets(self, ui_mode: str) -> list[Union[Button, Checkbox, Textfield]]:
+        # most sessions never open the side screens, so their widgets are built on first use
+        if ui_mode not in self.__side_widget_cache:
+            self.__side_widget_cache[ui_mode] = self.__build_side_widgets(ui_mode)
+        return self.__side_widget_cache[ui_mode]
+
+    def __build_side_widgets(self, ui_mode: str) -> list[Union[Button, Checkbox, Textfield]]:
+        if ui_mode == "io":
+            return [Button(self.__pygame_window, "Back", self.__exit_side_window),
+                    Button(self.__pygame_window, "Import", self.__import_window),
+                    Button(self.__pygame_window, "Export", self.__export_window)]
+        elif ui_mode == "in":
+            return [Button(self.__pygame_window, "Back", self.__io_window),
+                    Button(self.__pygame_window, "Standard", self.__in_standard),
+                    Button(self.__pygame_window, "SudokuString", self.__in_sudokustring),
+                    Button(self.__pygame_window, "Square", self.__in_square)]
+        elif ui_mode == "out":
+            return [Button(self.__pygame_window, "Back", self.__io_window),
+                    Button(self.__pygame_window, "Standard", self.__out_standard),
+                    Button(self.__pygame_window, "SudokuString", self.__out_sudokustring),
+                    Button(self.__pygame_window, "Square", self.__out_square)]
+        elif ui_mode == "size_change_1":
+            return [Button(self.__pygame_window, "Back", self.__exit_side_window),
+                    Textfield(self.__pygame_window, text="9", placeholder="Width"),
+                    Textfield(self.__pygame_window, text="9", placeholder="Height"),
+                    Button(self.__pygame_window, "Continue", self.__size_change_2)]
+        elif ui_mode == "size_change_2":
+            return [Button(self.__pygame_window, "Back", self.__size_change_1),
+                    Textfield(self.__pygame_window, placeholder="Allowed Symbols"),
+                    Button(self.__pygame_window, "Clear Board and Continue", self.__size_change_3)]
+        elif ui_mode == "size_change_3":
+            return [Checkbox(self.__pygame_window, "Horizontal", True),
+                    Checkbox(self.__pygame_window, "Vertical", True),
+                    Checkbox(self.__pygame_window, "Boxes", True),
+                    Checkbox(self.__pygame_window, "Diagonals", False),
+                    Checkbox(self.__pygame_window, "Anti-Knight", False),
+                    Checkbox(self.__pygame_window, "Non-Consecutive", False),
+                    Textfield(self.__pygame_window, placeholder="Killer Cages, e.g. 15:r1c1,r1c2;7:r2c1,r3c1"),
+                    Textfield(self.__pygame_window, placeholder="Thermometers, e.g. r1c1,r1c2,r1c3"),
+                    Button(self.__pygame_window, "Apply", self.__size_change_4)]
+        return []
+
+    def __set_ui_mode(self, ui_mode: str = "main", win_size: Union[None, tuple[int, int]] = None, flags: int = 0,
+                      caption: str = "", then: Union[None, callable] = None) -> None:
+        # switched in the main loop after the current event, so the click that caused it isn't handled twice
+        self.__ui_mode_queue.append((ui_mode, win_size, flags, self.__caption + caption, then))
+
+    def __apply_ui_mode_queue(self) -> None:
+        while self.__ui_mode_queue:
+            ui_mode, win_size, flags, caption, then = self.__ui_mode_queue.popleft()
+            self.__ui_mode = ui_mode
+            self.__pygame_window = pygame.display.set_mode(win_size if win_size is not None else self.__win_size,
+                                                           flags)
+            pygame.display.set_caption(caption)
+            if then is not None:
+                then()
+
+    def __side_window_size(self) -> tuple[int, int]:
+        return (self.__win_size[0] - (2 * self.__borders[0] + self.__board_size[0]),
+                2 * self.__borders[1] + self.__board_size[1])
+
+    def __toggle_profiler(self) -> None:
+        self.__toggle_profiler_pending = False
+        if self.__profiler is not None:
+            self.__profiler.close()
+            self.__profiler = None
+        else:
+            trace_filename: Union[None, str] = None
+            if self.__trace_directory is not None:
+                trace_filename = os.path.join(self.__trace_directory,
+                                              time.strftime("frame_trace_%Y%m%d_%H%M%S.csv"))
+            self.__profiler = FrameProfiler(trace_filename, fontname=self.__fontname)
+        self.__board_view.set_profiler(self.__profiler)
+
+    def get_profiler(self) -> Union[None, FrameProfiler]:
+        return self.__profiler
+
+    def run(self, get_events: Callable[[], list[pygame.event.Event]] = pygame.event.get) -> None:
+        # get_events is called once per frame, e.g. ui_replay records or replays the events
         self.__set_size_properties()
         while self.__run:
+            if self.__toggle_profiler_pending:
+                self.__toggle_profiler()
+            profiler: Union[None, FrameProfiler] = self.__profiler
+            if profiler is not None:
+                profiler.start_frame()
+
             # Handle events
-            for event in pygame.event.get():
+            for event in get_events():
                 if event.type == pygame.QUIT:
                     self.__quit()
                 elif event.type == pygame.VIDEORESIZE:
                     if self.__ui_mode == "main":
-                        self.__win_size = event.w, event.h
-                        self.__pygame_window = pygame.display.set_mode(self.__win_size, pygame.RESIZABLE)
-                        self.__set_size_properties()
+                        self.__pending_win_size = event.w, event.h
+                        self.__pending_resize_time = time.monotonic()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.__handle_click(pygame.mouse.get_pos())
+                    if event.button in (1, 2, 3):
+                        self.__handle_click(event.pos)
+                elif event.type == pygame.MOUSEWHEEL:
+                    self.__handle_wheel(event)
                 elif event.type == pygame.KEYDOWN:
-                    if pygame.key.get_mods() & pygame.KMOD_ALT:
+                    if event.mod & pygame.KMOD_ALT:
                         self.__alt_pressed = True
                     if event.key == pygame.K_ESCAPE:
                         self.__quit()
+                    elif event.key == pygame.K_F3:
+                        self.__toggle_profiler_pending = True
                     else:
                         self.__handle_key(event.key, event)
                 elif event.type == pygame.KEYUP:
-                    if not pygame.key.get_mods() & pygame.KMOD_ALT:
+                    if not event.mod & pygame.KMOD_ALT:
                         self.__alt_pressed = False
 
-            # Draw everything
-            self.__draw_all()
+                # Switch screens before the next event is handled
+                self.__apply_ui_mode_queue()
+
+            # Apply the window size once resizing has settled
+            if self.__pending_win_size is not None \
+                    and 1000 * (time.monotonic() - self.__pending_resize_time) >= self.__resize_delay:
+                self.__resize()
 
-            # Update the display
-            pygame.display.update()
+            if profiler is None:
+                # Draw everything
+                self.__draw_all()
+
+                # Update the display
+                pygame.display.update()
+            else:
+                profiler.lap("events")
+                self.__draw_all()
+                profiler.lap("widgets")
+                profiler.draw(self.__pygame_window)
+                profiler.lap("overlay")
+                pygame.display.update()
+                profiler.lap("update")
+                profiler.end_frame()
+
+        if self.__profiler is not None:
+            self.__profiler.close()
+        self.__solution_cache.close()
+
+    def __resize(self) -> None:
+        if self.__ui_mode == "main" and self.__pending_win_size != self.__win_size:
+            self.__win_size = self.__pending_win_size
+            self.__pygame_window = pygame.display.set_mode(self.__win_size, pygame.RESIZABLE)
+            self.__set_size_properties()
+        self.__pending_win_size = None
 
     def __lock_selected(self) -> None:
         if self.__alt_pressed:  # if option is pressed, lock all
@@ -639,116 +868,141 @@ class SudokuWindow:
                 self.__board[j][i].lock()
 
     def __solve(self) -> None:
-        sudoku: Sudoku = Sudoku(size=self.__sudoku_size, field=self.__board, rules=self.__rules,
-                                all_symbols=self.__all_symbols)
-        sudoku.solve()
+        sudoku: Sudoku = Sudoku(size=(self.__sudoku_size[1], self.__sudoku_size[0]), field=self.__board,
+                                rules=self.__rules, all_symbols=self.__all_symbols)
+        start_time: float = time.perf_counter()
+        key: str = self.__solution_cache.key(sudoku)
+        found, solution = self.__solution_cache.get(key)
+        if found:
+            if solution is not None:
+                sudoku.set_values(solution)
+            status: str = f"cached, {1e6 * (time.perf_counter() - start_time):.0f} µs"
+        else:
+            if self.__stopped_search is not None and self.__stopped_search[0] == key:
+                _, position, stats = self.__stopped_search
+            else:
+                position: SearchPosition = SearchPosition()
+                stats: SolverStats = SolverStats()
+            self.__stopped_search = None
+            try:
+                result: str = sudoku.solve_status(stats=stats, timeout=self.__solve_timeout, position=position)
+            except ValueError:
+                # sums, thermometers and non-consecutive need numeric symbols
+                return
+            if result == "budget exhausted":
+                self.__stopped_search = (key, position, stats)
+                self.__status_text = f"Stopped after {position.get_nodes()} nodes, Solve continues: " + stats.summary()
+                return
+            solution = sudoku.get_values() if result == "solved" else None
+            self.__solution_cache.put(key, solution)
+            status = stats.summary()
         self.__board = sudoku.get_field()
+        self.__reset_candidates()
+        self.__status_text = ("Solved: " if solution is not None else "No solution: ") + status
 
     def __clear(self) -> None:
         if self.__alt_pressed:
             self.__sudoku_size = self.__original_sudoku_size[:]
             self.__win_size = self.__original_win_size[:]
-            self.__all_symbols = self.__original_all_symbols[:]
-            self.__field_groups = [[self.__original_field_groups[i][j][:]
-                                    for j in range(len(self.__original_field_groups[i]))]
-                                   for i in range(len(self.__original_field_groups))]
+            self.__all_symbols = get_alphabet(self.__original_all_symbols)
+            self.__set_field_groups(self.__original_field_groups)
+            self.__field_groups_board = self.__group_labels(self.__original_field_groups)
             self.__rules = {key: value for key, value in self.__original_rules.items()}
 
+            self.__zoom = 1
+            self.__scroll = (0, 0)
             self.__set_size_properties()
         self.__board = [[SudokuSymbol(self.__all_symbols, "") for _ in range(self.__sudoku_size[0])]
                         for _ in range(self.__sudoku_size[1])]
+        self.__reset_candidates()
 
-    def __exit_side_window(self) -> None:
-        self.__set_ui_mode("main")
-        self.__pygame_window = pygame.display.set_mode(self.__win_size, pygame.RESIZABLE)
-        pygame.display.set_caption(self.__caption)
+    def __exit_side_window(self, then: Union[None, callable] = None) -> None:
+        self.__set_ui_mode("main", flags=pygame.RESIZABLE, then=then)
 
     def __io_window(self) -> None:
-        self.__set_ui_mode("io")
-        self.__pygame_window = pygame.display.set_mode(
-            (self.__win_size[0] - (2 * self.__borders[0] + self.__board_size[0]),
-             2 * self.__borders[1] + self.__board_size[1]))
-        pygame.display.set_caption(self.__caption + " Import/Export")
+        self.__set_ui_mode("io", self.__side_window_size(), caption=" Import/Export")
 
     def __import_window(self) -> None:
-        self.__set_ui_mode("in")
-        self.__pygame_window = pygame.display.set_mode(
-            (self.__win_size[0] - (2 * self.__borders[0] + self.__board_size[0]),
-             2 * self.__borders[1] + self.__board_size[1]))
-        pygame.display.set_caption(self.__caption + " Import")
+        self.__set_ui_mode("in", self.__side_window_size(), caption=" Import")
 
     def __export_window(self) -> None:
-        self.__set_ui_mode("out")
-        self.__pygame_window = pygame.display.set_mode(
-            (self.__win_size[0] - (2 * self.__borders[0] + self.__board_size[0]),
-             2 * self.__borders[1] + self.__board_size[1]))
-        pygame.display.set_caption(self.__caption + " Export")
+        self.__set_ui_mode("out", self.__side_window_size(), caption=" Export")
 
     def __size_change_1(self) -> None:
-        self.__set_ui_mode("size_change_1")
-        self.__pygame_window = pygame.display.set_mode(
-            (self.__win_size[0] - (2 * self.__borders[0] + self.__board_size[0]),
-             2 * self.__borders[1] + self.__board_size[1]))
-        pygame.display.set_caption(self.__caption + " - Change Size")
+        self.__set_ui_mode("size_change_1", self.__side_window_size(), caption=" - Change Size")
 
     def __size_change_2(self) -> None:
         try:
-            sudoku_size_temp: tuple[int, int] = (int(self.__size_change_1_clickable[1].get_text()),
-                                                 int(self.__size_change_1_clickable[2].get_text()))
+            sudoku_size_temp: tuple[int, int] = (int(self.__side_widgets("size_change_1")[1].get_text()),
+                                                 int(self.__side_widgets("size_change_1")[2].get_text()))
 
-            self.__size_change_2_clickable[1].set_text(",".join([str(i + 1) for i in range(max(sudoku_size_temp))]))
+            self.__side_widgets("size_change_2")[1].set_text(",".join([str(i + 1)
+                                                                       for i in range(max(sudoku_size_temp))]))
 
-            self.__set_ui_mode("size_change_2")
-            self.__pygame_window = pygame.display.set_mode(
-                (self.__win_size[0] - (2 * self.__borders[0] + self.__board_size[0]),
-                 2 * self.__borders[1] + self.__board_size[1]))
-            pygame.display.set_caption(self.__caption + " - Change Size")
+            self.__set_ui_mode("size_change_2", self.__side_window_size(), caption=" - Change Size")
         except ValueError:
             pass
 
     def __size_change_3(self) -> None:
         try:
             # Set stuff from first page:
-            self.__sudoku_size = (int(self.__size_change_1_clickable[1].get_text()),
-                                  int(self.__size_change_1_clickable[2].get_text()))
+            self.__sudoku_size = (int(self.__side_widgets("size_change_1")[1].get_text()),
+                                  int(self.__side_widgets("size_change_1")[2].get_text()))
 
             # Set stuff from second page:
-            all_symbols_temp: Union[list[str], None, str] = self.__size_change_2_clickable[1].get_text().split(",")
+            all_symbols_temp: Union[list[str], None, str] = \
+                self.__side_widgets("size_change_2")[1].get_text().split(",")
             if all_symbols_temp is None or all_symbols_temp == "":
-                self.__all_symbols = [str(i + 1) for i in range(max(self.__sudoku_size))]
+                symbols: list[str] = [str(i + 1) for i in range(max(self.__sudoku_size))]
             else:
-                self.__all_symbols = [str(i).strip() for i in all_symbols_temp]
+                symbols = [str(i).strip() for i in all_symbols_temp]
             try:
-                self.__all_symbols = [int(symbol) for symbol in self.__all_symbols]
-                self.__all_symbols.sort()
-                self.__all_symbols = [str(symbol) for symbol in self.__all_symbols]
+                symbols = [str(symbol) for symbol in sorted(int(symbol) for symbol in symbols)]
             except ValueError:
-                self.__all_symbols.sort()
+                symbols.sort()
+            self.__all_symbols = get_alphabet(symbols)
 
-            self.__board = [[SudokuSymbol(all_symbols_temp, "0")
+            self.__board = [[SudokuSymbol(self.__all_symbols, "0")
                              for _ in range(self.__sudoku_size[0])]
                             for _ in range(self.__sudoku_size[1])]
+            self.__reset_candidates()
 
             self.__set_standard_field_groups()
 
+            self.__zoom = 1
+            self.__scroll = (0, 0)
             self.__set_size_properties(leave_win_size=True)
 
-            self.__set_ui_mode("size_change_3")
-            self.__pygame_window = pygame.display.set_mode(self.__win_size)
-            pygame.display.set_caption(self.__caption + " - Change Size")
+            self.__set_ui_mode("size_change_3", self.__win_size, caption=" - Change Size")
         except TypeError:
             pass
 
     def __size_change_4(self) -> None:
         # Set stuff from third page:
-        rules: dict[str, bool] = dict()
-        for clickable in self.__size_change_3_clickable:
+        rules: dict[str, Union[bool, list[Constraint]]] = dict()
+        constraints: list[Constraint] = []
+        for clickable in self.__side_widgets("size_change_3"):
             if type(clickable) == Checkbox:
-                rules[clickable.get_text().lower()] = clickable.get_checked()
+                if clickable.get_text() == "Anti-Knight":
+                    if clickable.get_checked():
+                        constraints.append(AntiKnight())
+                elif clickable.get_text() == "Non-Consecutive":
+                    if clickable.get_checked():
+                        constraints.append(NonConsecutive())
+                else:
+                    rules[clickable.get_text().lower()] = clickable.get_checked()
+            elif type(clickable) == Textfield:
+                try:
+                    if clickable.get_placeholder().startswith("Killer Cages"):
+                        constraints += KillerCage.parse(clickable.get_text())
+                    else:
+                        constraints += Thermometer.parse(clickable.get_text())
+                except ValueError:
+                    pass
+        rules["constraints"] = constraints
         self.__set_rules(rules)
 
-        self.__exit_side_window()
-        self.__set_size_properties()
+        self.__exit_side_window(then=self.__set_size_properties)
 
     def __in_standard(self) -> None:
         if not self.__file_select_breaks:
@@ -761,6 +1015,7 @@ class SudokuWindow:
         sudoku: Sudoku = Sudoku(size=self.__sudoku_size, field_string=contents)
         sudoku.lock_filled()
         self.__board = sudoku.get_field()
+        self.__reset_candidates()
         self.__exit_side_window()
 
     def __in_sudokustring(self) -> None:
@@ -773,6 +1028,7 @@ class SudokuWindow:
         sudoku: Sudoku = Sudoku(size=self.__sudoku_size, field_string=contents)
         sudoku.lock_filled()
         self.__board = sudoku.get_field()
+        self.__reset_candidates()
         self.__exit_side_window()
 
     def __in_square(self) -> None:
@@ -786,6 +1042,7 @@ class SudokuWindow:
         sudoku: Sudoku = Sudoku(size=self.__sudoku_size, field_string=contents)
         sudoku.lock_filled()
         self.__board = sudoku.get_field()
+        self.__reset_candidates()
         self.__exit_side_window()
 
     def __out_standard(self) -> None:
@@ -0,0 +1,262 @@
+import math
+import pygame
+from ui_font import get_font
+from symbol import SudokuSymbol
+from alphabet import Alphabet, get_alphabet
+from group_symbol import GroupSymbol
+from ui_profiler import FrameProfiler
+from typing import Callable, Hashable, Union
+
+
+# Draws a sudoku board, cell_groups maps (column, row) to the field group of the cell
+class Board:
+    def __init__(self, window: pygame.Surface, fontname: str = "Arial", thin_thickness_factor: float = 1 / 58,
+                 thick_thickness_factor: float = 3 / 58, selected_thickness_factor: float = 4 / 58,
+                 notes_color: str = "grey50", conflict_color: str = "red",
+                 highlight_color: str = "gray83") -> None:
+        self.__window: pygame.Surface = window
+
+        self.__board_size_properties: tuple[tuple[int, int], int] = ((0, 0), 0)
+
+        self.__x: int = self.__board_size_properties[0][0]
+        self.__y: int = self.__board_size_properties[0][1]
+        self.__cell_size: int = self.__board_size_properties[1]
+
+        # part of the window the board may be drawn in, None draws the whole board
+        self.__viewport: Union[None, pygame.Rect] = None
+
+        self.__fontname: str = fontname
+        self.__notes_color: str = notes_color
+        self.__conflict_color: str = conflict_color
+        self.__highlight_color: str = highlight_color
+        self.__all_symbols: Alphabet = get_alphabet([])
+
+        self.__thin_thickness_factor: float = thin_thickness_factor
+        self.__thick_thickness_factor: float = thick_thickness_factor
+        self.__selected_thickness_factor: float = selected_thickness_factor
+
+        self.__thin_thickness: int = 0
+        self.__thick_thickness: int = 0
+        self.__selected_thickness: int = 0
+
+        self.__font_size: int = 0
+        self.__font: pygame.font.Font = get_font(self.__fontname, self.__font_size)
+
+        self.__notes_cols: int = 0
+        self.__notes_rows: int = 0
+        self.__notes_distance_x: int = 0
+        self.__notes_distance_y: int = 0
+
+        self.__font_size_notes: int = 0
+        self.__font_notes: pygame.font.Font = get_font(self.__fontname, self.__font_size_notes)
+
+        # rendered symbols and notes, valid as long as the fonts don't change
+        self.__glyphs: dict[tuple[str, str], pygame.Surface] = {}
+        self.__note_glyphs: dict[str, pygame.Surface] = {}
+
+        # gets the "cells" and "borders" laps of a frame while profiling
+        self.__profiler: Union[None, FrameProfiler] = None
+
+    def set_profiler(self, profiler: Union[None, FrameProfiler]) -> None:
+        self.__profiler = profiler
+
+    def set_window(self, window: pygame.Surface) -> None:
+        self.__window = window
+
+    def set_size_properties(self, board_size_properties: tuple[tuple[int, int], int],
+                            all_symbols: Union[Alphabet, list[str]]) -> None:
+        cell_size_changed: bool = (board_size_properties[1] != self.__cell_size
+                                   or len(all_symbols) != len(self.__all_symbols))
+        self.__board_size_properties = board_size_properties
+
+        self.__x = self.__board_size_properties[0][0]
+        self.__y = self.__board_size_properties[0][1]
+        self.__cell_size = self.__board_size_properties[1]
+        self.__all_symbols = get_alphabet(all_symbols)
+
+        # Scrolling only moves the board, fonts and line widths stay the same
+        if not cell_size_changed and self.__font_size:
+            return
+
+        # Change line thickness
+        self.__thin_thickness = math.ceil(self.__thin_thickness_factor * self.__cell_size)
+        self.__thick_thickness = math.ceil(self.__thick_thickness_factor * self.__cell_size)
+        self.__selected_thickness = math.ceil(self.__selected_thickness_factor * self.__cell_size)
+
+        # Change font (main symbols)
+        self.__font_size = int(self.__cell_size / 52 * 36)
+        self.__font = get_font(self.__fontname, self.__font_size)
+
+        # Note dimensions
+        self.__notes_cols = max(1, math.ceil(math.sqrt(len(self.__all_symbols))))
+        self.__notes_rows = max(1, math.ceil(len(self.__all_symbols) / self.__notes_cols))
+        self.__notes_distance_x = round((self.__cell_size - self.__thin_thickness) / (2 * self.__notes_cols))
+        self.__notes_distance_y = round((self.__cell_size - self.__thin_thickness) / (2 * self.__notes_rows))
+
+        # Font (notes)
+        self.__font_size_notes = int(1.6 * self.__notes_distance_y)
+        self.__font_notes = get_font(self.__fontname, self.__font_size_notes)
+
+        self.__glyphs = {}
+        self.__note_glyphs = {}
+
+    def __get_glyph(self, symbol: str, color: str) -> pygame.Surface:
+        glyph: Union[None, pygame.Surface] = self.__glyphs.get((symbol, color))
+        if glyph is None:
+            glyph = self.__font.render(symbol, True, color)
+            self.__glyphs[(symbol, color)] = glyph
+        return glyph
+
+    def __get_note_glyph(self, note: str) -> pygame.Surface:
+        glyph: Union[None, pygame.Surface] = self.__note_glyphs.get(note)
+        if glyph is None:
+            glyph = self.__font_notes.render(note, True, self.__notes_color)
+            self.__note_glyphs[note] = glyph
+        return glyph
+
+    def set_viewport(self, viewport: Union[None, tuple[int, int, int, int]]) -> None:
+        self.__viewport = pygame.Rect(viewport) if viewport is not None else None
+
+    def get_cell(self, pos: tuple[int, int], sudoku_size: tuple[int, int]) -> Union[None, tuple[int, int]]:
+        if self.__viewport is not None and not self.__viewport.collidepoint(pos):
+            return None
+        i: int = int((pos[0] - self.__x) // self.__cell_size)
+        j: int = int((pos[1] - self.__y) // self.__cell_size)
+        if 0 <= i < sudoku_size[0] and 0 <= j < sudoku_size[1]:
+            return i, j
+        return None
+
+    def __visible_range(self, sudoku_size: tuple[int, int]) -> tuple[range, range]:
+        if self.__viewport is None or self.__cell_size <= 0:
+            return range(sudoku_size[0]), range(sudoku_size[1])
+        first_i: int = max(0, (self.__viewport.left - self.__x) // self.__cell_size)
+        first_j: int = max(0, (self.__viewport.top - self.__y) // self.__cell_size)
+        last_i: int = min(sudoku_size[0], -(-(self.__viewport.right - self.__x) // self.__cell_size))
+        last_j: int = min(sudoku_size[1], -(-(self.__viewport.bottom - self.__y) // self.__cell_size))
+        return range(first_i, last_i), range(first_j, last_j)
+
+    def get_thicknesses(self) -> tuple[int, int, int]:
+        return self.__thin_thickness, self.__thick_thickness, self.__selected_thickness
+
+    def draw_cells(self, board: Union[list[list[SudokuSymbol]], list[list[GroupSymbol]]],
+                   conflict: Union[None, Callable[[int, int, str], bool]] = None,
+                   auto_notes: Union[None, Callable[[int, int], int]] = None,
+                   highlighted: Union[None, set[tuple[int, int]]] = None) -> None:
+        cols, rows = self.__visible_range(((len(board[0]) if board else 0), len(board)))
+        for j in rows:
+            row: Union[list[SudokuSymbol], list[GroupSymbol]] = board[j]
+            for i in cols:
+                cell: Union[SudokuSymbol, GroupSymbol] = row[i]
+                x: int = self.__x + i * self.__cell_size
+                y: int = self.__y + j * self.__cell_size
+                background: str = "white" if not highlighted or (i, j) not in highlighted else self.__highlight_color
+                pygame.draw.rect(self.__window, background, (x, y, self.__cell_size, self.__cell_size))
+                render: Union[None, tuple[str, str], tuple[None, None], list[str]] = cell.__format__()
+                if type(render) == tuple:
+                    if render[0] is not None:
+                        color: str = render[1]
+                        if conflict is not None and conflict(i, j, render[0]):
+                            color = self.__conflict_color
+                        text: pygame.Surface = self.__get_glyph(render[0], color)
+                        coordinates: tuple[int, int] = (int(x + (self.__cell_size + self.__thin_thickness
+                                                                 - text.get_width()) / 2),
+                                                        int(y + (self.__cell_size + self.__thin_thickness
+                                                                 - text.get_height()) / 2))
+                        self.__window.blit(text, coordinates)
+                elif auto_notes is not None:
+                    # candidates as bitmask, bit n stands for all_symbols[n]
+                    mask: int = auto_notes(i, j)
+                    while mask:
+                        n: int = (mask & -mask).bit_length() - 1
+                        mask &= mask - 1
+                        self.__draw_note(x, y, n)
+                elif type(render) == list:
+                    for note in render:
+                        n: int = self.__all_symbols.get_index(note)
+                        if n >= 0:
+                            self.__draw_note(x, y, n)
+
+    def __draw_note(self, x: int, y: int, n: int) -> None:
+        n_j, n_i = divmod(n, self.__notes_cols)
+        note_x = x + self.__thin_thickness + self.__notes_distance_x * (2 * n_i + 1)
+        note_y = y + self.__thin_thickness + self.__notes_distance_y * (2 * n_j + 1)
+        text: pygame.Surface = self.__get_note_glyph(self.__all_symbols[n])
+        coordinates = (int(note_x - text.get_width() / 2), int(note_y - text.get_height() / 2))
+        self.__window.blit(text, coordinates)
+
+    def draw_borders(self, sudoku_size: tuple[int, int], cell_groups: dict[tuple[int, int], Hashable]) -> None:
+        board_size: tuple[int, int] = self.__cell_size * sudoku_size[0], self.__cell_size * sudoku_size[1]
+
+        # Draw the outer borders
+        pygame.draw.line(self.__window, "black", (self.__x, self.__y),
+                         (self.__x, self.__y + board_size[1]), self.__thick_thickness)
+        pygame.draw.line(self.__window, "black", (self.__x + board_size[0], self.__y),
+                         (self.__x + board_size[0], self.__y + board_size[1]), self.__thick_thickness)
+        pygame.draw.line(self.__window, "black", (self.__x, self.__y),
+                         (self.__x + board_size[0], self.__y), self.__thick_thickness)
+        pygame.draw.line(self.__window, "black", (self.__x, self.__y + board_size[1]),
+                         (self.__x + board_size[0], self.__y + board_size[1]), self.__thick_thickness)
+
+        # Only the lines around visible cells are drawn
+        cols, rows = self.__visible_range(sudoku_size)
+        first_i: int = max(0, cols.start - 1)
+        first_j: int = max(0, rows.start - 1)
+
+        # Draw the inner vertical lines
+        for i in range(first_i, min(cols.stop, sudoku_size[0] - 1)):
+            for j in rows:
+                group: Union[None, Hashable] = cell_groups.get((i, j))
+                thickness: int = self.__thin_thickness if group is not None and group == cell_groups.get((i + 1, j)) \
+                    else self.__thick_thickness
+                pygame.draw.line(self.__window, "black",
+                                 (self.__x + (i + 1) * self.__cell_size, self.__y + j * self.__cell_size),
+                                 (self.__x + (i + 1) * self.__cell_size, self.__y + (j + 1) * self.__cell_size),
+                                 thickness)
+
+        # Draw the inner horizontal lines
+        for i in range(first_j, min(rows.stop, sudoku_size[1] - 1)):
+            for j in cols:
+                group: Union[None, Hashable] = cell_groups.get((j, i))
+                thickness: int = self.__thin_thickness if group is not None and group == cell_groups.get((j, i + 1)) \
+                    else self.__thick_thickness
+                pygame.draw.line(self.__window, "black",
+                                 (self.__x + j * self.__cell_size, self.__y + (i + 1) * self.__cell_size),
+                                 (self.__x + (j + 1) * self.__cell_size, self.__y + (i + 1) * self.__cell_size),
+                                 thickness)
+
+    def draw_selected(self, selected: Union[None, tuple[int, int]]) -> None:
+        if selected is not None:
+            x = self.__x + selected[0] * self.__cell_size
+            y = self.__y + selected[1] * self.__cell_size
+            pygame.draw.rect(self.__window, "red",
+                             (x, y, self.__cell_size + self.__thin_thickness, self.__cell_size + self.__thin_thickness),
+                             self.__selected_thickness)
+
+    def draw(self, board: Union[list[list[SudokuSymbol]], list[list[GroupSymbol]]],
+             cell_groups: dict[tuple[int, int], Hashable], selected: Union[None, tuple[int, int]] = None,
+             conflict: Union[None, Callable[[int, int, str], bool]] = None,
+             auto_notes: Union[None, Callable[[int, int], int]] = None,
+             highlighted: Union[None, set[tuple[int, int]]] = None) -> None:
+        sudoku_size: tuple[int, int] = (len(board[0]) if board else 0), len(board)
+        if self.__profiler is not None:
+            self.__profiler.lap("widgets")
+        clip: pygame.Rect = self.__window.get_clip()
+        if self.__viewport is not None:
+            self.__window.set_clip(self.__viewport)
+        self.draw_cells(board, conflict=conflict, auto_notes=auto_notes, highlighted=highlighted)
+        if self.__profiler is not None:
+            self.__profiler.lap("cells")
+        if self.__viewport is not None:
+            # leave room for the outer border and the selection, which reach past the cells
+            self.__window.set_clip(self.__viewport.inflate(2 * self.__selected_thickness,
+                                                           2 * self.__selected_thickness))
+        self.draw_borders(sudoku_size, cell_groups)
+        if self.__viewport is not None:
+            # frame the viewport, as the outer borders may be scrolled out of it
+            pygame.draw.rect(self.__window, "black", self.__viewport.inflate(self.__thick_thickness // 2 * 2,
+                                                                             self.__thick_thickness // 2 * 2),
+                             self.__thick_thickness)
+        self.draw_selected(selected)
+        self.__window.set_clip(clip)
+        if self.__profiler is not None:
+            self.__profiler.lap("borders")
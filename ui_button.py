@@ -1,4 +1,5 @@
 import pygame
+from ui_font import get_font
 from typing import Union
 
 
@@ -21,13 +22,18 @@ class Button:
         self.__font_size: int = self.__button_size_properties[2]
         self.__textcolor: str = textcolor
 
+        # font size and rendered text are kept until size or text change
+        self.__cache_key: Union[None, tuple[int, int, Union[None, int], str]] = None
+        self.__text_font_size: int = 0
+        self.__text_surface: Union[None, pygame.Surface] = None
+
     def __get_font_size(self) -> int:
         font_size: float = 0.7 * self.__height
-        font: pygame.font.Font = pygame.font.SysFont(self.__fontname, int(font_size))
+        font: pygame.font.Font = get_font(self.__fontname, int(font_size))
         text: pygame.Surface = font.render(self.__text, True, self.__textcolor)
         while text.get_width() > self.__width - 0.5 * self.__height:
             font_size *= 0.99
-            font = pygame.font.SysFont(self.__fontname, int(font_size))
+            font = get_font(self.__fontname, int(font_size))
             text = font.render(self.__text, True, self.__textcolor)
         return int(font_size)
 
@@ -44,11 +50,17 @@ class Button:
         if text is not None:
             self.__text = text
 
-        if self.__font_size is None:
-            self.__font_size = self.__get_font_size()
-
-        font: pygame.font.Font = pygame.font.SysFont(self.__fontname, self.__font_size)
-        text: pygame.Surface = font.render(self.__text, True, self.__textcolor)
+        cache_key: tuple[int, int, Union[None, int], str] = (self.__width, self.__height, self.__font_size,
+                                                             self.__text)
+        if cache_key != self.__cache_key:
+            if self.__font_size is None:
+                self.__font_size = self.__get_font_size()
+            font: pygame.font.Font = get_font(self.__fontname, self.__font_size)
+            self.__text_surface = font.render(self.__text, True, self.__textcolor)
+            self.__text_font_size = self.__font_size
+            self.__cache_key = cache_key
+        self.__font_size = self.__text_font_size
+        text: pygame.Surface = self.__text_surface
 
         pygame.draw.rect(self.__window, self.__color, (self.__x, self.__y, self.__width, self.__height))
 
@@ -0,0 +1,31 @@
+import threading
+import pygame
+from functools import lru_cache
+
+
+# held while the system font list is built, so it's only built once when warm_fonts and get_font overlap
+_font_list_lock: threading.Lock = threading.Lock()
+
+
+# sizes in use at the same time (board, notes, buttons, hint line), resizing the window keeps asking for new sizes
+@lru_cache(maxsize=32)
+def get_font(fontname: str, size: int) -> pygame.font.Font:
+    # pygame.font.SysFont looks up and loads the font file on every call
+    with _font_list_lock:
+        return pygame.font.SysFont(fontname, size)
+
+
+def warm_fonts(fontname: str) -> threading.Thread:
+    # builds the system font list (a slow scan of the installed fonts on first use) and looks up the font file in the
+    # background, doesn't need pygame.font.init
+    def warm() -> None:
+        with _font_list_lock:
+            pygame.font.match_font(fontname)
+
+    thread: threading.Thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
+
+
+def clear_fonts() -> None:
+    get_font.cache_clear()
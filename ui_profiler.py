@@ -0,0 +1,103 @@
+import csv
+import math
+import time
+import pygame
+from collections import deque
+from ui_font import get_font
+from typing import IO, Union
+
+
+# frame phases in the order of the CSV columns, see SudokuWindow.run
+PHASES: tuple[str, ...] = ("events", "cells", "borders", "widgets", "overlay", "update")
+
+
+# Times the phases of each frame. The frame is split into laps: lap(phase) adds the time since the previous lap to
+# phase, so the phases of a frame add up to the frame time. Keeps the last frames for the overlay and writes one CSV
+# row per frame if a trace file is given.
+class FrameProfiler:
+    def __init__(self, trace_filename: Union[None, str] = None, window: int = 240, fontname: str = "Arial",
+                 font_size: int = 14) -> None:
+        self.__window: int = window
+        self.__fontname: str = fontname
+        self.__font_size: int = font_size
+
+        self.__frame: int = 0
+        self.__start_time: float = time.perf_counter()
+        # None outside of a frame, laps are ignored then
+        self.__frame_start: Union[None, float] = None
+        self.__last_lap: float = 0.0
+        self.__phases: dict[str, float] = {}
+
+        # frame times and phase times of the last frames in seconds
+        self.__frame_times: deque[float] = deque(maxlen=window)
+        self.__phase_times: dict[str, deque[float]] = {phase: deque(maxlen=window) for phase in PHASES}
+
+        self.__trace: Union[None, IO[str]] = None
+        self.__writer = None
+        if trace_filename is not None:
+            self.__trace = open(trace_filename, "w", newline="")
+            self.__writer = csv.writer(self.__trace)
+            self.__writer.writerow(["frame", "start_ms", "frame_ms"] + [f"{phase}_ms" for phase in PHASES])
+
+    def start_frame(self) -> None:
+        self.__frame_start = self.__last_lap = time.perf_counter()
+        self.__phases = dict.fromkeys(PHASES, 0.0)
+
+    def lap(self, phase: str) -> None:
+        if self.__frame_start is None:
+            return
+        now: float = time.perf_counter()
+        self.__phases[phase] += now - self.__last_lap
+        self.__last_lap = now
+
+    def end_frame(self) -> None:
+        if self.__frame_start is None:
+            return
+        frame_time: float = self.__last_lap - self.__frame_start
+        self.__frame_times.append(frame_time)
+        for phase, seconds in self.__phases.items():
+            self.__phase_times[phase].append(seconds)
+        if self.__writer is not None:
+            self.__writer.writerow([self.__frame, f"{1000 * (self.__frame_start - self.__start_time):.3f}",
+                                    f"{1000 * frame_time:.3f}"]
+                                   + [f"{1000 * self.__phases[phase]:.3f}" for phase in PHASES])
+        self.__frame += 1
+        self.__frame_start = None
+
+    def percentiles(self, percents: tuple[int, ...] = (50, 90, 99)) -> list[float]:
+        # frame times in seconds of the last frames, nearest rank
+        times: list[float] = sorted(self.__frame_times)
+        if not times:
+            return [0.0 for _ in percents]
+        return [times[min(len(times) - 1, max(0, math.ceil(percent / 100 * len(times)) - 1))]
+                for percent in percents]
+
+    def means(self) -> dict[str, float]:
+        # mean time in seconds per phase over the last frames
+        return {phase: sum(times) / len(times) if times else 0.0 for phase, times in self.__phase_times.items()}
+
+    def draw(self, window: pygame.Surface) -> None:
+        # overlay in the top right corner of the window
+        p50, p90, p99 = self.percentiles()
+        fps: float = len(self.__frame_times) / max(sum(self.__frame_times), 1e-9)
+        lines: list[str] = [f"frame {1000 * p50:.1f} / {1000 * p90:.1f} / {1000 * p99:.1f} ms (p50/p90/p99)",
+                            f"{fps:.0f} fps without waiting"]
+        lines += [f"{phase} {1000 * seconds:.2f} ms" for phase, seconds in self.means().items()]
+        font: pygame.font.Font = get_font(self.__fontname, self.__font_size)
+        texts: list[pygame.Surface] = [font.render(line, True, "white") for line in lines]
+        width: int = max(text.get_width() for text in texts) + 10
+        height: int = sum(text.get_height() for text in texts) + 10
+        background: pygame.Surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        background.fill((0, 0, 0, 180))
+        x: int = window.get_width() - width
+        window.blit(background, (x, 0))
+        y: int = 5
+        for text in texts:
+            window.blit(text, (x + 5, y))
+            y += text.get_height()
+
+    def close(self) -> None:
+        if self.__trace is not None:
+            self.__trace.close()
+            self.__trace = None
+            self.__writer = None
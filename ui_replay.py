@@ -0,0 +1,148 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import deque
+import pygame
+from typing import IO
+
+
+# Records the events SudokuWindow.run handles to a JSON lines file and replays them without a display at full speed.
+# The replay hands the window one event per frame and measures the time until it asks for the next one, i.e. handling
+# the event, drawing and updating the display. Wheel events get the modifier keys and mouse position of the recording,
+# the other events carry them already.
+RECORDED_EVENTS: tuple[int, ...] = (pygame.QUIT, pygame.VIDEORESIZE, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL,
+                                    pygame.KEYDOWN, pygame.KEYUP)
+_EVENT_TYPES: dict[str, int] = {pygame.event.event_name(event_type): event_type for event_type in RECORDED_EVENTS}
+
+
+class EventRecorder:
+    # use as get_events of SudokuWindow.run
+    def __init__(self, filename: str) -> None:
+        self.__file: IO[str] = open(filename, "w")
+        self.__start_time: float = time.monotonic()
+
+    def __call__(self) -> list[pygame.event.Event]:
+        events: list[pygame.event.Event] = pygame.event.get()
+        seconds: float = time.monotonic() - self.__start_time
+        for event in events:
+            if event.type not in RECORDED_EVENTS:
+                continue
+            # only attributes that survive JSON, e.g. not the window of the event
+            attributes: dict = {name: list(value) if type(value) == tuple else value
+                                for name, value in event.dict.items()
+                                if type(value) in (int, float, str, bool, tuple)}
+            if event.type == pygame.MOUSEWHEEL:
+                attributes["mod"] = pygame.key.get_mods()
+                attributes["pos"] = list(pygame.mouse.get_pos())
+            self.__file.write(json.dumps({"time": round(seconds, 4), "type": pygame.event.event_name(event.type),
+                                          "attributes": attributes}) + "\n")
+        return events
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+def read_events(filename: str) -> list[pygame.event.Event]:
+    events: list[pygame.event.Event] = []
+    with open(filename, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record: dict = json.loads(line)
+            attributes: dict = {name: tuple(value) if type(value) == list else value
+                                for name, value in record["attributes"].items()}
+            events.append(pygame.event.Event(_EVENT_TYPES[record["type"]], attributes))
+    return events
+
+
+def event_category(event: pygame.event.Event, by_key: bool = False) -> str:
+    # the event type, with by_key also the key of key events, e.g. "KeyDown right"
+    name: str = pygame.event.event_name(event.type)
+    if by_key and event.type in (pygame.KEYDOWN, pygame.KEYUP):
+        return f"{name} {pygame.key.name(event.key)}"
+    return name
+
+
+def replay(events: list[pygame.event.Event], by_key: bool = False, **window_options) -> dict[str, list[float]]:
+    # latencies in seconds per event category, the window starts like a new SudokuWindow with window_options
+    # ui is imported here, so the SDL driver can be chosen before
+    from ui import SudokuWindow
+    window: SudokuWindow = SudokuWindow(**{"solution_cache_filename": None, "trace_directory": None,
+                                           "resize_delay": 0, **window_options})
+    remaining: deque[pygame.event.Event] = deque(events)
+    latencies: dict[str, list[float]] = {}
+    # category and start time of the event of the current frame
+    current: list[tuple[str, float]] = []
+
+    def next_events() -> list[pygame.event.Event]:
+        end_time: float = time.perf_counter()
+        if current:
+            category, start_time = current.pop()
+            latencies.setdefault(category, []).append(end_time - start_time)
+        pygame.event.pump()
+        if not remaining:
+            return [pygame.event.Event(pygame.QUIT)]
+        event: pygame.event.Event = remaining.popleft()
+        current.append((event_category(event, by_key), time.perf_counter()))
+        return [event]
+
+    window.run(next_events)
+    return latencies
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))] if ordered else 0.0
+
+
+def report(latencies: dict[str, list[float]]) -> str:
+    lines: list[str] = [f"{'event':<24}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)"]
+    for category, values in sorted(latencies.items()):
+        lines.append(f"{category:<24}{len(values):>8}{1000 * sum(values) / len(values):>10.2f}"
+                     f"{1000 * _percentile(values, 50):>10.2f}{1000 * _percentile(values, 90):>10.2f}"
+                     f"{1000 * _percentile(values, 99):>10.2f}{1000 * max(values):>10.2f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record the events of a Sudoku window, or replay them and report "
+                                                 "the latency until the frame of each event is on the display.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="open the window and record its events")
+    record_parser.add_argument("filename")
+    replay_parser = commands.add_parser("replay", help="replay recorded events without a display")
+    replay_parser.add_argument("filename")
+    replay_parser.add_argument("--repeat", type=int, default=1, help="replays, each in a new window")
+    replay_parser.add_argument("--by-key", action="store_true", help="report key events per key")
+    replay_parser.add_argument("--display", action="store_true", help="use the display instead of SDL's dummy driver")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        from ui import SudokuWindow
+        recorder: EventRecorder = EventRecorder(args.filename)
+        try:
+            SudokuWindow(file_select_breaks=True).run(recorder)
+        finally:
+            recorder.close()
+            SudokuWindow.quit()
+        return
+
+    if not args.display:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    events: list[pygame.event.Event] = read_events(args.filename)
+    latencies: dict[str, list[float]] = {}
+    start_time: float = time.perf_counter()
+    for _ in range(args.repeat):
+        for category, values in replay(events, args.by_key, file_select_breaks=True).items():
+            latencies.setdefault(category, []).extend(values)
+    end_time: float = time.perf_counter()
+    frames: int = sum(len(values) for values in latencies.values())
+    print(f"Replayed {frames} events in {end_time - start_time:.2f} seconds "
+          f"({frames / max(end_time - start_time, 1e-9):.1f} events per second)")
+    print(report(latencies))
+
+
+if __name__ == "__main__":
+    main()
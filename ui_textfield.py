@@ -1,4 +1,7 @@
+import time
 import pygame
+from ui_font import get_font
+from typing import Union
 
 
 class Textfield:
@@ -27,16 +30,21 @@ class Textfield:
 
         self.__active: bool = False
 
+        # font size and rendered text are kept until size or text change
+        self.__cache_key: Union[None, tuple[int, int, Union[None, int], str]] = None
+        self.__text_font_size: int = 0
+        self.__text_surface: Union[None, tuple[pygame.font.Font, pygame.Surface]] = None
+
     def __get_font_size(self) -> int:
         font_size: float = 0.8 * self.__height
-        font: pygame.font.Font = pygame.font.SysFont(self.__fontname, int(font_size))
+        font: pygame.font.Font = get_font(self.__fontname, int(font_size))
         if self.__text:
             text: pygame.Surface = font.render(self.__text, True, self.__textcolor)
         else:
             text: pygame.Surface = font.render(self.__placeholder, True, self.__placeholder_color)
         while text.get_width() > self.__width - 0.5 * self.__height:
             font_size *= 0.99
-            font = pygame.font.SysFont(self.__fontname, int(font_size))
+            font = get_font(self.__fontname, int(font_size))
             if self.__text:
                 text = font.render(self.__text, True, self.__textcolor)
             else:
@@ -44,10 +52,13 @@ class Textfield:
         return int(font_size)
 
     def __get_text_surface(self) -> tuple[pygame.font, pygame.Surface]:
-        font: pygame.font.Font = pygame.font.SysFont(self.__fontname, self.__font_size)
-        if self.__text:
-            return font, font.render(self.__text, True, self.__textcolor)
-        return font, font.render(self.__placeholder, True, self.__placeholder_color)
+        if self.__text_surface is None:
+            font: pygame.font.Font = get_font(self.__fontname, self.__font_size)
+            if self.__text:
+                self.__text_surface = font, font.render(self.__text, True, self.__textcolor)
+            else:
+                self.__text_surface = font, font.render(self.__placeholder, True, self.__placeholder_color)
+        return self.__text_surface
 
     def __get_cursor_rect(self) -> pygame.Rect:
         font, text_surface = self.__get_text_surface()
@@ -69,8 +80,15 @@ class Textfield:
         self.__height = self.__textfield_size_properties[1][1]
         self.__font_size = self.__textfield_size_properties[2]
 
-        if self.__font_size is None:
-            self.__font_size = self.__get_font_size()
+        cache_key: tuple[int, int, Union[None, int], str] = (self.__width, self.__height, self.__font_size,
+                                                             self.__text)
+        if cache_key != self.__cache_key:
+            if self.__font_size is None:
+                self.__font_size = self.__get_font_size()
+            self.__text_font_size = self.__font_size
+            self.__text_surface = None
+            self.__cache_key = cache_key
+        self.__font_size = self.__text_font_size
 
         _, text_surface = self.__get_text_surface()
 
@@ -84,7 +102,7 @@ class Textfield:
         self.__window.blit(text_surface,
                            (self.__x + 0.25 * self.__height, self.__y + (self.__height - self.__font_size) / 2))
 
-        if pygame.time.get_ticks() % 1000 < 500 and self.__active:
+        if time.monotonic() % 1 < 0.5 and self.__active:
             self.__draw_cursor()
 
     def clicked(self, pos) -> bool:
@@ -122,3 +140,6 @@ class Textfield:
 
     def get_text(self) -> str:
         return self.__text
+
+    def get_placeholder(self) -> str:
+        return self.__placeholder
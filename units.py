@@ -0,0 +1,129 @@
+import argparse
+from typing import Union
+
+
+# Cells that must not repeat a symbol, built from a rules dict as used by Sudoku and SudokuWindow.
+# Cells are numbered row by row (index = j * width + i), field groups list their cells as (i, j) = (column, row)
+# like SudokuWindow does.
+class Units:
+    def __init__(self, sudoku_size: tuple[int, int],
+                 rules: dict[str, Union[None, bool, list[list[tuple[int, int]]]]]) -> None:
+        self.__width: int = sudoku_size[0]
+        self.__height: int = sudoku_size[1]
+
+        self.__units: list[tuple[int, ...]] = []
+        self.__unit_types: list[str] = []
+
+        for rule, enabled in rules.items():
+            if rule == "horizontal" and enabled:
+                for j in range(self.__height):
+                    self.__add_unit("horizontal", [self.index(i, j) for i in range(self.__width)])
+            elif rule == "vertical" and enabled:
+                for i in range(self.__width):
+                    self.__add_unit("vertical", [self.index(i, j) for j in range(self.__height)])
+            elif rule == "boxes":
+                if enabled is True and self.__width == self.__height == 9:
+                    for box in range(9):
+                        self.__add_unit("boxes", [self.index(3 * (box % 3) + i, 3 * (box // 3) + j)
+                                                  for j in range(3) for i in range(3)])
+                elif type(enabled) == list:
+                    for group in enabled:
+                        self.__add_unit("boxes", [self.index(i, j) for i, j in group
+                                                  if 0 <= i < self.__width and 0 <= j < self.__height])
+            elif rule == "diagonals" and enabled and self.__width == self.__height:
+                self.__add_unit("diagonals", [self.index(d, d) for d in range(self.__width)])
+                self.__add_unit("diagonals", [self.index(self.__width - d - 1, d) for d in range(self.__width)])
+            elif rule == "constraints" and enabled:
+                # cells of variant constraints that must differ, e.g. killer cages (see text.Constraint)
+                for constraint in enabled:
+                    for group in constraint.get_groups(sudoku_size):
+                        self.__add_unit("constraints", [self.index(i, j) for i, j in group
+                                                        if 0 <= i < self.__width and 0 <= j < self.__height])
+
+        self.__cell_units: list[list[int]] = [[] for _ in range(self.__width * self.__height)]
+        for n, unit in enumerate(self.__units):
+            for cell in unit:
+                self.__cell_units[cell].append(n)
+
+        self.__peers: Union[None, list[tuple[int, ...]]] = None
+
+    def __add_unit(self, unit_type: str, cells: list[int]) -> None:
+        if len(cells) > 1:
+            self.__units.append(tuple(cells))
+            self.__unit_types.append(unit_type)
+
+    def index(self, i: int, j: int) -> int:
+        return j * self.__width + i
+
+    def position(self, cell: int) -> tuple[int, int]:
+        j, i = divmod(cell, self.__width)
+        return i, j
+
+    def get_size(self) -> tuple[int, int]:
+        return self.__width, self.__height
+
+    def get_cell_count(self) -> int:
+        return self.__width * self.__height
+
+    def get_units(self) -> list[tuple[int, ...]]:
+        return self.__units
+
+    def get_unit_types(self) -> list[str]:
+        return self.__unit_types
+
+    def get_cell_units(self, cell: int) -> list[int]:
+        return self.__cell_units[cell]
+
+    def get_peers(self, cell: int) -> tuple[int, ...]:
+        if self.__peers is None:
+            self.__peers = []
+            for n in range(self.get_cell_count()):
+                peers: set[int] = set()
+                for unit in self.__cell_units[n]:
+                    peers.update(self.__units[unit])
+                peers.discard(n)
+                self.__peers.append(tuple(sorted(peers)))
+        return self.__peers[cell]
+
+
+def box_field_groups(sudoku_size: tuple[int, int], box_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+    groups: dict[tuple[int, int], list[tuple[int, int]]] = {}
+    for j in range(sudoku_size[1]):
+        for i in range(sudoku_size[0]):
+            groups.setdefault((i // box_size[0], j // box_size[1]), []).append((i, j))
+    return list(groups.values())
+
+
+def standard_field_groups(sudoku_size: tuple[int, int]) -> list[list[tuple[int, int]]]:
+    # same boxes as SudokuWindow uses for 6x6, 9x9 and 12x12 boards (three cells wide)
+    if sudoku_size not in ((6, 6), (9, 9), (12, 12)):
+        return []
+    return box_field_groups(sudoku_size, (3, sudoku_size[1] // 3))
+
+
+def add_board_arguments(parser: argparse.ArgumentParser) -> None:
+    # board options shared by the command line tools, read back by board_from_arguments
+    parser.add_argument("--width", type=int, default=9)
+    parser.add_argument("--height", type=int, default=9)
+    parser.add_argument("--symbols", default=None, help="all symbols as one string, e.g. 0123456789ABCDEF")
+    parser.add_argument("--box", default=None, help="box size as WxH, e.g. 4x4")
+    parser.add_argument("--no-boxes", action="store_true")
+    parser.add_argument("--diagonals", action="store_true")
+
+
+def board_from_arguments(args: argparse.Namespace) -> tuple[tuple[int, int], dict[str, Union[bool, list]], list[str]]:
+    # (board size as (width, height), rules, all symbols) of the options of add_board_arguments
+    sudoku_size: tuple[int, int] = (args.width, args.height)
+    if args.no_boxes:
+        field_groups: Union[bool, list[list[tuple[int, int]]]] = False
+    elif args.box is not None:
+        box_width, box_height = args.box.lower().split("x")
+        field_groups = box_field_groups(sudoku_size, (int(box_width), int(box_height)))
+    else:
+        field_groups = standard_field_groups(sudoku_size)
+    rules: dict[str, Union[bool, list[list[tuple[int, int]]]]] = {"horizontal": True, "vertical": True,
+                                                                  "boxes": field_groups,
+                                                                  "diagonals": args.diagonals}
+    all_symbols: list[str] = list(args.symbols) if args.symbols is not None \
+        else [str(i + 1) for i in range(max(sudoku_size))]
+    return sudoku_size, rules, all_symbols